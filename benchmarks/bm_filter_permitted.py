@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filtering 10,000 objects of a listing view by permission, with
+:func:`nti.app.pyramid_zope.security.filter_permitted` compared to
+calling :func:`zope.security.checkPermission` for each object after
+finding the interaction of the request (the previous way).
+
+The objects are of a handful of classes, in a handful of containers.
+They are filtered with two security policies:
+
+``paranoid``
+    The default :class:`zope.security.simplepolicies.ParanoidSecurityPolicy`,
+    whose answer is the same for every object.
+``local grants``
+    A policy that, like the grants of ``zope.securitypolicy``, looks
+    for the permission in the ``__grants__`` of the object and each of
+    its parents. Its answers are not remembered unless it is added to
+    :data:`~nti.app.pyramid_zope.security.PERMISSION_CACHE_KEYS`; the
+    ``keyed`` row adds it with a key of the object's parent, which is
+    correct here because only the containers have grants.
+
+Run with ``python benchmarks/bm_filter_permitted.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.request import Request
+
+from zope import interface
+
+from zope.security import checkPermission
+from zope.security.interfaces import IInteraction
+from zope.security.interfaces import IParticipation
+from zope.security.management import endInteraction
+from zope.security.management import newInteraction
+from zope.security.management import setSecurityPolicy
+from zope.security.management import system_user
+from zope.security.simplepolicies import ParanoidSecurityPolicy
+
+from nti.app.pyramid_zope.security import PERMISSION_CACHE_KEYS
+from nti.app.pyramid_zope.security import filter_permitted
+from nti.app.pyramid_zope.security import interaction_from_request
+
+OBJECTS = 10000
+
+
+@interface.implementer(IParticipation)
+class Participation(object):
+
+    def __init__(self, principal):
+        self.interaction = None
+        self.principal = principal
+
+
+class Principal(object):
+
+    def __init__(self, id):
+        self.id = id # pylint:disable=redefined-builtin
+
+
+class LocalGrantsPolicy(ParanoidSecurityPolicy):
+
+    def checkPermission(self, permission, object):
+        principals = [p.principal.id for p in self.participations]
+        while object is not None:
+            grants = getattr(object, '__grants__', None)
+            if grants is not None:
+                granted = grants.get(permission, ())
+                if any(principal in granted for principal in principals):
+                    return True
+            object = getattr(object, '__parent__', None)
+        return False
+
+
+def parent_key(principals, permission, ob):
+    return (principals, permission, ob.__parent__)
+
+
+class Container(object):
+    __parent__ = None
+
+    def __init__(self, grants):
+        self.__grants__ = grants
+
+
+class A(object):
+
+    def __init__(self, parent):
+        self.__parent__ = parent
+
+class B(A):
+    pass
+
+class C(A):
+    pass
+
+
+def legacy_filter_permitted(permission, objects, request):
+    return [o for o in objects
+            if checkPermission(permission, o, IInteraction(request))]
+
+
+def run(label, objects, principal):
+    request = Request.blank('/')
+    newInteraction(Participation(principal))
+    try:
+        assert legacy_filter_permitted('zope.View', objects, request) \
+            == filter_permitted('zope.View', objects, request)
+
+        for when, func in (('before', legacy_filter_permitted),
+                           ('after', filter_permitted)):
+            request = Request.blank('/')
+            elapsed = min(timeit.repeat(
+                lambda: func('zope.View', objects, request), # pylint:disable=cell-var-from-loop
+                number=20, repeat=3)) / 20
+            print('%-20s %-7s %d objects %10.2f ms' % (label, when, OBJECTS, elapsed * 1e3))
+    finally:
+        endInteraction()
+
+
+def main():
+    from zope import component
+    component.provideAdapter(interaction_from_request, (interface.Interface,), IInteraction)
+    containers = [Container({'zope.View': ('bob',) if i % 2 else ()}) for i in range(5)]
+    objects = [cls(containers[i % len(containers)])
+               for i in range(OBJECTS // 3 + 1)
+               for cls in (A, B, C)][:OBJECTS]
+
+    setSecurityPolicy(ParanoidSecurityPolicy)
+    run('paranoid', objects, system_user)
+
+    old_policy = setSecurityPolicy(LocalGrantsPolicy)
+    try:
+        bob = Principal('bob')
+        run('local grants', objects, bob)
+        PERMISSION_CACHE_KEYS[LocalGrantsPolicy] = parent_key
+        run('local grants, keyed', objects, bob)
+    finally:
+        PERMISSION_CACHE_KEYS.pop(LocalGrantsPolicy, None)
+        setSecurityPolicy(old_policy)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Marshalling a 500-field urlencoded POST into a form with
+:attr:`.PyramidZopeRequestProxy.form`, compared to
+:meth:`zope.publisher.browser.BrowserRequest.processInputs` on the
+same input. Both include parsing the body; the time spent marshalling
+already-parsed parameters with :func:`.process_form` is shown
+separately.
+
+Run with ``python benchmarks/bm_form.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import io
+import timeit
+
+from six.moves.urllib_parse import urlencode
+
+from pyramid.request import Request
+
+from zope.publisher.browser import BrowserRequest
+
+from nti.app.pyramid_zope.form import process_form
+from nti.app.pyramid_zope.request import PyramidZopeRequestProxy
+
+FIELDS = 500
+
+
+def make_body(count):
+    pairs = []
+    suffixes = ('', ':int', ':list', ':float', ':tokens')
+    for i in range(count):
+        if i % 10 == 0:
+            pairs.append(('rec%d.name:record' % (i // 100), 'n%d' % i))
+            continue
+        suffix = suffixes[i % len(suffixes)]
+        value = str(i) + ('.5' if suffix == ':float' else '')
+        pairs.append(('field%d%s' % (i, suffix), value))
+    return urlencode(pairs).encode('ascii')
+
+
+def environ(body):
+    return {
+        'REQUEST_METHOD': 'POST',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'PATH_INFO': '/',
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http',
+    }
+
+
+def zope_publisher(body):
+    request = BrowserRequest(io.BytesIO(body), environ(body))
+    request.charsets = ['utf-8']
+    request.processInputs()
+    return request.form
+
+
+def pyramid_proxy(body):
+    env = environ(body)
+    env['wsgi.input'] = io.BytesIO(body)
+    return PyramidZopeRequestProxy(Request(env)).form
+
+
+def main():
+    body = make_body(FIELDS)
+    assert len(zope_publisher(body)) == len(pyramid_proxy(body))
+    number = 200
+    for func in (zope_publisher, pyramid_proxy):
+        elapsed = min(timeit.repeat(lambda: func(body), # pylint:disable=cell-var-from-loop
+                                    number=number, repeat=3)) / number
+        print('%-16s %d fields %10.1f us' % (func.__name__, FIELDS, elapsed * 1e6))
+
+    env = environ(body)
+    env['wsgi.input'] = io.BytesIO(body)
+    items = list(Request(env).params.items())
+    elapsed = min(timeit.repeat(lambda: process_form(items),
+                                number=number, repeat=3)) / number
+    print('%-16s %d fields %10.1f us' % ('process_form', FIELDS, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Finding the principal of a new request with
+:func:`nti.app.pyramid_zope.security.principal_from_request`, with
+the adapters found ahead of time by
+:func:`~nti.app.pyramid_zope.security.warm_up_security_adapters`,
+compared to plain ``IPrincipal(IInteraction(request))`` (the previous
+implementation, two full adapter lookups).
+
+The requests provide a route request interface, as requests that
+match a route do. Each timed call uses a new request, so that the
+principal isn't already remembered by the request.
+
+Run with ``python benchmarks/bm_principal_from_request.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.request import Request
+from pyramid.request import route_request_iface
+
+from zope import component
+from zope import interface
+
+from zope.security.interfaces import IInteraction
+from zope.security.interfaces import IParticipation
+from zope.security.interfaces import IPrincipal
+from zope.security.management import endInteraction
+from zope.security.management import newInteraction
+
+from nti.app.pyramid_zope.security import interaction_from_request
+from nti.app.pyramid_zope.security import principal_from_interaction
+from nti.app.pyramid_zope.security import principal_from_request
+from nti.app.pyramid_zope.security import warm_up_security_adapters
+
+REQUESTS = 10000
+
+
+@interface.implementer(IPrincipal)
+class Principal(object):
+    id = 'bob'
+
+
+@interface.implementer(IParticipation)
+class Participation(object):
+
+    def __init__(self, principal):
+        self.interaction = None
+        self.principal = principal
+
+
+def main():
+    component.provideAdapter(interaction_from_request)
+    component.provideAdapter(principal_from_interaction)
+    warm_up_security_adapters()
+
+    route_iface = route_request_iface('users')
+    requests = []
+    for _ in range(REQUESTS):
+        request = Request.blank('/')
+        interface.alsoProvides(request, route_iface)
+        requests.append(request)
+
+    def before():
+        for request in requests:
+            IPrincipal(IInteraction(request))
+
+    def after():
+        for request in requests:
+            principal_from_request(request)
+            # Forget it again
+            request.__dict__.pop('_nti_security_cache')
+
+    newInteraction(Participation(Principal()))
+    try:
+        for label, func in (('before', before), ('after', after)):
+            elapsed = min(timeit.repeat(func, number=1, repeat=5)) / REQUESTS
+            print('%-7s %8.2f us per request' % (label, elapsed * 1e6))
+    finally:
+        endInteraction()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Traversing paths of 3, 10 and 50 segments with
+:class:`.ZopeResourceTreeTraverser` through objects that aren't
+``ITraversable`` themselves, but have an ``ITraversable``
+multi-adapter registered for them and the request (as the objects
+of most applications do).
+
+'before' finds the adapter with ``queryMultiAdapter`` for each
+segment, as the traverser used to; 'after' uses the factories the
+traverser remembers for each pair of object and request interfaces.
+
+Run with ``python benchmarks/bm_query_traversable.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.interfaces import IRequest
+from pyramid.request import Request
+
+from zope import component
+from zope import interface
+
+from zope.component import queryMultiAdapter
+
+from zope.location.interfaces import LocationError
+
+from zope.traversing.interfaces import ITraversable
+
+from nti.app.pyramid_zope import traversal
+
+
+class IFolder(interface.Interface):
+    pass
+
+
+@interface.implementer(IFolder)
+class Folder(dict):
+    pass
+
+
+@interface.implementer(ITraversable)
+class FolderTraversable(object):
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    def traverse(self, name, furtherPath): # pylint:disable=unused-argument
+        try:
+            return self.context[name]
+        except KeyError:
+            raise LocationError(self.context, name)
+
+
+def legacy_query_traversable(ob, request):
+    try:
+        return queryMultiAdapter((ob, request), ITraversable)
+    except TypeError:
+        return None
+
+
+def main():
+    import zope.event
+    del zope.event.subscribers[:]
+    component.provideAdapter(FolderTraversable, (IFolder, IRequest), ITraversable)
+    query_traversable = traversal._query_traversable # pylint:disable=protected-access
+
+    for segments in (3, 10, 50):
+        root = ob = Folder()
+        path = []
+        for i in range(segments):
+            name = 'f%d' % i
+            ob[name] = ob = Folder()
+            path.append(name)
+
+        request = Request.blank('/' + '/'.join(path))
+        request.matchdict = {'traverse': tuple(path)}
+        traverse = traversal.ZopeResourceTreeTraverser(root)
+
+        number = 20000 // segments
+        results = {}
+        try:
+            # Interleave them, so both see the same conditions.
+            for _ in range(3):
+                for label, func in (('before', legacy_query_traversable),
+                                    ('after', query_traversable)):
+                    traversal._query_traversable = func # pylint:disable=protected-access
+                    assert traverse(request)['context'] is ob
+                    results.setdefault(label, []).append(
+                        timeit.timeit(lambda: traverse(request), # pylint:disable=cell-var-from-loop
+                                      number=number) / number)
+        finally:
+            traversal._query_traversable = query_traversable # pylint:disable=protected-access
+        for label in ('before', 'after'):
+            print('%-7s %4d segments %10.1f us' % (
+                label, segments, min(results[label]) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-call cost of :meth:`.PyramidZopeRequestProxy.get` with the merged
+parameter index, compared to rebuilding the merged parameters on
+each call (the previous implementation).
+
+Run with ``python benchmarks/bm_request_get.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.request import Request
+
+from nti.app.pyramid_zope.request import PyramidZopeRequestProxy
+
+
+def legacy_get(zrequest, key, default=None):
+    def _d_o_l(o):
+        return o.dict_of_lists() if hasattr(o, 'dict_of_lists') else o.copy()
+    dict_of_lists = _d_o_l(zrequest.GET)
+    dict_of_lists.update(_d_o_l(zrequest.POST))
+    val = dict_of_lists.get(key)
+    if val:
+        if len(val) == 1:
+            val = val[0]
+    else:
+        val = zrequest.environ.get(key, default)
+    return val
+
+
+def make_request(count, post=True):
+    if not post:
+        # A GET request; its POST is a new (empty) NoVars each time.
+        query = '&'.join('g%d=%d' % (i, i) for i in range(count))
+        return PyramidZopeRequestProxy(Request.blank('/?' + query))
+    half = count // 2
+    query = '&'.join('g%d=%d' % (i, i) for i in range(half))
+    post = {'p%d' % i: str(i) for i in range(count - half)}
+    return PyramidZopeRequestProxy(Request.blank('/?' + query, POST=post))
+
+
+def bench(count, number=2000, post=True):
+    zrequest = make_request(count, post)
+    keys = ['g0', 'p0', 'missing']
+    legacy = min(timeit.repeat(
+        lambda: [legacy_get(zrequest, k) for k in keys],
+        number=number, repeat=3))
+    indexed = min(timeit.repeat(
+        lambda: [zrequest.get(k) for k in keys],
+        number=number, repeat=3))
+    per_call = number * len(keys)
+    return legacy / per_call, indexed / per_call
+
+
+def main():
+    print('%8s %8s %14s %14s %8s' % ('method', 'params', 'before (us)', 'after (us)',
+                                      'speedup'))
+    for post in (True, False):
+        for count in (10, 100, 1000):
+            number = 20000 // count or 1
+            before, after = bench(count, number, post)
+            print('%8s %8d %14.2f %14.2f %7.1fx' % ('POST' if post else 'GET',
+                                                   count, before * 1e6, after * 1e6,
+                                                   before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Counts how many :class:`.PyramidZopeRequestProxy` objects a typical
+request creates, and how long those adaptations take, with and without
+the per-request proxy cache.
+
+"Before" is emulated by discarding the cached proxy after every
+adaptation, which is what happened when each adaptation built its own
+proxy.
+
+Run with ``python benchmarks/bm_request_proxy.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.request import Request
+
+from zope.configuration import xmlconfig
+from zope.publisher.interfaces.browser import IBrowserRequest
+
+import nti.app.pyramid_zope
+from nti.app.pyramid_zope import request as request_module
+from nti.app.pyramid_zope.i18n.adapters import PyramidBrowserPreferredCharsets
+from nti.app.pyramid_zope.i18n.adapters import PyramidBrowserPreferredLanguages
+from nti.app.pyramid_zope.traversal import resource
+
+#: Templates (and macros) rendered by a typical page
+TEMPLATES = 5
+#: ++resource++ URLs computed by a typical page
+RESOURCES = 3
+
+created = [0]
+
+_setUp = request_module.PyramidZopeRequestProxy.__dict__['_setUp'].__func__
+
+def _counting_setUp(base):
+    created[0] += 1
+    _setUp(base)
+
+request_module.PyramidZopeRequestProxy._setUp = staticmethod(_counting_setUp)
+
+
+def typical_request(legacy):
+    request = Request.blank('/folder/item')
+
+    def adapted(value):
+        if legacy:
+            request_module._discard_proxy(request)
+        return value
+
+    for _ in range(TEMPLATES):
+        # ZPTTemplateRenderer.__call__
+        adapted(IBrowserRequest(request))
+    adapted(PyramidBrowserPreferredLanguages(request))
+    adapted(PyramidBrowserPreferredCharsets(request))
+    for _ in range(RESOURCES):
+        adapted(resource(None, request))
+    return request
+
+
+def main():
+    xmlconfig.file('configure.zcml', package=nti.app.pyramid_zope)
+
+    for legacy, label in ((True, 'before'), (False, 'after')):
+        created[0] = 0
+        typical_request(legacy)
+        count = created[0]
+        elapsed = min(timeit.repeat(lambda: typical_request(legacy), # pylint:disable=cell-var-from-loop
+                                    number=500, repeat=3)) / 500
+        print('%-7s %3d proxies per request %8.1f us per request' % (
+            label, count, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
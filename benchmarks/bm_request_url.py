@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The URL lookups made while rendering a 1000-row table (in the style
+of :mod:`z3c.table`, which asks for the request URL once per row and
+per column to build sort and batch links), with the parsed URL
+segment table compared to re-parsing the URL on every call
+(the previous implementation).
+
+Run with ``python benchmarks/bm_request_url.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from six.moves.urllib_parse import urlparse
+from six.moves.urllib_parse import urlunparse
+
+from pyramid.request import Request
+
+from nti.app.pyramid_zope.request import PyramidZopeRequestProxy
+
+ROWS = 1000
+COLUMNS = 5
+
+
+def legacy_traverse_request_path(zrequest, level, path_only):
+    parsed = list(urlparse(zrequest.path_url))
+    if level:
+        parts = [x for x in parsed[2].split('/') if x]
+        if abs(level) > len(parts):
+            raise IndexError(abs(level))
+        parts = parts[:level]
+        parsed[2] = '/'+'/'.join(parts) if parts else ''
+    return parsed[2] if path_only else urlunparse(parsed)
+
+
+def render_table(zrequest, traverse):
+    for _ in range(ROWS):
+        for _ in range(COLUMNS):
+            # getURL(), getURL(1) and getApplicationURL(1)
+            traverse(0, False)
+            traverse(-1, False)
+            traverse(1, True)
+
+
+def main():
+    zrequest = PyramidZopeRequestProxy(
+        Request.blank('http://example.com/dataserver2/users/bob/Courses/table'))
+
+    def before():
+        render_table(zrequest,
+                     lambda level, path_only: legacy_traverse_request_path(
+                         zrequest, level, path_only))
+
+    def after():
+        render_table(zrequest, zrequest._traverse_request_path) # pylint:disable=protected-access
+
+    for label, func in (('before', before), ('after', after)):
+        elapsed = min(timeit.repeat(func, number=5, repeat=3)) / 5
+        print('%-7s %d rows %10.2f ms per table' % (label, ROWS, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Traversing paths of 3, 10, 50, 200 and 1000 segments with
+:class:`.ZopeResourceTreeTraverser`, showing the time per segment
+(which should not grow with the length of the path).
+
+'before' is a copy of the traversal loop of version 0.0.3, which
+sliced the remaining path off of the whole path for each segment and
+compared it with another slice afterwards; 'after' is the current
+traverser. Nothing is subscribed to the events either notifies.
+
+Run with ``python benchmarks/bm_traverse_depth.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.testing import DummyRequest
+
+from zope.component import queryMultiAdapter
+
+from zope.location.interfaces import LocationError
+
+from zope.traversing import api as ztraversing
+
+from zope.traversing.interfaces import ITraversable
+
+from nti.app.pyramid_zope.tests import Folder
+from nti.app.pyramid_zope.traversal import ZopeResourceTreeTraverser
+from nti.app.pyramid_zope.traversal import _notify_before_traverse_event
+from nti.app.pyramid_zope.traversal import empty
+from nti.app.pyramid_zope.traversal import split_path_info
+
+
+class PreviousTraverser(ZopeResourceTreeTraverser):
+
+    def _traverse(self, request, vpath, subpath, vroot_tuple, vroot_idx,
+                  prefix_cache, not_found_cache, prefetcher):
+        # pylint:disable=too-many-locals,too-many-arguments,unused-argument
+        # The loop of ZopeResourceTreeTraverser.__call__ in 0.0.3.
+        root = self.root
+        ob = vroot = root
+
+        if vpath == '/':  # invariant: vpath must not be empty
+            # prevent a call to traversal_path if we know it's going
+            # to return the empty tuple
+            vpath_tuple = ()
+        else:
+            i = 0
+            view_selector = self.VIEW_SELECTOR
+            # A list so that remaining_path can be modified
+            vpath_tuple = list(split_path_info(vpath))
+            for segment in vpath_tuple:
+                # JAM: Fire traversal events, mainly so sites get installed. See
+                # zope.publisher.base.
+                _notify_before_traverse_event(ob, request)
+                # JAM: Notice that checking for '@@' is special cased, and
+                # doesn't go through the normal namespace lookup as it would in
+                # plain zope traversal. (XXX: Why not?)
+                if segment.startswith(view_selector):  # pragma: no cover
+                    return {'context': ob,
+                            'view_name': segment[2:],
+                            'subpath': vpath_tuple[i + 1:],
+                            'traversed': vpath_tuple[:vroot_idx + i + 1],
+                            'virtual_root': vroot,
+                            'virtual_root_path': vroot_tuple,
+                            'root': root}
+
+                try:
+                    # JAM: This is where we differ. instead of using __getitem__,
+                    # we use the traversing machinery.
+                    # The zope app would use IPublishTraverser, which
+                    # would install security proxies along the way. We probably don't need to
+                    # do that? TODO:
+                    # NOTE: By passing the request here, we require all traversers
+                    # (including the namespace traversers) to be registered as multi-adapters.
+                    # None of the default namespaces are. See our
+                    # configure.zcml for what is.
+
+                    # JAM: Damn stupid implementation of traversePathElement ignores
+                    # the request argument to find a traversable /except/ when a namespace is found.
+                    # therefore, we explicitly query for the multi adapter ourself in the non-namespace case
+                    # (In the namespace case, we let traversing handle it, because it needs a named adapter
+                    # after parsing)
+                    traversable = None
+                    if segment and segment[0] not in '+@' \
+                            and not ITraversable.providedBy(ob):
+                        try:
+                            # Use the installed component registry
+                            # instead of the request registry (which
+                            # is the global component registry if
+                            # pyramid was configured that way, or a
+                            # standalone registry) in case the act of
+                            # traversing has changed the site manager;
+                            # zope.site.site.threadSiteSubscriber will
+                            # do this for each BeforeTraverseEvent
+                            # that's fired (though that's not
+                            # registered by default).
+                            traversable = queryMultiAdapter((ob, request),
+                                                            ITraversable)
+                        except TypeError:
+                            # Some things are registered for "*" (DefaultTraversable)
+                            # which means they get called here. If they can't take
+                            # two arguments, then we bail. Sucks.
+                            pass
+
+                    remaining_path = vpath_tuple[i + 1:]
+                    next_ob = ztraversing.traversePathElement(ob,
+                                                              segment,
+                                                              remaining_path,
+                                                              traversable=traversable,
+                                                              request=request)
+                    if remaining_path != vpath_tuple[i + 1:]:
+                        # Is this if check necessary? It would be faster to
+                        # always assign
+                        vpath_tuple[i + 1:] = remaining_path
+                except LocationError:
+                    # LocationError is a type of KeyError. The DefaultTraversable turns
+                    # plain KeyError and TypeErrors into LocationError.
+                    return {'context': ob,
+                            'view_name': segment,
+                            'subpath': vpath_tuple[i + 1:],
+                            'traversed': vpath_tuple[:vroot_idx + i + 1],
+                            'virtual_root': vroot,
+                            'virtual_root_path': vroot_tuple,
+                            'root': root}
+                if i == vroot_idx:  # pragma: no cover
+                    vroot = next_ob
+                ob = next_ob
+                i += 1
+
+        # JAM: Also fire before traversal for the actual context item, since we
+        # won't actually traverse into it. Be sure not to fire multiple times
+        # for this (E.g., the root). This logic is complicated by the
+        # multi-returns above.
+        _notify_before_traverse_event(ob, request)
+
+        return {'context': ob,
+                'view_name': empty,
+                'subpath': subpath,
+                'traversed': vpath_tuple,
+                'virtual_root': vroot,
+                'virtual_root_path': vroot_tuple,
+                'root': root}
+
+
+def main():
+    import zope.event
+    del zope.event.subscribers[:]
+
+    for segments in (3, 10, 50, 200, 1000):
+        root = ob = Folder()
+        path = []
+        for i in range(segments):
+            name = 'f%d' % i
+            ob[name] = ob = Folder()
+            path.append(name)
+        path = tuple(path)
+
+        request = DummyRequest(path='/' + '/'.join(path))
+        request.matchdict = {'traverse': path}
+        traversers = (('before', PreviousTraverser(root)),
+                      ('after', ZopeResourceTreeTraverser(root)))
+        number = max(20, 20000 // segments)
+        results = {}
+        # Interleave them, so both see the same conditions.
+        for _ in range(5):
+            for label, traverse in traversers:
+                assert traverse(request)['context'] is ob
+                results.setdefault(label, []).append(
+                    timeit.timeit(lambda: traverse(request), # pylint:disable=cell-var-from-loop
+                                  number=number) / number)
+        for label, _ in traversers:
+            elapsed = min(results[label])
+            print('%-7s %4d segments %10.1f us %8.3f us per segment' % (
+                label, segments, elapsed * 1e6, elapsed * 1e6 / segments))
+
+
+if __name__ == '__main__':
+    main()
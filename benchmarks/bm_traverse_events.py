@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Traversing a 20-segment URL with :class:`.ZopeResourceTreeTraverser`,
+notifying a ``BeforeTraverseEvent`` for every object (the default)
+compared to only when a subscriber could see it
+(``skip_unobserved_traverse_events``).
+
+This is done with no subscribers, and with a subscriber for
+:class:`~zope.component.interfaces.ISite` objects (like
+``zope.site.site.threadSiteSubscriber``) when none of the objects
+traversed is a site.
+
+Run with ``python benchmarks/bm_traverse_events.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.testing import DummyRequest
+
+from zope import component
+
+from zope.component.event import objectEventNotify
+from zope.component.interfaces import ISite
+
+from zope.traversing.interfaces import IBeforeTraverseEvent
+
+from nti.app.pyramid_zope.tests import Folder
+from nti.app.pyramid_zope.traversal import ZopeResourceTreeTraverser
+
+SEGMENTS = 20
+
+
+class SkippingTraverser(ZopeResourceTreeTraverser):
+    skip_unobserved_traverse_events = True
+
+
+def site_subscriber(site, event): # pylint:disable=unused-argument
+    pass
+
+
+def main():
+    component.provideHandler(objectEventNotify)
+    root = ob = Folder()
+    path = []
+    for i in range(SEGMENTS):
+        name = 'f%d' % i
+        ob[name] = ob = Folder()
+        path.append(name)
+    path = tuple(path)
+
+    request = DummyRequest(path='/' + '/'.join(path))
+    request.matchdict = {'traverse': path}
+
+    def run(traverser):
+        return lambda: traverser(root)(request)
+
+    for subscribers in ('no', 'site'):
+        if subscribers == 'site':
+            component.provideHandler(site_subscriber, (ISite, IBeforeTraverseEvent))
+        for label, traverser in (('before', ZopeResourceTreeTraverser),
+                                 ('after', SkippingTraverser)):
+            assert run(traverser)()['context'] is ob
+            elapsed = min(timeit.repeat(run(traverser), number=1000, repeat=3)) / 1000
+            print('%-7s %-4s subscribers %d segments %8.1f us' % (
+                label, subscribers, SEGMENTS, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
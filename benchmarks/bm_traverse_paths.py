@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Resolving 1000 sibling paths (``/a/b/c/item0`` ... ``/a/b/c/item999``)
+one at a time with :class:`.ZopeResourceTreeTraverser` ('before') and
+all at once with :func:`.traverse_paths` ('after').
+
+Run with ``python benchmarks/bm_traverse_paths.py``.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import timeit
+
+from pyramid.testing import DummyRequest
+
+from nti.app.pyramid_zope.tests import Folder
+from nti.app.pyramid_zope.traversal import ZopeResourceTreeTraverser
+from nti.app.pyramid_zope.traversal import traverse_paths
+
+
+def main():
+    import zope.event
+    del zope.event.subscribers[:]
+
+    parent = Folder()
+    root = Folder(a=Folder(b=Folder(c=parent)))
+    paths = []
+    for i in range(1000):
+        name = 'item%d' % i
+        parent[name] = Folder()
+        paths.append(('a', 'b', 'c', name))
+
+    request = DummyRequest()
+    traverser = ZopeResourceTreeTraverser(root)
+
+    def before():
+        results = []
+        for path in paths:
+            request.matchdict = {'traverse': path}
+            results.append(traverser(request))
+        return results
+
+    def after():
+        return traverse_paths(root, paths, request)
+
+    assert [r['context'] for r in before()] == [r['context'] for r in after()]
+
+    for name, func in (('before', before), ('after', after)):
+        elapsed = min(timeit.repeat(func, number=20, repeat=3)) / 20
+        print('%-7s %8.2f ms per 1000 paths' % (name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,7 @@ TESTS_REQUIRE = [
     'coverage',
     'fudge',
     'nti.testing',
+    'ZODB',
     'zope.testrunner',
 ]
 
@@ -80,6 +81,7 @@ setup(
         'zope.dottedname',
         'zope.i18n',
         'zope.interface',
+        'zope.lifecycleevent',
         'zope.pagetemplate',
         'zope.principalregistry',
         'zope.proxy',
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Caching support shared by the rest of this package.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+import functools
+import threading
+import time
+import weakref
+
+from collections import OrderedDict
+
+from zope.component import getSiteManager
+from zope.proxy import removeAllProxies
+
+__all__ = [
+    'CacheStats',
+    'LRUCache',
+    'RegistryGenerationCache',
+    'request_annotations',
+    'request_cache',
+    'request_memoize',
+]
+
+_marker = object()
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe mapping that discards the least recently
+    used entry when it is full.
+
+    If *ttl* is given, entries also expire that many seconds (as
+    measured by *clock*) after they were set.
+
+    It keeps counts of :attr:`hits`, :attr:`misses`,
+    :attr:`evictions` and :attr:`expirations` for monitoring.
+    """
+
+    hits = 0
+    misses = 0
+    evictions = 0
+    expirations = 0
+
+    def __init__(self, maxsize=1000, ttl=None, clock=time.time):
+        if maxsize < 1:
+            raise ValueError(maxsize)
+        if ttl is not None and ttl <= 0:
+            raise ValueError(ttl)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _unwrap(self, value):
+        # Return the value, or _marker if it has expired.
+        if self.ttl is None:
+            return value
+        value, expires = value
+        if expires <= self._clock():
+            self.expirations += 1
+            return _marker
+        return value
+
+    def get(self, key, default=None):
+        """
+        Return the value for *key*, making it the most recently used,
+        or *default* (counting a miss).
+        """
+        with self._lock:
+            value = self._data.pop(key, _marker)
+            if value is not _marker:
+                unwrapped = self._unwrap(value)
+                if unwrapped is not _marker:
+                    self._data[key] = value
+                    self.hits += 1
+                    return unwrapped
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """
+        Return the value for *key*, or *default*, without counting a
+        hit or miss or making it the most recently used.
+        """
+        value = self._data.get(key, _marker)
+        if value is _marker:
+            return default
+        value = self._unwrap(value)
+        if value is _marker:
+            with self._lock:
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def __setitem__(self, key, value):
+        if self.ttl is not None:
+            value = (value, self._clock() + self.ttl)
+        with self._lock:
+            data = self._data
+            data.pop(key, None)
+            data[key] = value
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+                self.evictions += 1
+
+    set = __setitem__
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def pop(self, key, default=None):
+        """
+        Remove and return the value for *key*, if any.
+        """
+        with self._lock:
+            value = self._data.pop(key, _marker)
+            if value is _marker:
+                return default
+            value = self._unwrap(value)
+            return default if value is _marker else value
+
+    def __contains__(self, key):
+        value = self._data.get(key, _marker)
+        if value is _marker:
+            return False
+        return self.ttl is None or value[1] > self._clock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self, reset_counters=True):
+        """
+        Remove all entries and, unless *reset_counters* is false, reset
+        the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            if reset_counters:
+                self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """
+        Return a dictionary of the counters and current size.
+        """
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def __repr__(self):
+        return '<%s.%s %s>' % (
+            type(self).__module__,
+            type(self).__name__,
+            self.stats()
+        )
+
+
+class RegistryGenerationCache(object):
+    """
+    Dictionaries of things computed from the adapters of a component
+    registry, such as the results of adapter lookups, or from its
+    utilities if *kind* is ``'utilities'``.
+
+    There is one dictionary for each registry. It is emptied when
+    :meth:`data` notices that the adapters (or utilities) of the
+    registry or one of its bases have changed since it was last
+    called, or that the dictionary has grown beyond *maxsize* entries.
+    """
+
+    def __init__(self, maxsize=1000, kind='adapters'):
+        self.maxsize = maxsize
+        self.kind = kind
+        self._states = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def data(self, registry=None):
+        """
+        Return the dictionary for *registry* (by default, the current
+        site manager).
+        """
+        if registry is None:
+            registry = getSiteManager()
+        adapters = getattr(registry, self.kind)
+        generation = adapters._generation # pylint:disable=protected-access
+        state = self._states.get(adapters)
+        if state is None or state[0] != generation or len(state[1]) > self.maxsize:
+            state = (generation, {})
+            with self._lock:
+                self._states[adapters] = state
+        return state[1]
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+class CacheStats(object):
+    """
+    Hit and miss counters for :func:`request_memoize`.
+    """
+
+    __slots__ = (
+        'hits',
+        'misses',
+    )
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self):
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Return a dictionary of the counters.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def __repr__(self):
+        return '<%s.%s %s>' % (
+            type(self).__module__,
+            type(self).__name__,
+            self.stats()
+        )
+
+
+def request_annotations(request):
+    """
+    Return the annotations dictionary of *request*, creating it if
+    needed.
+
+    This is the same dictionary as
+    :attr:`.PyramidZopeRequestProxy.annotations`, whether *request* is
+    the Pyramid request or a proxy of it, and it goes away with the
+    request.
+    """
+    return removeAllProxies(request).__dict__.setdefault('annotations', {})
+
+
+_REQUEST_CACHE_KEY = __name__ + '.request_cache'
+
+
+def request_cache(request):
+    """
+    Return the dictionary :func:`request_memoize` uses to store results
+    for *request*. It lives in the :func:`request_annotations`.
+    """
+    annotations = request_annotations(request)
+    try:
+        return annotations[_REQUEST_CACHE_KEY]
+    except KeyError:
+        return annotations.setdefault(_REQUEST_CACHE_KEY, {})
+
+
+def request_memoize(func=None, stats=False):
+    """
+    Decorate a function whose first argument is a request so that it
+    is only called once per request for the same remaining arguments.
+
+    The results are stored in the :func:`request_cache` of the request
+    and go away with it. Calls with arguments that can't be hashed are
+    not cached.
+
+    Can be used with or without arguments::
+
+        @request_memoize
+        def lookup(request, name):
+            ...
+
+        @request_memoize(stats=True)
+        def lookup(request, name):
+            ...
+
+    The decorated function has an ``invalidate(request, *args, **kwargs)``
+    function to forget one result, and a ``stats`` attribute, which is
+    a :class:`CacheStats` if *stats* is true and None otherwise.
+    """
+    if func is None:
+        return functools.partial(request_memoize, stats=stats)
+
+    counters = CacheStats() if stats else None
+
+    def _key(args, kwargs):
+        if kwargs:
+            return (func, args, frozenset(kwargs.items()))
+        return (func, args)
+
+    @functools.wraps(func)
+    def memoized(request, *args, **kwargs):
+        cache = request_cache(request)
+        try:
+            key = _key(args, kwargs)
+            result = cache.get(key, _marker)
+        except TypeError:
+            # Unhashable arguments
+            return func(request, *args, **kwargs)
+        if result is _marker:
+            if counters is not None:
+                counters.misses += 1
+            result = cache[key] = func(request, *args, **kwargs)
+        elif counters is not None:
+            counters.hits += 1
+        return result
+
+    def invalidate(request, *args, **kwargs):
+        try:
+            key = _key(args, kwargs)
+            request_cache(request).pop(key, None)
+        except TypeError:
+            # Unhashable arguments are never cached
+            pass
+
+    memoized.invalidate = invalidate
+    memoized.stats = counters
+    return memoized
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Zope-style marshalling of request parameters into a form dictionary.
+
+This understands the same field name suffixes as
+:meth:`zope.publisher.browser.BrowserRequest.processInputs`: the type
+converters registered with :mod:`zope.publisher.browser`
+(``:int``, ``:float``, ``:long``, ``:string``, ``:required``,
+``:tokens``, ``:lines``, ``:text``, ``:boolean`` and any custom ones),
+``:list``, ``:tuple``, ``:record``, ``:records``, ``:default``
+and ``:ignore_empty``.
+
+Unlike ``BrowserRequest``, which re-parses the suffixes of every
+field name it sees, the suffixes of each distinct field name are
+compiled once (into a :class:`_FieldSpec`) and cached for the life of
+the process, so marshalling a form is a single linear pass over its
+parameters.
+
+.. note:: The ``:method`` and ``:action`` suffixes are accepted (and
+   removed from the field name) but, because Pyramid does its own
+   view lookup, they don't change the path of the request.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+import re
+
+from zope.publisher.browser import Record
+from zope.publisher.browser import type_converters
+
+__all__ = [
+    'process_form',
+]
+
+# Flags. These are the same as those used by zope.publisher.browser,
+# plus a few of our own for things it tracks separately.
+SEQUENCE = 1
+DEFAULT = 2
+RECORD = 4
+RECORDS = 8
+REC = RECORD | RECORDS
+CONVERTED = 32
+IGNORE_EMPTY = 64
+
+_type_format = re.compile('([a-zA-Z][a-zA-Z0-9_]+|\\.[xy])$')
+
+_METHOD_SUFFIXES = frozenset(('method', 'action', 'default_method', 'default_action'))
+
+
+class _FieldSpec(object):
+    """
+    The compiled form of one field name.
+    """
+
+    __slots__ = (
+        'key',
+        'attr',
+        'flags',
+        'converter',
+        'tuple_keys',
+    )
+
+    def __init__(self, key, attr, flags, converter, tuple_keys):
+        #: The key in the form (for records, the name of the record)
+        self.key = key
+        #: For records, the attribute of the record.
+        self.attr = attr
+        self.flags = flags
+        self.converter = converter
+        #: The keys that ``:tuple`` asked to be converted, exactly
+        #: as ``BrowserRequest`` records them.
+        self.tuple_keys = tuple_keys
+
+
+def _split_key(key):
+    i = key.rfind(".")
+    if i >= 0:
+        return key[:i], key[i + 1:]
+    return key, ""
+
+
+def _compile(name):
+    flags = 0
+    converter = None
+    tuple_keys = ()
+    key = name
+    # Syntax: var_name:type_name, searched from the back to the front.
+    while key:
+        pos = key.rfind(":")
+        if pos < 0:
+            break
+        if _type_format.match(key, pos + 1) is None:
+            break
+
+        key, type_name = key[:pos], key[pos + 1:]
+        c = type_converters.get(type_name)
+        if c is not None:
+            converter = c
+            flags |= CONVERTED
+        elif type_name == 'list':
+            flags |= SEQUENCE
+        elif type_name == 'tuple':
+            tuple_keys += (key,)
+            flags |= SEQUENCE
+        elif type_name == 'default':
+            flags |= DEFAULT
+        elif type_name == 'record':
+            flags |= RECORD
+        elif type_name == 'records':
+            flags |= RECORDS
+        elif type_name == 'ignore_empty':
+            flags |= IGNORE_EMPTY
+        elif type_name in _METHOD_SUFFIXES:
+            pass
+
+    attr = None
+    if flags & REC:
+        key, attr = _split_key(key)
+    return _FieldSpec(key, attr, flags, converter, tuple_keys)
+
+
+class _SpecCache(object):
+    """
+    Compiled field names, shared by all requests.
+
+    This is dropped if the registered type converters change, and
+    is bounded so that hostile field names can't grow it without
+    limit.
+    """
+
+    max_size = 10000
+
+    def __init__(self):
+        self._specs = {}
+        self._converters = None
+
+    def getter(self):
+        converters = list(type_converters.items())
+        if converters != self._converters:
+            self._specs = {}
+            self._converters = converters
+        specs = self._specs
+        if len(specs) > self.max_size:
+            specs.clear()
+
+        def get(name):
+            try:
+                return specs[name]
+            except KeyError:
+                spec = specs[name] = _compile(name)
+                return spec
+        return get
+
+    def clear(self):
+        self._specs = {}
+        self._converters = None
+
+_spec_cache = _SpecCache()
+
+
+class _FormBuilder(object):
+    # This is a transliteration of the private methods of
+    # zope.publisher.browser.BrowserRequest that do the work.
+
+    __slots__ = (
+        'form',
+        'defaults',
+        'tuple_items',
+    )
+
+    def __init__(self):
+        self.form = {}
+        self.defaults = {}
+        self.tuple_items = {}
+
+    def add(self, spec, item):
+        flags = spec.flags
+        if flags & IGNORE_EMPTY and not item:
+            return
+        for tuple_key in spec.tuple_keys:
+            self.tuple_items[tuple_key] = 1
+        if flags & ~IGNORE_EMPTY:
+            self._set_with_type(spec, item)
+        else:
+            self._set_without_type(spec.key, item)
+
+    def _set_without_type(self, key, item):
+        form = self.form
+        if key not in form:
+            form[key] = item
+        else:
+            found = form[key]
+            if isinstance(found, list):
+                found.append(item)
+            else:
+                form[key] = [found, item]
+
+    def _set_with_type(self, spec, item): # pylint:disable=too-many-branches
+        flags = spec.flags
+        key = spec.key
+        attr = spec.attr
+
+        if flags & CONVERTED:
+            try:
+                item = spec.converter(item)
+            except: # pylint:disable=bare-except
+                if item or flags & DEFAULT or key not in self.defaults:
+                    raise
+                item = self.defaults[key]
+                if flags & RECORD:
+                    item = getattr(item, attr)
+                elif flags & RECORDS:
+                    item = getattr(item[-1], attr)
+
+        form = self.defaults if flags & DEFAULT else self.form
+
+        if key not in form:
+            if flags & SEQUENCE:
+                item = [item]
+            if flags & RECORD:
+                r = form[key] = Record()
+                setattr(r, attr, item)
+            elif flags & RECORDS:
+                r = Record()
+                setattr(r, attr, item)
+                form[key] = [r]
+            else:
+                form[key] = item
+        else:
+            r = form[key]
+            if flags & RECORD:
+                if not flags & SEQUENCE:
+                    setattr(r, attr, item)
+                elif not hasattr(r, attr):
+                    setattr(r, attr, [item])
+                else:
+                    getattr(r, attr).append(item)
+            elif flags & RECORDS:
+                last = r[-1]
+                if not hasattr(last, attr):
+                    if flags & SEQUENCE:
+                        item = [item]
+                    setattr(last, attr, item)
+                elif flags & SEQUENCE:
+                    getattr(last, attr).append(item)
+                else:
+                    new = Record()
+                    setattr(new, attr, item)
+                    r.append(new)
+            elif isinstance(r, list):
+                r.append(item)
+            else:
+                form[key] = [r, item]
+
+    def _insert_defaults(self):
+        form = self.form
+        for keys, values in self.defaults.items():
+            if keys not in form:
+                form[keys] = values
+            else:
+                item = form[keys]
+                if isinstance(values, Record):
+                    for k, v in values.items():
+                        if not hasattr(item, k):
+                            setattr(item, k, v)
+                elif isinstance(values, list):
+                    for val in values:
+                        if isinstance(val, Record):
+                            for k, v in val.items():
+                                for r in item:
+                                    if not hasattr(r, k):
+                                        setattr(r, k, v)
+                        elif val not in item:
+                            item.append(val)
+
+    def _convert_to_tuples(self):
+        form = self.form
+        for key in self.tuple_items:
+            if key in form:
+                form[key] = tuple(form[key])
+            else:
+                k, attr = _split_key(key)
+                # remove any type_names in the attr
+                i = attr.find(":")
+                if i >= 0:
+                    attr = attr[:i]
+
+                if k in form:
+                    item = form[k]
+                    if isinstance(item, Record):
+                        if hasattr(item, attr):
+                            setattr(item, attr, tuple(getattr(item, attr)))
+                    else:
+                        for v in item:
+                            if hasattr(v, attr):
+                                setattr(v, attr, tuple(getattr(v, attr)))
+
+    def finish(self):
+        if self.defaults:
+            self._insert_defaults()
+        if self.tuple_items:
+            self._convert_to_tuples()
+        return self.form
+
+
+def process_form(items):
+    """
+    process_form(items: iterable) -> dict
+
+    Marshal the ``(name, value)`` pairs in *items* into a form
+    dictionary the way :mod:`zope.publisher.browser` does.
+
+    Fields that appear more than once without a sequence suffix are
+    collected into a list, just like ``BrowserRequest``.
+
+    :raise ValueError: If a type converter rejects a value, e.g.,
+       a non-numeric ``:int`` field.
+    """
+    get_spec = _spec_cache.getter()
+    builder = _FormBuilder()
+    add = builder.add
+    for name, item in items:
+        add(get_spec(name), item)
+    return builder.finish()
+
+
+try:
+    from zope.testing import cleanup
+except ImportError: # pragma: no cover
+    pass
+else:
+    cleanup.addCleanUp(_spec_cache.clear)
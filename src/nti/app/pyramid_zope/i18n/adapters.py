@@ -27,7 +27,6 @@ from zope.i18n.interfaces import ITranslationDomain
 from zope.i18n.interfaces import IUserPreferredCharsets
 from zope.i18n.interfaces import IUserPreferredLanguages
 from zope.i18n.locales import LoadLocaleError
-from zope.i18n.locales import locales
 
 from zope.publisher.http import HTTPCharsets
 from zope.publisher.interfaces.browser import IBrowserRequest
@@ -35,6 +34,8 @@ from zope.publisher.interfaces.browser import IBrowserRequest
 from zope.security.interfaces import IPrincipal
 
 from .interfaces import IPreferredLanguagesRequest
+from .locales import get_locale
+from ..caching import request_memoize
 from ..request import PyramidZopeRequestProxy
 
 __all__ = [
@@ -78,39 +79,51 @@ class PreferredLanguagesPolicy(object):
     first, followed by something set during traversal, followed by a
     non-default persistent user preference, followed by the value set
     from the HTTP headers.
+
+    The answer is computed once per request (see
+    :func:`nti.app.pyramid_zope.caching.request_memoize`).
     """
 
     def __init__(self, request):
         self.request = request
 
     def getPreferredLanguages(self):
-        # If the default locale negotiater can get a value,
-        # that means we had a parameter or one of the cookies
-        # (because of the subscriber that gets us here).
-
-        negotiated = default_locale_negotiator(self.request)
-        if negotiated:
-            return [negotiated]
-
-        # Here is where we would check for something during traversal,
-        # but we don't actually support that at this time because it
-        # relies on implementation details
-
-        # Is there a non-default user preference? Right now we know
-        # what a default is due to implementation details above. We also
-        # know for sure that we *have* a remote use, otherwise we wouldn't
-        # be here
-        remote_user = IPrincipal(self.request, None)
-        remote_user_langs = IUserPreferredLanguages(remote_user)
-        if remote_user_langs is not EnglishUserPreferredLanguagesImpl:
-            return remote_user_langs.getPreferredLanguages() # pylint:disable=too-many-function-args
-
-        # Ok, see what the HTTP request can come up with. Note that we're
-        # going to the Zope interface so that we don't get into an infinite
-        # loop
-        browser_request = IBrowserRequest(self.request)
-        browser_langs = IModifiableUserPreferredLanguages(browser_request)
-        return browser_langs.getPreferredLanguages() # pylint:disable=too-many-function-args
+        return list(_preferred_languages(self.request))
+
+
+@request_memoize
+def _preferred_languages(request):
+    # The policy is consulted many times while rendering a request
+    # (each translation and locale lookup), and finding the user's
+    # preference may be expensive, so only do it once per request.
+
+    # If the default locale negotiater can get a value,
+    # that means we had a parameter or one of the cookies
+    # (because of the subscriber that gets us here).
+
+    negotiated = default_locale_negotiator(request)
+    if negotiated:
+        return (negotiated,)
+
+    # Here is where we would check for something during traversal,
+    # but we don't actually support that at this time because it
+    # relies on implementation details
+
+    # Is there a non-default user preference? Right now we know
+    # what a default is due to implementation details above. We also
+    # know for sure that we *have* a remote use, otherwise we wouldn't
+    # be here
+    remote_user = IPrincipal(request, None)
+    remote_user_langs = IUserPreferredLanguages(remote_user)
+    if remote_user_langs is not EnglishUserPreferredLanguagesImpl:
+        return tuple(remote_user_langs.getPreferredLanguages()) # pylint:disable=too-many-function-args
+
+    # Ok, see what the HTTP request can come up with. Note that we're
+    # going to the Zope interface so that we don't get into an infinite
+    # loop
+    browser_request = IBrowserRequest(request)
+    browser_langs = IModifiableUserPreferredLanguages(browser_request)
+    return tuple(browser_langs.getPreferredLanguages()) # pylint:disable=too-many-function-args
 
 
 @interface.implementer(IUserPreferredLanguages)
@@ -157,7 +170,7 @@ def preferred_language_locale_negotiator(request):
     for lang in pref_langs:
         parts = (lang.split('-') + [None, None])[:3]
         try:
-            locales.getLocale(*parts)
+            get_locale(*parts)
             result = lang
             break
         except LoadLocaleError: # pragma: no cover
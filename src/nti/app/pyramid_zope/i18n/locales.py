@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide caching of :class:`zope.i18n.locales.Locale` objects.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from zope.i18n.locales import locales
+
+from ..caching import LRUCache
+
+__docformat__ = "restructuredtext en"
+
+__all__ = [
+    'get_locale',
+    'get_locale_for_name',
+    'locale_cache',
+]
+
+#: The locales that have been looked up, keyed by
+#: ``(language, territory, variant)``. Its counters can be
+#: used to check how effective it is.
+locale_cache = LRUCache(maxsize=100)
+
+
+def get_locale(language=None, territory=None, variant=None):
+    """
+    Like :meth:`zope.i18n.locales.LocaleProvider.getLocale`, but cached.
+
+    :raise zope.i18n.locales.LoadLocaleError: If there is no
+        such locale. This is not cached.
+    """
+    key = (language, territory, variant)
+    locale = locale_cache.get(key)
+    if locale is None:
+        locale = locale_cache[key] = locales.getLocale(language, territory, variant)
+    return locale
+
+
+def get_locale_for_name(locale_name):
+    """
+    Return the locale for a name like ``en`` or ``en-US``.
+    """
+    parts = locale_name.split('-')
+    return get_locale(*parts[:3])
+
+
+try:
+    from zope.testing import cleanup
+except ImportError: # pragma: no cover
+    pass
+else:
+    cleanup.addCleanUp(locale_cache.clear)
@@ -64,6 +64,16 @@ class TestApplicationRequestPolicy(unittest.TestCase):
         assert_that(self._langs(), is_(['ru']))
         assert_that(self._locale(), is_('ru'))
 
+    def test_policy_computed_once_per_request(self):
+        self.request.cookies['I18N_LANGUAGE'] = 'ru'
+        adjust(self.request)
+        langs = self._langs()
+        assert_that(langs, is_(['ru']))
+        # Callers get their own list
+        langs.append('en')
+        self.request.cookies['I18N_LANGUAGE'] = 'de'
+        assert_that(self._langs(), is_(['ru']))
+
     def test_adjust_pyramid_property(self):
         self.request._LOCALE_ = 'ru'
         adjust(self.request)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import calling
+from hamcrest import has_entries
+from hamcrest import is_
+from hamcrest import raises
+from hamcrest import same_instance
+
+from pyramid.request import Request
+
+from zope.i18n.locales import LoadLocaleError
+
+from ..locales import get_locale
+from ..locales import get_locale_for_name
+from ..locales import locale_cache
+from ...request import PyramidZopeRequestProxy
+
+
+class TestLocales(unittest.TestCase):
+
+    def setUp(self):
+        locale_cache.clear()
+
+    tearDown = setUp
+
+    def test_get_locale_cached(self):
+        locale = get_locale('en', 'US')
+        assert_that(locale.id.language, is_('en'))
+        assert_that(locale.id.territory, is_('US'))
+        assert_that(get_locale_for_name('en-US'), is_(same_instance(locale)))
+        assert_that(locale_cache.stats(), has_entries(hits=1, misses=1))
+
+    def test_get_locale_missing(self):
+        assert_that(calling(get_locale).with_args('xx', 'YY'),
+                    raises(LoadLocaleError))
+        assert_that(len(locale_cache), is_(0))
+
+    def test_request_locale_memoized(self):
+        request = Request.blank('/')
+        request._LOCALE_ = 'ru'
+        zrequest = PyramidZopeRequestProxy(request)
+        locale = zrequest.locale
+        assert_that(locale.id.language, is_('ru'))
+        assert_that(zrequest.locale, is_(same_instance(locale)))
+        assert_that(locale_cache.stats(), has_entries(hits=0, misses=1))
+
+        request = Request.blank('/')
+        request._LOCALE_ = 'ru'
+        assert_that(PyramidZopeRequestProxy(request).locale, is_(same_instance(locale)))
+        assert_that(locale_cache.stats(), has_entries(hits=1, misses=1))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Interfaces for this package.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from zope import interface
+
+__docformat__ = "restructuredtext en"
+
+
+class IPrincipalCache(interface.Interface):
+    """
+    A process-wide cache of principals, keyed by principal id.
+
+    If one of these is registered as a utility, the interaction tween
+    (:mod:`nti.app.pyramid_zope.tweens`) looks principals up here
+    before asking its principal factory, and stores what the factory
+    returns.
+    """
+
+    def get(principal_id, default=None):
+        """
+        Return the cached principal, or *default*.
+        """
+
+    def set(principal_id, principal):
+        """
+        Cache *principal*.
+        """
+
+    def invalidate(principal_id):
+        """
+        Forget the principal with the id, for example because its
+        groups or permissions changed.
+        """
+
+    def invalidate_all():
+        """
+        Forget all principals, for example because the members of a
+        group changed.
+        """
+
+
+class ITraversalPrefixCache(interface.Interface):
+    """
+    A process-wide cache of the objects found by traversing path
+    prefixes from a root.
+
+    If one of these is registered as a utility,
+    :class:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser`
+    resumes traversal from the longest prefix of the path it has, and
+    stores the prefixes it traverses.
+    """
+
+    def lookup(root, path, request):
+        """
+        Return the objects found by traversing the longest prefix of
+        the sequence of segments *path* from *root* for *request*:
+        a sequence starting with *root*, followed by the object for
+        each segment of the prefix. If there is no such prefix, return
+        None.
+        """
+
+    def store(root, path, objects, request):
+        """
+        Remember that traversing the segments of *path* from *root*
+        for *request* found *objects* (a sequence starting with the
+        root, followed by the object for each segment).
+
+        This is called at most once for each traversal, with the
+        longest prefix that can be cached, so each of the shorter
+        prefixes of *path* should be found by :meth:`lookup` too.
+        """
+
+    def invalidate():
+        """
+        Forget everything, for example because objects were added,
+        moved or removed.
+        """
+
+
+class ITraversalNotFoundCache(interface.Interface):
+    """
+    A process-wide cache of the path segments that could not be
+    traversed from an object.
+
+    If one of these is registered as a utility,
+    :class:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser`
+    doesn't try again to traverse a segment from an object it has
+    recorded here, but returns the same result it returned the first
+    time.
+    """
+
+    def is_missing(parent, name, request):
+        """
+        Has traversing *name* from *parent* for *request* failed?
+        """
+
+    def add_missing(parent, name, request):
+        """
+        Record that traversing *name* from *parent* for *request* failed.
+        """
+
+    def invalidate():
+        """
+        Forget everything, for example because objects were added.
+        """
+
+
+class ITraversalPrefetcher(interface.Interface):
+    """
+    Asks the database to load, in one batch, the persistent objects a
+    path is expected to lead to, before it is traversed.
+
+    If one of these is registered as a utility,
+    :class:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser`
+    calls :meth:`prefetch` before it traverses a path, and
+    :meth:`record` for each object it traverses.
+    """
+
+    def prefetch(root, path, request):
+        """
+        Start loading the objects expected along *path* (a sequence
+        of segments) from *root*.
+        """
+
+    def record(root, path, ob, request):
+        """
+        Note that traversing *path* from *root* led to *ob*.
+        """
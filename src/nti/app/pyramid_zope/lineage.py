@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-request caching of the :term:`lineage` of resources, and the
+things computed from it.
+
+Views and templates often ask for the URL, or the nearest site, of
+the same resources many times while rendering. The functions here
+walk the ``__parent__`` pointers of each resource only once per
+request; what they find is kept (in the
+:func:`~nti.app.pyramid_zope.caching.request_annotations`) until the
+request is finished, or until an object is added, moved or removed
+during the request (see :func:`invalidate_lineage_cache`).
+
+To use the cached paths for all resource URLs, register
+:class:`CachedResourceURL` with Pyramid::
+
+    config.add_resource_url_adapter(CachedResourceURL)
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+from pyramid.interfaces import IResourceURL
+from pyramid.interfaces import VH_ROOT_KEY
+
+from pyramid.threadlocal import get_current_request
+
+from pyramid.traversal import ResourceURL
+from pyramid.traversal import quote_path_segment
+
+from zope import component
+from zope import interface
+
+from zope.interface.interfaces import IInterface
+
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+
+from .caching import request_annotations
+
+__all__ = [
+    'CachedResourceURL',
+    'cached_find_interface',
+    'cached_lineage',
+    'cached_resource_path_tuple',
+    'clear_lineage_cache',
+    'invalidate_lineage_cache',
+]
+
+_LINEAGE_CACHE_KEY = __name__ + '.lineage_cache'
+
+_marker = object()
+
+
+def _lineage_cache(request):
+    annotations = request_annotations(request)
+    try:
+        return annotations[_LINEAGE_CACHE_KEY]
+    except KeyError:
+        return annotations.setdefault(_LINEAGE_CACHE_KEY, {})
+
+
+def _get(cache, key, resource):
+    # Entries keep the resource, so its id can't be reused while the
+    # entry exists.
+    entry = cache.get(key)
+    if entry is not None and entry[0] is resource:
+        return entry[1]
+    return _marker
+
+
+def cached_lineage(resource, request):
+    """
+    Like :func:`pyramid.traversal.lineage`, but returns a tuple, which
+    is computed once per *request*.
+
+    The lineages of the parents of *resource* are remembered too, so
+    asking for a sibling only walks up to the parent.
+    """
+    cache = _lineage_cache(request)
+    result = _get(cache, id(resource), resource)
+    if result is not _marker:
+        return result
+
+    # Walk up until we find something whose lineage we know.
+    unknown = []
+    result = ()
+    ob = resource
+    while ob is not None:
+        known = _get(cache, id(ob), ob)
+        if known is not _marker:
+            result = known
+            break
+        unknown.append(ob)
+        try:
+            ob = ob.__parent__
+        except AttributeError:
+            ob = None
+
+    for ob in reversed(unknown):
+        result = (ob,) + result
+        cache[id(ob)] = (ob, result)
+    return result
+
+
+def cached_find_interface(resource, class_or_interface, request):
+    """
+    Like :func:`pyramid.traversal.find_interface`, but using
+    :func:`cached_lineage`, and computed once per *request*.
+    """
+    cache = _lineage_cache(request)
+    key = (id(resource), class_or_interface)
+    result = _get(cache, key, resource)
+    if result is _marker:
+        if IInterface.providedBy(class_or_interface):
+            test = class_or_interface.providedBy
+        else:
+            test = lambda ob: isinstance(ob, class_or_interface)
+        result = None
+        for location in cached_lineage(resource, request):
+            if test(location):
+                result = location
+                break
+        cache[key] = (resource, result)
+    return result
+
+
+def cached_resource_path_tuple(resource, request):
+    """
+    Like :func:`pyramid.traversal.resource_path_tuple` (without any
+    extra elements), but using :func:`cached_lineage`, and computed
+    once per *request*.
+    """
+    cache = _lineage_cache(request)
+    key = ('path', id(resource))
+    result = _get(cache, key, resource)
+    if result is _marker:
+        result = tuple(
+            ob.__name__ or ''
+            for ob in reversed(cached_lineage(resource, request))
+        )
+        cache[key] = (resource, result)
+    return result
+
+
+@interface.implementer(IResourceURL)
+class CachedResourceURL(ResourceURL):
+    """
+    A :class:`pyramid.traversal.ResourceURL` that uses
+    :func:`cached_resource_path_tuple`. Creating it again for the
+    same resource during the same request returns the first one.
+    """
+
+    def __new__(cls, resource, request):
+        cache = _lineage_cache(request)
+        key = ('url', id(resource))
+        result = _get(cache, key, resource)
+        if result is _marker:
+            result = super(CachedResourceURL, cls).__new__(cls)
+            result._init(resource, request) # pylint:disable=protected-access
+            cache[key] = (resource, result)
+        return result
+
+    def __init__(self, resource, request): # pylint:disable=super-init-not-called
+        # Everything is done once, by __new__.
+        pass
+
+    def _init(self, resource, request):
+        # This is ResourceURL.__init__, using the cached path.
+        physical_path_tuple = cached_resource_path_tuple(resource, request)
+        physical_path = '/'.join([quote_path_segment(x) for x in physical_path_tuple]) or '/'
+
+        if physical_path_tuple != ('',):
+            physical_path_tuple = physical_path_tuple + ('',)
+            physical_path = physical_path + '/'
+
+        virtual_path = physical_path
+        virtual_path_tuple = physical_path_tuple
+
+        vroot_path = request.environ.get(VH_ROOT_KEY)
+        # if the physical path starts with the virtual root path, trim it out
+        # of the virtual path
+        if vroot_path is not None:
+            vroot_path = vroot_path.rstrip('/')
+            if vroot_path and physical_path.startswith(vroot_path):
+                numels = len(vroot_path.split('/'))
+                virtual_path_tuple = ('',) + physical_path_tuple[numels:]
+                virtual_path = physical_path[len(vroot_path):]
+
+        self.virtual_path = virtual_path
+        self.physical_path = physical_path
+        self.virtual_path_tuple = virtual_path_tuple
+        self.physical_path_tuple = physical_path_tuple
+
+
+def clear_lineage_cache(request):
+    """
+    Forget everything cached for *request* by this module.
+    """
+    request_annotations(request).pop(_LINEAGE_CACHE_KEY, None)
+
+
+@component.adapter(interface.Interface, IObjectMovedEvent)
+def invalidate_lineage_cache(unused_object, unused_event):
+    """
+    Forget what is cached for the current Pyramid request, if any,
+    when an object is added, moved or removed.
+
+    This is registered as a subscriber.
+    """
+    request = get_current_request()
+    if request is not None:
+        clear_lineage_cache(request)
@@ -10,19 +10,16 @@ Partially based on ideas from :mod:`pyramid_zope_request`
 from __future__ import print_function, absolute_import, division
 __docformat__ = "restructuredtext en"
 
+import io
+
 from six.moves.urllib_parse import urlparse
 from six.moves.urllib_parse import urlunparse
-from six.moves.urllib_parse import urljoin
 
 from zope import component
 from zope import interface
 
 from zope.authentication.interfaces import IUnauthenticatedPrincipal
 
-from zope.cachedescriptors.property import Lazy
-
-from zope.i18n.locales import locales
-
 from zope.proxy import non_overridable
 from zope.proxy import getProxiedObject
 
@@ -34,15 +31,222 @@ from zope.publisher.http import URLGetter
 
 import zope.publisher.interfaces.browser
 
-from zope.security.interfaces import NoInteraction
-from zope.security.management import getInteraction
-
-from six import text_type
+from six.moves.collections_abc import Mapping
 from pyramid.interfaces import IRequest
 from pyramid.i18n import get_locale_name
+from pyramid.settings import asbool
+
+from webob.multidict import NoVars
 
 from nti.property.property import alias
 
+from .caching import request_annotations
+from .form import process_form
+from .i18n.locales import get_locale
+from .i18n.locales import get_locale_for_name
+from .response import PyramidZopeResponse
+from .security import _request_security_cache
+
+_marker = object()
+
+
+def _mapping_signature(mapping):
+    # WebOb MultiDicts keep their pairs in a list that is only ever
+    # appended to, shrunk, or cleared; every mutation changes either
+    # its length or its last pair. NoVars is immutable and always
+    # empty, but WebOb creates a new one each time the POST of a GET
+    # request is read, so they all share one signature. Anything else
+    # (e.g., the plain dicts of a DummyRequest) can't be tracked, so
+    # it gets no signature and is re-indexed each time.
+    items = getattr(mapping, '_items', None)
+    if isinstance(items, list):
+        return (items, len(items), items[-1] if items else None)
+    if mapping is None:
+        return (None, 0, None)
+    if isinstance(mapping, NoVars):
+        return (NoVars, 0, None)
+    return None
+
+
+def _dict_of_lists(mapping):
+    # DummyRequest GET/POST are different
+    return mapping.dict_of_lists() if hasattr(mapping, 'dict_of_lists') else mapping.copy()
+
+
+class _ParameterIndex(object):
+    """
+    The merged GET and POST parameters of a request, as used by
+    :meth:`PyramidZopeRequestProxy.get`.
+
+    POST values replace GET values with the same key, and keys that
+    appear only once are de-listed. Keys with no true value are left
+    out so that lookups fall back to the environment; all keys are
+    kept in :attr:`names`.
+    """
+
+    __slots__ = (
+        'values',
+        'names',
+        '_get_sig',
+        '_post_sig',
+    )
+
+    def __init__(self, GET, POST):
+        self._get_sig = _mapping_signature(GET)
+        self._post_sig = _mapping_signature(POST)
+        merged = _dict_of_lists(GET)
+        merged.update(_dict_of_lists(POST))
+        values = {}
+        for key, val in merged.items():
+            if not val:
+                continue
+            try:
+                if len(val) == 1:
+                    val = val[0]  # de-list things that only appeared once
+            except TypeError:
+                pass
+            values[key] = val
+        self.values = values
+        self.names = frozenset(merged)
+
+    @staticmethod
+    def _sig_matches(sig, mapping):
+        if sig is None:
+            return False
+        current = _mapping_signature(mapping)
+        return (
+            current is not None
+            and current[0] is sig[0]
+            and current[1] == sig[1]
+            and current[2] is sig[2]
+        )
+
+    def matches(self, GET, POST):
+        """
+        Is this index still current for the given *GET* and *POST*?
+        """
+        return self._sig_matches(self._get_sig, GET) and self._sig_matches(self._post_sig, POST)
+
+
+class _ChainedParameters(Mapping):
+    """
+    A read-only view of the environ, GET and POST of a request, with
+    the same precedence as merging them in that order (so POST wins),
+    but answering membership, lookup and length without copying any
+    of them.
+    """
+
+    __slots__ = (
+        '_request',
+    )
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getitem__(self, key):
+        request = self._request
+        if key in request._parameter_index.names:
+            for params in (request.POST, request.GET):
+                if key in params:
+                    return params[key]
+        return request.environ[key]
+
+    def __contains__(self, key):
+        request = self._request
+        return key in request._parameter_index.names or key in request.environ
+
+    def __iter__(self):
+        environ = self._request.environ
+        for key in environ:
+            yield key
+        seen = set()
+        for params in (self._request.GET, self._request.POST):
+            for key in params:
+                if key not in environ and key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        environ = self._request.environ
+        extra = [k for k in self._request._parameter_index.names if k not in environ]
+        return len(environ) + len(extra)
+
+
+_PROXY_KEY = '_nti_zope_request_proxy'
+
+
+def _discard_proxy(request):
+    request.__dict__.pop(_PROXY_KEY, None)
+
+
+#: The parts of the environ that ``path_url`` depends on.
+_URL_ENVIRON_KEYS = (
+    'wsgi.url_scheme',
+    'HTTP_HOST',
+    'SERVER_NAME',
+    'SERVER_PORT',
+    'SCRIPT_NAME',
+    'PATH_INFO',
+)
+
+
+class _URLSegments(object):
+    """
+    The ``path_url`` of a request, parsed once into its segments,
+    with the URLs (or paths) for each level joined on demand
+    and kept.
+    """
+
+    __slots__ = (
+        'key',
+        '_parsed',
+        '_parts',
+        '_urls',
+    )
+
+    def __init__(self, key, path_url):
+        self.key = key
+        self._parsed = list(urlparse(path_url))
+        self._parts = tuple(x for x in self._parsed[2].split('/') if x)
+        self._urls = {}
+
+    def url(self, level, path_only):
+        """
+        The URL (or just its path) keeping only the first *level*
+        segments (if positive), or dropping the last *level* segments
+        (if negative).
+
+        :raise IndexError: If there aren't that many segments.
+        """
+        try:
+            return self._urls[level, path_only]
+        except KeyError:
+            pass
+
+        parsed = list(self._parsed)
+        if level:
+            parts = self._parts
+            if abs(level) > len(parts):
+                raise IndexError(abs(level))
+            parts = parts[:level]
+            parsed[2] = '/' + '/'.join(parts) if parts else ''
+
+        result = self._urls[level, path_only] = parsed[2] if path_only else urlunparse(parsed)
+        return result
+
+
+#: The setting (or environ key, for a single request) that
+#: enables streaming request bodies from
+#: :attr:`PyramidZopeRequestProxy.bodyStream`.
+STREAM_BODY_KEY = 'nti.app.pyramid_zope.stream_request_body'
+
+#: The setting giving the size, in bytes, above which a request body
+#: is streamed instead of being copied, when streaming is enabled.
+BODY_SPILL_THRESHOLD_KEY = 'nti.app.pyramid_zope.request_body_spill_threshold'
+
+_STREAM_BUFFER_SIZE = 64 * 1024
+
+
 # Implement the request
 # and the "skin". In zope, the skin is changeable (IBrowserRequest
 # implements ISkinnable), especially
@@ -51,6 +255,35 @@ from nti.property.property import alias
 # is a sub-type of IBrowserRequest)
 
 
+#: The methods of :class:`.PyramidZopeResponse` that are also set on
+#: the Pyramid response, for code that uses the Pyramid request's
+#: response as a Zope response.
+_RESPONSE_ALIASES = (
+    'getHeader',
+    'setHeader',
+    'addHeader',
+    'getStatus',
+    'setStatus',
+    'redirect',
+)
+
+
+def _zope_response(base):
+    # Return the PyramidZopeResponse for the current response of the
+    # pyramid request *base*, creating it (and setting its methods on
+    # the Pyramid response) if the response is new.
+    response = base.response
+    zresponse = base.__dict__.get('_nti_zope_response')
+    if zresponse is None or zresponse._response is not response: # pylint:disable=protected-access
+        zresponse = base.__dict__['_nti_zope_response'] = PyramidZopeResponse(
+            response,
+            base.environ
+        )
+        for name in _RESPONSE_ALIASES:
+            setattr(response, name, getattr(zresponse, name))
+    return zresponse
+
+
 @component.adapter(IRequest)
 @interface.implementer(zope.publisher.interfaces.browser.IBrowserRequest,
                        zope.publisher.interfaces.browser.IDefaultBrowserLayer)
@@ -66,74 +299,80 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
     certain methods to call through to pyramid, but not things
     like annotations.)
 
+    Proxying is idempotent: a pyramid request is only ever wrapped by
+    one proxy (per proxy class), which is created and set up the first
+    time it is needed and returned again after that, until the request
+    is finished. Proxying a proxy returns it unchanged.
+
     .. note:: Most of this behaviour is added from reverse-engineering what
             existing zope code, most notably :mod:`z3c.table.table` uses.
             Some additional support for :mod:`z3c.form` comes from
             looking at what :mod:`pyramid_zope_request` does.
     """
 
-    def __init__(self, base):
-        super(PyramidZopeRequestProxy, self).__init__(base)
+    def __new__(cls, base):
+        if isinstance(base, PyramidZopeRequestProxy):
+            return base
+        proxy = base.__dict__.get(_PROXY_KEY)
+        if proxy is None or type(proxy) is not cls: # pylint:disable=unidiomatic-typecheck
+            proxy = super(PyramidZopeRequestProxy, cls).__new__(cls, base)
+            base.__dict__[_PROXY_KEY] = proxy
+            add_finished_callback = getattr(base, 'add_finished_callback', None)
+            if add_finished_callback is not None:
+                # The proxy refers to the request, so break the cycle
+                # as soon as we're done.
+                add_finished_callback(_discard_proxy)
+            proxy._setUp(base) # pylint:disable=protected-access
+        return proxy
+
+    def __init__(self, base): # pylint:disable=super-init-not-called
+        # Everything happens once, in __new__; this is called again
+        # each time the proxy is reused.
+        pass
+
+    @staticmethod
+    def _setUp(base):
         if getattr(base, 'registry', None) is None:
             base.registry = component.getSiteManager()
+        _zope_response(base)
+
+    @property
+    def response(self):
+        """
+        The Pyramid response, with the Zope response API
+        (a :class:`.PyramidZopeResponse`).
+
+        Setting this sets the response of the Pyramid request.
+        """
+        return _zope_response(getProxiedObject(self))
+
+    @response.setter
+    def response(self, response):
+        getProxiedObject(self).response = response
 
-        base.response.getHeader = lambda k: base.response.headers[k]
-
-        def setHeader(name, value, literal=False):
-            __traceback_info__ = name, value, literal
-            # Go to bytes for python 2 if incoming was a string
-            name = str(name)
-            value = str(value) if isinstance(value, text_type) else value
-            if name.lower() == 'content-type':
-                # work around that webob stores the charset
-                # in the header ``Content-type``, zope kills the charset
-                # by setting e.g. ``text/html`` without charset
-                charset = base.response.charset
-                base.response.headers[name] = value
-                # restore the old charset
-                base.response.charset = charset
-            else:
-                base.response.headers[name] = value
-
-        def redirect(location, status=302, trusted=False):
-            """
-            TODO support for the trusted arg
-            """
-            base.response.status_code=status
-            location = urljoin(base.url, location)
-            base.response.setHeader('Location', location)
-        base.response.redirect = redirect
-            
-        base.response.setHeader = setHeader
-        base.response.addHeader = setHeader
-
-        base.response.getStatus = lambda: base.response.status_code
-        base.response.setStatus = lambda status_code: setattr(base.response,
-                                                              'status_code',
-                                                              status_code)
-
-    @Lazy
+    @property
     def form(self):
         """
-        Process inputs into the form object.
+        The inputs, processed into a form dictionary using
+        the same field name conventions (``:list``, ``:int``, ``:record``,
+        etc) as :mod:`zope.publisher.browser`.
+
+        This is done once, the first time it's needed.
 
         See also: https://github.com/zopefoundation/pyramid_zope_request/blob/master/src/pyramid_zope_request/__init__.py#L78
         """
-        # BrowserRequest processes inputs HEAVILY
-        # we'll process only :list because that's only what we use nowadays
-        # and the code in BrowserRequest isn't really reusable
-        params = self.params
-        rv = {}
-        for k in params.keys():
-            v = params.getall(k)
-            if k.endswith(':list'):
-                name = k[:-5]
-            else:
-                v = v[0]
-                name = k
-            rv[name] = v
-
-        return rv
+        base = getProxiedObject(self)
+        try:
+            return base.__dict__['_nti_zope_form']
+        except KeyError:
+            form = base.__dict__['_nti_zope_form'] = process_form(self.params.items())
+            return form
+
+    @form.setter
+    def form(self, form):
+        # As with BrowserRequest, code (such as z3c.form and its tests)
+        # may replace the form.
+        getProxiedObject(self).__dict__['_nti_zope_form'] = form
 
     @non_overridable
     def get(self, key, default=None):
@@ -143,48 +382,60 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
         Pyramid's IRequest has a deprecated method that exposes
         the WSGI environ, making the request dict-like for the environ.
         Hence the need to mark this method non_overridable.
+
+        The merged parameters are indexed once per request (see
+        :class:`_ParameterIndex`) and only re-indexed if ``GET`` or
+        ``POST`` change.
         """
         # Zope does this by actually processing the inputs
         # into a "form" object
-
-        def _d_o_l(o):
-            # DummyRequest GET/POST are different
-            return o.dict_of_lists() if hasattr(o, 'dict_of_lists') else o.copy()
-        dict_of_lists = _d_o_l(self.GET)
-        dict_of_lists.update(_d_o_l(self.POST))
-        val = dict_of_lists.get(key)
-        if val:
-            if len(val) == 1:
-                val = val[0]  # de-list things that only appeared once
-        else:
+        val = self._parameter_index.values.get(key, _marker)
+        if val is _marker:
             # Ok, in the environment?
             val = self.environ.get(key, default)
+        elif isinstance(val, list):
+            # Callers have always gotten their own copy.
+            val = list(val)
         return val
 
+    @property
+    def _parameter_index(self):
+        base = getProxiedObject(self)
+        index = base.__dict__.get('_nti_parameter_index')
+        GET = self.GET
+        POST = self.POST
+        if index is None or not index.matches(GET, POST):
+            index = base.__dict__['_nti_parameter_index'] = _ParameterIndex(GET, POST)
+        return index
+
+    @property
+    def _parameters(self):
+        return _ChainedParameters(self)
+
+    # The mapping protocol is answered by a view over the environ, GET
+    # and POST (in increasing order of precedence) without merging
+    # them.
+
     def items(self):
-        result = {}
-        result.update(self.environ)
-        result.update(self.GET)
-        result.update(self.POST)
-        return result.items()
+        return self._parameters.items()
 
     def keys(self):
-        return [k for k, _ in self.items()]
+        return self._parameters.keys()
 
     def has_key(self, k):
         return k in self
 
     def values(self):
-        return [v for _, v in self.items()]
+        return self._parameters.values()
 
     def __iter__(self):
-        return iter(self.keys())
+        return iter(self._parameters)
 
     def __len__(self):
-        return len(self.items())
+        return len(self._parameters)
 
     def __contains__(self, key):
-        return key in self.keys()
+        return key in self._parameters
 
     def __getitem__(self, key):
         result = self.get(key, self)
@@ -196,15 +447,15 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
         return self.headers.get(name, default)
 
     def _traverse_request_path(self, level, path_only):
-        parsed = list(urlparse(self.path_url))
-        if level:
-            parts = [x for x in parsed[2].split('/') if x]
-            if abs(level) > len(parts):
-                raise IndexError(abs(level))
-            parts = parts[:level]
-            parsed[2] = '/'+'/'.join(parts) if parts else ''
-
-        return parsed[2] if path_only else urlunparse(parsed)
+        base = getProxiedObject(self)
+        environ = self.environ
+        key = tuple(environ.get(k) for k in _URL_ENVIRON_KEYS)
+        # DummyRequest has a plain attribute.
+        key += (base.__dict__.get('path_url'),)
+        segments = base.__dict__.get('_nti_url_segments')
+        if segments is None or segments.key != key:
+            segments = base.__dict__['_nti_url_segments'] = _URLSegments(key, self.path_url)
+        return segments.url(level, path_only)
 
     def getURL(self, level=0, path_only=False):
         """
@@ -234,16 +485,29 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
 
     @property
     def locale(self):
+        """
+        The locale negotiated for this request.
+
+        This is found once per request, and the :class:`zope.i18n.locales.Locale`
+        objects are shared by all requests (see
+        :mod:`nti.app.pyramid_zope.i18n.locales`).
+        """
+        base = getProxiedObject(self)
+        try:
+            return base.__dict__['_nti_zope_locale']
+        except KeyError:
+            pass
         try:
             # Country is optional
-            lang_country = get_locale_name(self).split('-')
+            locale = get_locale_for_name(get_locale_name(self))
         except AttributeError:  # Testing, registry has no settings
-            lang_country = ('en', 'US')
-        return locales.getLocale(*lang_country)
+            locale = get_locale('en', 'US')
+        base.__dict__['_nti_zope_locale'] = locale
+        return locale
 
     @property
     def annotations(self):
-        return getProxiedObject(self).__dict__.setdefault('annotations', {})
+        return request_annotations(self)
 
     def _get__annotations__(self):
         return getProxiedObject(self).__dict__.get('__annotations__')
@@ -265,7 +529,52 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
 
     @property
     def bodyStream(self):
-        return self.body_file_seekable
+        """
+        The body of the request.
+
+        By default, this is WebOb's ``body_file_seekable``, which copies
+        the body into memory, or a temporary file, before anything reads it.
+
+        If streaming is enabled, either for all requests with the
+        :data:`STREAM_BODY_KEY` setting, or for one request by setting
+        the same key in its environ, bodies larger than the
+        :data:`BODY_SPILL_THRESHOLD_KEY` setting (by default, WebOb's
+        ``request_body_tempfile_limit``) are instead returned as a
+        forward-only, buffered, stream over the WSGI input, which can be
+        consumed incrementally but not rewound. Smaller bodies are still
+        copied into memory and can be seeked.
+        """
+        base = getProxiedObject(self)
+        try:
+            return base.__dict__['_nti_body_stream']
+        except KeyError:
+            pass
+
+        if self.is_body_seekable or not self._stream_body():
+            # Nothing to copy, or the caller doesn't want to stream.
+            return self.body_file_seekable
+
+        threshold = self._setting(BODY_SPILL_THRESHOLD_KEY, None)
+        threshold = self.request_body_tempfile_limit if threshold is None else int(threshold)
+        length = self.content_length
+        if length is not None and length <= threshold:
+            return self.body_file_seekable
+
+        stream = self.body_file
+        if isinstance(stream, io.RawIOBase):
+            stream = io.BufferedReader(stream, _STREAM_BUFFER_SIZE)
+        base.__dict__['_nti_body_stream'] = stream
+        return stream
+
+    def _setting(self, name, default):
+        settings = getattr(self.registry, 'settings', None) or {}
+        return settings.get(name, default)
+
+    def _stream_body(self):
+        stream = self.environ.get(STREAM_BODY_KEY)
+        if stream is None:
+            stream = self._setting(STREAM_BODY_KEY, False)
+        return asbool(stream)
 
     def _unimplemented(self, *args, **kwargs):
         raise NotImplementedError()
@@ -302,14 +611,18 @@ class PyramidZopeRequestProxy(SpecificationDecoratorBase):
 
     @property
     def principal(self):
+        cache = _request_security_cache(self)
+        try:
+            return cache.values['proxy_principal']
+        except KeyError:
+            pass
         try:
-            return getInteraction().participations[0].principal
-        except (NoInteraction, IndexError, AttributeError):
-            return component.queryUtility(IUnauthenticatedPrincipal)
+            principal = cache.interaction.participations[0].principal
+        except (IndexError, AttributeError):
+            principal = component.queryUtility(IUnauthenticatedPrincipal)
+        cache.values['proxy_principal'] = principal
+        return principal
 
     @property
     def interaction(self):
-        try:
-            return getInteraction()
-        except NoInteraction:
-            return None
+        return _request_security_cache(self).interaction
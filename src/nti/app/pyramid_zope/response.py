@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Support for making a Pyramid (WebOb) response work like a Zope
+response.
+
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+from six import binary_type
+from six import text_type
+from six.moves.urllib_parse import urljoin
+from six.moves.urllib_parse import urlsplit
+
+from zope import interface
+
+from zope.publisher.interfaces.http import IHTTPApplicationResponse
+from zope.publisher.interfaces.http import IHTTPResponse
+from zope.publisher.interfaces.http import IResult
+
+from webob.cookies import parse_cookie
+from webob.request import BaseRequest
+
+__all__ = [
+    'PyramidZopeResponse',
+]
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def _extract_host(url):
+    # Like zope.publisher.http.extract_host
+    scheme, host = urlsplit(url)[:2]
+    if host and ':' not in host:
+        port = _DEFAULT_PORTS.get(scheme)
+        if port:
+            host = '%s:%s' % (host, port)
+    return host
+
+
+def _encoded(iterable, charset):
+    for chunk in iterable:
+        if isinstance(chunk, text_type):
+            chunk = chunk.encode(charset)
+        yield chunk
+
+
+@interface.implementer(IHTTPResponse, IHTTPApplicationResponse)
+class PyramidZopeResponse(object):
+    """
+    Implements the Zope response API (:class:`.IHTTPResponse`) on top of
+    a WebOb response, which it otherwise acts like: all other
+    attributes are read from, and written to, the WebOb response.
+
+    One of these is created per response, by
+    :attr:`.PyramidZopeRequestProxy.response`. It keeps only the WSGI
+    environment of the request (for the URLs :meth:`redirect` needs),
+    not the request itself.
+    """
+
+    __slots__ = (
+        '_response',
+        '_environ',
+    )
+
+    def __init__(self, response, environ):
+        object.__setattr__(self, '_response', response)
+        object.__setattr__(self, '_environ', environ)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._response, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._response, name)
+
+    def __repr__(self):
+        return '<%s for %r>' % (type(self).__name__, self._response)
+
+    # Status
+
+    def getStatus(self):
+        return self._response.status_code
+
+    def setStatus(self, status, reason=None):
+        status = int(status)
+        if reason:
+            self._response.status = '%d %s' % (status, reason)
+        else:
+            self._response.status_code = status
+
+    def getStatusString(self):
+        return self._response.status
+
+    # Headers
+
+    def getHeader(self, name, default=None, literal=False): # pylint:disable=unused-argument
+        # WebOb headers are always case-insensitive.
+        return self._response.headers.get(name, default)
+
+    def getHeaders(self):
+        return list(self._response.headerlist)
+
+    def setHeader(self, name, value, literal=False):
+        __traceback_info__ = name, value, literal
+        response = self._response
+        # Go to bytes for python 2 if incoming was a string
+        name = str(name)
+        value = str(value) if isinstance(value, text_type) else value
+        if name.lower() == 'content-type':
+            # work around that webob stores the charset
+            # in the header ``Content-type``, zope kills the charset
+            # by setting e.g. ``text/html`` without charset
+            charset = response.charset
+            response.headers[name] = value
+            # restore the old charset
+            response.charset = charset
+        else:
+            response.headers[name] = value
+
+    def addHeader(self, name, value):
+        self._response.headers.add(str(name), str(value))
+
+    def appendHeader(self, name, value, delimiter=','):
+        """
+        Append *value* to the header *name*, separated from any
+        existing value by *delimiter*.
+        """
+        headers = self._response.headers
+        existing = headers.get(name)
+        if existing:
+            value = '%s%s%s' % (existing, delimiter, value)
+        self.setHeader(name, value)
+
+    # Cookies
+
+    def setCookie(self, name, value, **kw):
+        options = {}
+        for k, v in kw.items():
+            if v is not None:
+                options[k.lower().replace('-', '_')] = v
+        self._response.set_cookie(name, value, overwrite=True, **options)
+
+    def expireCookie(self, name, **kw):
+        # A value of None expires the cookie
+        self._response.set_cookie(name, None, overwrite=True,
+                                  path=kw.get('path') or '/',
+                                  domain=kw.get('domain'))
+
+    def getCookie(self, name, default=None):
+        for header in self._response.headers.getall('Set-Cookie'):
+            cookie_name, cookie_value = header.split(';', 1)[0].split('=', 1)
+            if cookie_name.strip() != name:
+                continue
+            cookie = {}
+            for attr in header.split(';')[1:]:
+                key, _, attr_value = attr.strip().partition('=')
+                cookie[key.lower()] = attr_value or True
+            cookie['value'] = list(parse_cookie('%s=%s' % (name, cookie_value)))[0][1]
+            if isinstance(cookie['value'], binary_type):
+                cookie['value'] = cookie['value'].decode('utf-8')
+            return cookie
+        return default
+
+    def appendToCookie(self, name, value):
+        cookie = self.getCookie(name)
+        if cookie is not None:
+            value = '%s:%s' % (cookie['value'], value)
+        self.setCookie(name, value)
+
+    # Body
+
+    def setResult(self, result):
+        """
+        Set the body of the response. Text and bytes are used directly.
+        Any other iterable (including :class:`.IResult` objects) becomes the
+        WSGI ``app_iter``, so that it is streamed and never joined into one
+        string; text chunks are encoded in the response's charset as they
+        are sent.
+        """
+        response = self._response
+        if result is None:
+            response.body = b''
+        elif isinstance(result, text_type):
+            response.text = result
+        elif isinstance(result, binary_type):
+            response.body = result
+        elif IResult.providedBy(result) or hasattr(result, '__iter__'):
+            response.app_iter = _encoded(result, response.charset or 'utf-8')
+            response.content_length = None
+        else:
+            raise TypeError("The result should be None, a string, or an iterable",
+                            result)
+
+    def consumeBody(self):
+        return self._response.body
+
+    def consumeBodyIter(self):
+        return self._response.app_iter
+
+    # Redirects
+
+    def redirect(self, location, status=302, trusted=False):
+        """
+        Redirect to *location*, which may be relative to the URL of
+        the request.
+
+        Unless *trusted*, the location must be on the same host as the
+        request.
+
+        :raise ValueError: For an untrusted redirect to another host.
+        """
+        request = BaseRequest(self._environ)
+        location = urljoin(request.url, str(location))
+        __traceback_info__ = location
+        if not trusted:
+            target_host = _extract_host(location)
+            if target_host and target_host != _extract_host(request.application_url):
+                raise ValueError("Untrusted redirect to host %r not allowed."
+                                 % target_host)
+        self._response.status_code = status
+        self.setHeader('Location', location)
+        return location
+
+    # The rest of IResponse
+
+    def authUser(self):
+        "Not tracked; always None."
+
+    def handleException(self, exc_info):
+        raise NotImplementedError()
+
+    def internalError(self):
+        self._response.status_code = 500
+
+    def reset(self):
+        self._response.body = b''
+        self._response.status_code = 200
+
+    def retry(self):
+        raise NotImplementedError()
@@ -14,8 +14,20 @@ authentication and right before traversal).
 
 Pyramid's request is not a participation, and Pyramid doesn't
 establish an interaction either. Something else (typically a
-tween like **TODO: Copy Tween**) does that. These adapters will
-work only after that is done.
+tween like :func:`nti.app.pyramid_zope.tweens.interaction_tween_factory`)
+does that. These adapters will work only after that is done.
+
+The interaction and principal found for a request are remembered
+for the rest of that request, for as long as the request's
+:class:`~zope.security.interfaces.IInteractionManagement` reports the
+same current interaction. Ending the interaction, or ending it and
+starting a new one, is noticed the next time they are asked for.
+
+By default the interaction is the thread-local one kept by
+:mod:`zope.security.management`. When many requests are handled
+concurrently by one thread (under gevent or asyncio), include
+``contextvars.zcml`` from this package instead, which registers
+:class:`ContextVarInteractionManagement` for Pyramid requests.
 """
 from __future__ import absolute_import
 from __future__ import division
@@ -23,16 +35,41 @@ from __future__ import print_function
 
 from pyramid.threadlocal import get_current_request
 from pyramid.interfaces import IRequest
+from pyramid.interfaces import IRequestFactory
+from pyramid.request import Request
 
 from zope import component
 from zope import interface
 
+from zope.interface import implementedBy
+from zope.interface import providedBy
+
+from zope.proxy import removeAllProxies
+
 from zope.authentication.interfaces import IFallbackUnauthenticatedPrincipal
+
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+
 from zope.security import management as default_interaction_mgmt
+from zope.security.management import ExistingInteraction
+from zope.security.interfaces import IGroup
 from zope.security.interfaces import IInteractionManagement
 from zope.security.interfaces import IInteraction
 from zope.security.interfaces import IPrincipal
 from zope.security.interfaces import NoInteraction
+from zope.security.checker import CheckerPublic
+from zope.security.simplepolicies import ParanoidSecurityPolicy
+from zope.security.simplepolicies import PermissiveSecurityPolicy
+
+from .caching import LRUCache
+from .caching import RegistryGenerationCache
+from .interfaces import IPrincipalCache
+
+try:
+    import contextvars
+except ImportError: # pragma: no cover
+    # Python 2
+    contextvars = None
 
 @component.adapter(IRequest)
 @interface.implementer(IInteraction)
@@ -57,7 +94,7 @@ def interaction_from_request(request=None):
     .. seealso:: :class:`zope.security.interfaces.IInteractionManagement`
     """
     request = get_current_request() if request is None else request
-    interaction_mgmt = IInteractionManagement(request, default_interaction_mgmt)
+    interaction_mgmt = _interaction_management(request)
     # If we return None here, we can use a default value for the interaction
     # or raise a TypeError with IInteraction(request, <default>); if we
     # raise NoInteraction it would be propagated unconditionally.
@@ -89,16 +126,344 @@ def principal_from_request(request=None):
     interaction into an ``IPrincipal`` (probably using :func:`principal_from_interaction`).
     If there is no interaction, the unauthenticated principal is returned.
 
+    The adapters used are remembered for each interface the request
+    (or interaction) provides until the component registry changes;
+    see :func:`warm_up_security_adapters`.
+
     This is registered as an adapter on the Pyramid ``IRequest`` interface;
     to provide a more specific policy, register an adapter on the concrete
     class.
 
     """
+    request = request if request is not None else get_current_request()
+    cache = _request_security_cache(request)
+    if cache is not None and 'principal' in cache.values:
+        return cache.values['principal']
+
     try:
-        interaction = IInteraction(
-            request if request is not None else get_current_request(),
-        )
+        interaction = _adapt(request, IInteraction)
     except NoInteraction:
-        return component.getUtility(IFallbackUnauthenticatedPrincipal)
+        principal = component.getUtility(IFallbackUnauthenticatedPrincipal)
+    else:
+        principal = _adapt(interaction, IPrincipal)
+
+    if cache is not None:
+        cache.values['principal'] = principal
+    return principal
+
+
+def class_permission_key(principals, permission, ob):
+    """
+    A key function for :data:`PERMISSION_CACHE_KEYS`, for security
+    policies whose ``checkPermission`` answer depends only on the
+    principals, the permission and the class of the object.
+    """
+    # Security proxies report the class of the object.
+    return (principals, permission, ob.__class__)
+
+
+#: The security policies (interaction classes) whose
+#: ``checkPermission`` answers :func:`filter_permitted` may remember,
+#: mapped to a function ``key(principals, permission, object)``.
+#: *principals* is the tuple of the principals of the interaction's
+#: participations. The function returns a hashable key
+#: that is the same for all objects the policy gives the same answer
+#: for, or None to check the object every time. Answers are remembered
+#: for the rest of the interaction.
+#:
+#: Only the simple policies, which answer the same for every object,
+#: are included. A policy that looks at the object itself, such as
+#: the grants and roles of ``zope.securitypolicy``, can only be added
+#: with a key that includes everything it looks at (for example, the
+#: object's ``__parent__`` when grants are made on containers but not
+#: on their items).
+PERMISSION_CACHE_KEYS = {
+    ParanoidSecurityPolicy: class_permission_key,
+    PermissiveSecurityPolicy: class_permission_key,
+}
+
+
+def filter_permitted(permission, objects, request=None):
+    """
+    filter_permitted(permission, objects: iterable, request: IRequest) -> list
+
+    Return a list of those *objects* the interaction of the *request*
+    has *permission* on, in order. The result is the same as calling
+    :func:`zope.security.checkPermission` for each object, but the
+    interaction is found only once. For the security policies in
+    :data:`PERMISSION_CACHE_KEYS`, the answer for each key is found only
+    once per interaction; other policies are asked about each object.
+
+    :raise zope.security.interfaces.NoInteraction: If there is
+       no interaction.
+    """
+    if permission is CheckerPublic or permission is None:
+        return list(objects)
+
+    request = get_current_request() if request is None else request
+    interaction = _interaction_management(request).getInteraction() # pylint:disable=too-many-function-args
+    check = interaction.checkPermission
+    key_for = PERMISSION_CACHE_KEYS.get(type(interaction))
+    if key_for is None:
+        return [o for o in objects if check(permission, o)]
+
+    principals = tuple(p.principal for p in interaction.participations)
+    cache = _request_security_cache(request)
+    grants = cache.values.setdefault('grants', {}) if cache is not None else {}
+    result = []
+    for o in objects:
+        key = key_for(principals, permission, o)
+        if key is None:
+            allowed = check(permission, o)
+        else:
+            try:
+                allowed = grants[key]
+            except KeyError:
+                allowed = grants[key] = check(permission, o)
+        if allowed:
+            result.append(o)
+    return result
+
+
+#: The adapter factories found by :func:`_adapt`, keyed by
+#: ``(interface, spec)``.
+_adapter_cache = RegistryGenerationCache()
+
+# The factory cached when the object already provides the interface.
+def _provided(ob):
+    return ob
+
+
+def _find_adapter(iface, spec, registry=None):
+    data = _adapter_cache.data(registry)
+    key = (iface, spec)
+    try:
+        return data[key]
+    except KeyError:
+        if spec.isOrExtends(iface):
+            factory = _provided
+        else:
+            registry = registry if registry is not None else component.getSiteManager()
+            factory = registry.adapters.lookup((spec,), iface, u'')
+        data[key] = factory
+        return factory
+
+
+def _adapt(ob, iface):
+    """
+    Like ``iface(ob)``, but with the adapter found for the interfaces
+    *ob* provides remembered.
+    """
+    factory = _find_adapter(iface, providedBy(ob))
+    if factory is not None:
+        result = factory(ob)
+        if result is not None:
+            return result
+    raise TypeError('Could not adapt', ob, iface)
+
+
+def warm_up_security_adapters(request_classes=None, registry=None):
+    """
+    Find ahead of time the adapters :func:`principal_from_request`
+    will use for requests that are instances of *request_classes* (by
+    default, the ``IRequestFactory`` of *registry*, or Pyramid's
+    ``Request``), and for the interactions of the current security
+    policy.
+
+    Call this once the application is configured, for example from an
+    ``ApplicationCreated`` subscriber. It has to be called again if
+    the component registry changes. Requests that come to provide
+    other interfaces (such as route request interfaces) have their
+    adapters found and remembered the first time they are seen.
+    """
+    if registry is None:
+        registry = component.getSiteManager()
+    if request_classes is None:
+        request_classes = (registry.queryUtility(IRequestFactory, default=Request),)
+    for cls in request_classes:
+        _find_adapter(IInteraction, implementedBy(cls), registry)
+    policy = default_interaction_mgmt.getSecurityPolicy()
+    _find_adapter(IPrincipal, implementedBy(policy), registry)
+
+
+class _RequestSecurityCache(object):
+    """
+    Things computed from the current interaction of a request.
+    """
+
+    __slots__ = (
+        'interaction',
+        'values',
+    )
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.values = {}
+
+
+def _interaction_management(request):
+    """
+    The :class:`IInteractionManagement` for the *request*, found once
+    per request.
+    """
+    if request is None:
+        return IInteractionManagement(request, default_interaction_mgmt)
+    request_dict = removeAllProxies(request).__dict__
+    try:
+        return request_dict['_nti_interaction_management']
+    except KeyError:
+        mgmt = request_dict['_nti_interaction_management'] = IInteractionManagement(
+            request,
+            default_interaction_mgmt
+        )
+        return mgmt
+
+
+def _request_security_cache(request):
+    """
+    Return the :class:`_RequestSecurityCache` for the *request*
+    (``None`` if there is no request), starting a new, empty, one if
+    the current interaction has changed.
+    """
+    if request is None:
+        return None
+    current = _interaction_management(request).queryInteraction() # pylint:disable=too-many-function-args
+    request_dict = removeAllProxies(request).__dict__
+    cache = request_dict.get('_nti_security_cache')
+    if cache is None or cache.interaction is not current:
+        cache = request_dict['_nti_security_cache'] = _RequestSecurityCache(current)
+    return cache
+
+
+if contextvars is not None:
+    _current_interaction = contextvars.ContextVar(
+        'nti.app.pyramid_zope.security.interaction',
+        default=None)
+    _previous_interaction = contextvars.ContextVar(
+        'nti.app.pyramid_zope.security.previous_interaction',
+        default=None)
+
+
+@interface.implementer(IInteractionManagement)
+class ContextVarInteractionManagement(object):
+    """
+    An :class:`IInteractionManagement` that keeps the interaction in a
+    :class:`contextvars.ContextVar` instead of a thread-local, so
+    that each greenlet or asyncio task sees its own.
+
+    Interactions are created with the security policy of
+    :func:`zope.security.management.getSecurityPolicy`.
+
+    .. caution:: Code that uses the functions of
+       :mod:`zope.security.management` directly (such as
+       :func:`zope.security.checkPermission`) still sees only the
+       thread-local interaction. Use the request's interaction instead.
+
+    Requires Python 3.7 or later.
+    """
+
+    def newInteraction(self, *participations):
+        if _current_interaction.get() is not None:
+            raise ExistingInteraction("newInteraction called"
+                                      " while another interaction is active.")
+        policy = default_interaction_mgmt.getSecurityPolicy()
+        _current_interaction.set(policy(*participations))
+
+    def queryInteraction(self):
+        return _current_interaction.get()
+
+    def getInteraction(self):
+        interaction = _current_interaction.get()
+        if interaction is None:
+            raise NoInteraction()
+        return interaction
+
+    def endInteraction(self):
+        _previous_interaction.set(_current_interaction.get())
+        _current_interaction.set(None)
+
+    def restoreInteraction(self):
+        _current_interaction.set(_previous_interaction.get())
+
+
+#: The one :class:`ContextVarInteractionManagement`.
+context_interaction_management = ContextVarInteractionManagement() if contextvars else None
+
+
+@component.adapter(IRequest)
+@interface.implementer(IInteractionManagement)
+def context_interaction_management_from_request(unused_request):
+    """
+    Return the :data:`context_interaction_management`. This is
+    registered by ``contextvars.zcml``.
+    """
+    return context_interaction_management
+
+
+@interface.implementer(IPrincipalCache)
+class PrincipalCache(LRUCache):
+    """
+    An :class:`.IPrincipalCache` holding at most *maxsize* principals
+    for at most *ttl* seconds each.
+
+    Register one as a utility to have the interaction tween reuse
+    principals between requests, instead of asking its principal
+    factory (which often means a database query) each time. The
+    Pyramid ``authenticated_userid`` is the key, so it should be the
+    principal id for the invalidation in :func:`invalidate_cached_principal`
+    to work.
+
+    In addition to the counters of :class:`.LRUCache`, this keeps
+    a count of :attr:`invalidations`.
+    """
+
+    invalidations = 0
+
+    def __init__(self, maxsize=1000, ttl=300, **kwargs):
+        super(PrincipalCache, self).__init__(maxsize, ttl, **kwargs)
+
+    def invalidate(self, principal_id):
+        self.invalidations += 1
+        self.pop(principal_id)
+
+    def invalidate_all(self):
+        self.invalidations += 1
+        self.clear(reset_counters=False)
+
+    def clear(self, reset_counters=True):
+        super(PrincipalCache, self).clear(reset_counters)
+        if reset_counters:
+            self.invalidations = 0
+
+    def stats(self):
+        stats = super(PrincipalCache, self).stats()
+        stats['invalidations'] = self.invalidations
+        return stats
+
+
+@component.adapter(IPrincipal, IObjectModifiedEvent)
+def invalidate_cached_principal(principal, unused_event=None):
+    """
+    Remove *principal* from the :class:`.IPrincipalCache` utility, if
+    there is one. A group being modified may change the groups of any
+    principal, so that removes all of them.
+
+    This is registered as a subscriber for modified principals. Call it
+    directly when the groups or permissions of a principal change
+    without such an event.
+    """
+    cache = component.queryUtility(IPrincipalCache)
+    if cache is None:
+        return
+    if IGroup.providedBy(principal):
+        cache.invalidate_all()
+    else:
+        cache.invalidate(principal.id)
+
 
-    return IPrincipal(interaction)
+try:
+    from zope.testing import cleanup
+except ImportError: # pragma: no cover
+    pass
+else:
+    cleanup.addCleanUp(_adapter_cache.clear)
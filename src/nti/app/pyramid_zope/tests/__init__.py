@@ -3,9 +3,19 @@
 
 from __future__ import print_function, absolute_import, division
 
+from pyramid.testing import DummyRequest
+
+from zope import interface
+
+from zope.location.interfaces import LocationError
+
+from zope.traversing.interfaces import ITraversable
+
 from nti.testing.layers import ZopeComponentLayer
 from nti.testing.layers import ConfiguringLayerMixin
 
+from ..traversal import ZopeResourceTreeTraverser
+
 class ConfiguringLayer(ZopeComponentLayer,
                        ConfiguringLayerMixin):
     set_up_packages = ('nti.app.pyramid_zope',)
@@ -23,3 +33,34 @@ class ConfiguringLayer(ZopeComponentLayer,
         "Does nothing"
 
     testTearDown = testSetUp
+
+
+@interface.implementer(ITraversable)
+class Folder(dict):
+    """
+    A dictionary that is its own ``ITraversable``, traversing to its
+    items.
+    """
+
+    def traverse(self, name, furtherPath): # pylint:disable=unused-argument
+        try:
+            return self[name]
+        except KeyError:
+            raise LocationError(self, name)
+
+
+def traverse(root, *path, **kwargs):
+    """
+    Traverse the segments *path* from *root* the way a route with a
+    ``*traverse`` pattern does, and return the result.
+
+    *traverser* is called with *root* to make the traverser (by
+    default, it is :class:`.ZopeResourceTreeTraverser`). *request* is
+    the request to use (by default, a new :class:`.DummyRequest`).
+    """
+    request = kwargs.pop('request', None)
+    if request is None:
+        request = DummyRequest(path='/' + '/'.join(path))
+    request.matchdict = {'traverse': path}
+    traverser = kwargs.pop('traverser', ZopeResourceTreeTraverser)
+    return traverser(root)(request)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for caching.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import calling
+from hamcrest import has_entries
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import raises
+from hamcrest import same_instance
+
+from pyramid.request import Request
+
+from zope.interface import Interface
+from zope.interface.registry import Components
+
+from ..caching import LRUCache
+from ..caching import RegistryGenerationCache
+from ..caching import request_annotations
+from ..caching import request_memoize
+from ..request import PyramidZopeRequestProxy
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_bad_size(self):
+        assert_that(calling(LRUCache).with_args(0), raises(ValueError))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        assert_that(cache.get('a'), is_(1))
+        cache['c'] = 3
+
+        assert_that('b' in cache, is_(False))
+        assert_that(cache.get('b'), is_(none()))
+        assert_that(cache.get('a'), is_(1))
+        assert_that(cache.get('c'), is_(3))
+        assert_that(cache.stats(), has_entries(size=2, hits=3, misses=1, evictions=1))
+
+        cache.clear()
+        assert_that(len(cache), is_(0))
+        assert_that(cache.stats(), has_entries(hits=0, misses=0, evictions=0))
+
+    def test_pop_and_del(self):
+        cache = LRUCache()
+        cache['a'] = 1
+        cache['b'] = 2
+        assert_that(cache.pop('a'), is_(1))
+        assert_that(cache.pop('a', 42), is_(42))
+        del cache['b']
+        assert_that(len(cache), is_(0))
+
+    def test_peek(self):
+        now = [100]
+        cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+        cache['a'] = 1
+        cache['b'] = 2
+        assert_that(cache.peek('a'), is_(1))
+        assert_that(cache.peek('c', 42), is_(42))
+        # 'a' is still the least recently used
+        cache['c'] = 3
+        assert_that('a' in cache, is_(False))
+        assert_that(cache.stats(), has_entries(hits=0, misses=0, evictions=1))
+
+        now[0] = 110
+        assert_that(cache.peek('b'), is_(none()))
+        assert_that(cache.stats(), has_entries(expirations=1, size=1))
+
+    def test_ttl(self):
+        now = [100]
+        cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+        cache['a'] = 1
+        assert_that(cache.get('a'), is_(1))
+        assert_that('a' in cache, is_(True))
+
+        now[0] = 110
+        assert_that('a' in cache, is_(False))
+        assert_that(cache.get('a'), is_(none()))
+        assert_that(cache.stats(), has_entries(hits=1, misses=1, expirations=1, size=0))
+
+        cache['b'] = 2
+        now[0] = 120
+        assert_that(cache.pop('b'), is_(none()))
+
+        assert_that(calling(LRUCache).with_args(ttl=0), raises(ValueError))
+
+
+class TestRegistryGenerationCache(unittest.TestCase):
+
+    def test_emptied_on_change(self):
+        base = Components()
+        registry = Components(bases=(base,))
+        cache = RegistryGenerationCache(maxsize=2)
+
+        cache.data(registry)['a'] = 1
+        assert_that(cache.data(registry), is_({'a': 1}))
+
+        # A change to a base registry empties it
+        base.registerAdapter(lambda o: o, (Interface,), Interface)
+        assert_that(cache.data(registry), is_({}))
+
+        # Each registry has its own
+        cache.data(registry)['a'] = 1
+        assert_that(cache.data(base), is_({}))
+        assert_that(cache.data(registry), is_({'a': 1}))
+
+        # It's emptied if it grows too large
+        cache.data(base).update({'a': 1, 'b': 2, 'c': 3})
+        assert_that(cache.data(base), is_({}))
+
+    def test_utilities(self):
+        registry = Components()
+        cache = RegistryGenerationCache(kind='utilities')
+
+        cache.data(registry)['a'] = 1
+        registry.registerAdapter(lambda o: o, (Interface,), Interface)
+        assert_that(cache.data(registry), is_({'a': 1}))
+
+        registry.registerUtility(object(), Interface)
+        assert_that(cache.data(registry), is_({}))
+
+
+class TestRequestMemoize(unittest.TestCase):
+
+    def test_annotations_shared_with_proxy(self):
+        request = Request.blank('/')
+        annotations = request_annotations(request)
+        assert_that(PyramidZopeRequestProxy(request).annotations,
+                    is_(same_instance(annotations)))
+        assert_that(request_annotations(PyramidZopeRequestProxy(request)),
+                    is_(same_instance(annotations)))
+
+    def test_memoize(self):
+        calls = []
+
+        @request_memoize(stats=True)
+        def lookup(request, name, default=None):
+            calls.append(name)
+            return [name, default]
+
+        request = Request.blank('/')
+        first = lookup(request, 'a')
+        assert_that(lookup(request, 'a'), is_(same_instance(first)))
+        # The proxy shares the cache
+        assert_that(lookup(PyramidZopeRequestProxy(request), 'a'),
+                    is_(same_instance(first)))
+        assert_that(lookup(request, 'a', default=1), is_(['a', 1]))
+        assert_that(calls, is_(['a', 'a']))
+        assert_that(lookup.stats.stats(), has_entries(hits=2, misses=2))
+
+        # Another request has its own cache
+        lookup(Request.blank('/'), 'a')
+        assert_that(calls, is_(['a', 'a', 'a']))
+
+        lookup.invalidate(request, 'a')
+        lookup(request, 'a')
+        assert_that(calls, is_(['a', 'a', 'a', 'a']))
+
+        # Unhashable arguments are passed through
+        lookup(request, ['a'])
+        lookup(request, ['a'])
+        assert_that(calls[-2:], is_([['a'], ['a']]))
+        lookup(request, 'b', default=['x'])
+        assert_that(lookup(request, 'b', default=['x']), is_(['b', ['x']]))
+        assert_that(calls[-2:], is_(['b', 'b']))
+        lookup.invalidate(request, 'b', default=['x'])
+
+        lookup.stats.reset()
+        assert_that(lookup.stats.stats(), has_entries(hits=0, misses=0))
+
+    def test_memoize_without_stats(self):
+        @request_memoize
+        def lookup(request):
+            return object()
+
+        request = Request.blank('/')
+        assert_that(lookup(request), is_(same_instance(lookup(request))))
+        assert_that(lookup.stats, is_(none()))
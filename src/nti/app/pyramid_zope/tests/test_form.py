@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for form.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import calling
+from hamcrest import has_entries
+from hamcrest import is_
+from hamcrest import raises
+
+from six.moves.urllib_parse import urlencode
+
+from pyramid.request import Request
+
+from zope.publisher.browser import BrowserRequest
+from zope.publisher.browser import Record
+
+from ..form import process_form
+from ..request import PyramidZopeRequestProxy
+
+
+def zope_form(pairs):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': urlencode(pairs),
+    }
+    request = BrowserRequest(None, environ)
+    request.charsets = ['utf-8']
+    request.processInputs()
+    return request.form
+
+
+def as_plain(value):
+    # Records don't compare equal
+    if isinstance(value, Record):
+        return {k: as_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(as_plain(v) for v in value)
+    if isinstance(value, dict):
+        return {k: as_plain(v) for k, v in value.items()}
+    return value
+
+
+class TestProcessForm(unittest.TestCase):
+
+    def _check(self, pairs):
+        expected = as_plain(zope_form(pairs))
+        assert_that(as_plain(process_form(pairs)), is_(expected))
+        return expected
+
+    def test_plain(self):
+        form = self._check([('a', '1'), ('b', '2'), ('b', '3')])
+        assert_that(form, is_({'a': '1', 'b': ['2', '3']}))
+
+    def test_converters(self):
+        form = self._check([
+            ('i:int', '1'),
+            ('f:float', '1.5'),
+            ('l:long', '2L'),
+            ('t:tokens', 'a b  c'),
+            ('n:lines', 'a\nb'),
+            ('b:boolean', ''),
+            ('s:string', 'x'),
+            ('r:required', 'y'),
+            ('il:int:list', '1'),
+            ('il:int:list', '2'),
+        ])
+        assert_that(form, has_entries(i=1, f=1.5, l=2, t=['a', 'b', 'c'],
+                                      il=[1, 2]))
+
+    def test_list_and_tuple(self):
+        form = self._check([
+            ('country:list', 'Japan'),
+            ('country:list', 'Hungary'),
+            ('one:list', 'only'),
+            ('t:tuple', 'a'),
+            ('t:tuple', 'b'),
+        ])
+        assert_that(form, is_({'country': ['Japan', 'Hungary'],
+                               'one': ['only'],
+                               't': ('a', 'b')}))
+
+    def test_records(self):
+        self._check([
+            ('person.name:record', 'Bob'),
+            ('person.age:int:record', '42'),
+            ('person.tags:list:record', 'x'),
+            ('person.tags:list:record', 'y'),
+            ('people.name:records', 'Alice'),
+            ('people.age:records', '1'),
+            ('people.name:records', 'Carol'),
+            ('people.pets:list:records', 'cat'),
+            ('rt.vals:tuple:record', 'a'),
+            ('rt.vals:tuple:record', 'b'),
+        ])
+
+    def test_defaults(self):
+        form = self._check([
+            ('a:default', 'default'),
+            ('b:default', 'unused'),
+            ('b', 'given'),
+            ('n:int:default', '0'),
+            ('n:int', ''),
+            ('l:list:default', 'x'),
+            ('l:list', 'y'),
+            ('rec.a:record:default', 'da'),
+            ('rec.b:record', 'b'),
+        ])
+        assert_that(form, has_entries(a='default', b='given', n=0,
+                                      l=['y', 'x']))
+
+    def test_ignore_empty_and_method(self):
+        form = self._check([
+            ('e:ignore_empty', ''),
+            ('f:ignore_empty', 'full'),
+            ('go:method', 'Go'),
+        ])
+        assert_that(form, is_({'f': 'full', 'go': 'Go'}))
+
+    def test_not_suffixes(self):
+        self._check([
+            ('a:b:c d', '1'),
+            ('time:12', '2'),
+            (':int', '3'),
+        ])
+
+    def test_bad_conversion(self):
+        assert_that(calling(process_form).with_args([('i:int', 'abc')]),
+                    raises(ValueError))
+        assert_that(calling(process_form).with_args([('r:required', ' ')]),
+                    raises(ValueError))
+
+
+class TestRequestForm(unittest.TestCase):
+
+    def test_form_from_get_and_post(self):
+        request = Request.blank('/?a:int=1&l:list=x',
+                                POST={'l:list': 'y', 'p.name:record': 'Bob'})
+        zrequest = PyramidZopeRequestProxy(request)
+        form = zrequest.form
+        assert_that(form, has_entries(a=1, l=['x', 'y']))
+        assert_that(form['p'].name, is_('Bob'))
+        # Processed only once
+        assert_that(zrequest.form, is_(form))
+        assert_that(PyramidZopeRequestProxy(request).form is form, is_(True))
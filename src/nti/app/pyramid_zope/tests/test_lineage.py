@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for lineage.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import same_instance
+
+from pyramid import testing
+from pyramid.traversal import ResourceURL
+from pyramid.traversal import find_interface
+from pyramid.traversal import lineage
+
+from zope import interface
+
+from zope.event import notify
+
+from zope.lifecycleevent import ObjectMovedEvent
+
+from ..lineage import CachedResourceURL
+from ..lineage import cached_find_interface
+from ..lineage import cached_lineage
+from ..lineage import cached_resource_path_tuple
+
+from . import ConfiguringLayer
+
+
+class ISite(interface.Interface):
+    pass
+
+
+class Resource(object):
+
+    parent_lookups = 0
+
+    def __init__(self, name=None, parent=None):
+        self.__name__ = name
+        self._parent = parent
+
+    @property
+    def __parent__(self):
+        Resource.parent_lookups += 1
+        return self._parent
+
+    @__parent__.setter
+    def __parent__(self, parent):
+        self._parent = parent
+
+
+class TestLineage(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        Resource.parent_lookups = 0
+        self.root = Resource()
+        self.site = Resource('site', self.root)
+        interface.alsoProvides(self.site, ISite)
+        self.folder = Resource('a folder', self.site)
+        self.x = Resource('x', self.folder)
+        self.y = Resource('y', self.folder)
+        self.request = testing.DummyRequest()
+
+    def test_lineage(self):
+        expected = tuple(lineage(self.x))
+        Resource.parent_lookups = 0
+        assert_that(cached_lineage(self.x, self.request), is_(expected))
+        assert_that(Resource.parent_lookups, is_(4))
+        assert_that(cached_lineage(self.x, self.request), is_(expected))
+        assert_that(Resource.parent_lookups, is_(4))
+        # A sibling only walks to the parent
+        assert_that(cached_lineage(self.y, self.request), is_((self.y,) + expected[1:]))
+        assert_that(Resource.parent_lookups, is_(5))
+        # Other requests walk again
+        cached_lineage(self.x, testing.DummyRequest())
+        assert_that(Resource.parent_lookups, is_(9))
+
+    def test_find_interface(self):
+        assert_that(cached_find_interface(self.x, ISite, self.request),
+                    is_(same_instance(find_interface(self.x, ISite))))
+        assert_that(cached_find_interface(self.x, Resource, self.request),
+                    is_(same_instance(self.x)))
+        assert_that(cached_find_interface(self.root, ISite, self.request), is_(none()))
+        Resource.parent_lookups = 0
+        assert_that(cached_find_interface(self.x, ISite, self.request),
+                    is_(same_instance(self.site)))
+        assert_that(Resource.parent_lookups, is_(0))
+
+    def test_resource_url(self):
+        assert_that(cached_resource_path_tuple(self.x, self.request),
+                    is_(('', 'site', 'a folder', 'x')))
+        for resource in (self.root, self.x):
+            for environ in ({}, {'HTTP_X_VHM_ROOT': '/site'}):
+                request = testing.DummyRequest(environ=environ)
+                expected = ResourceURL(resource, request)
+                url = CachedResourceURL(resource, request)
+                for name in ('virtual_path', 'physical_path',
+                             'virtual_path_tuple', 'physical_path_tuple'):
+                    assert_that(getattr(url, name), is_(getattr(expected, name)))
+                assert_that(CachedResourceURL(resource, request), is_(same_instance(url)))
+
+    def test_invalidated_when_moved(self):
+        testing.setUp(request=self.request, hook_zca=False)
+        try:
+            assert_that(cached_resource_path_tuple(self.x, self.request),
+                        is_(('', 'site', 'a folder', 'x')))
+            self.x.__parent__ = self.site
+            notify(ObjectMovedEvent(self.x, self.folder, 'x', self.site, 'x'))
+            assert_that(cached_resource_path_tuple(self.x, self.request),
+                        is_(('', 'site', 'x')))
+        finally:
+            testing.tearDown()
@@ -7,20 +7,32 @@ __docformat__ = "restructuredtext en"
 # disable: accessing protected members, too many methods
 # pylint: disable=W0212,R0904
 
+import io
+
 from hamcrest import assert_that
 from hamcrest import calling
 from hamcrest import is_
+from hamcrest import is_not
+from hamcrest import none
 from hamcrest import raises
+from hamcrest import same_instance
 
 from nti.testing.matchers import verifiably_provides
 
 from zope.publisher.interfaces.browser import IBrowserRequest
 
+from pyramid.registry import Registry
 from pyramid.request import Request
+from pyramid.response import Response
+from pyramid.testing import DummyRequest
 from pyramid.interfaces import IRequest
 
 from nti.testing.base import SharedConfiguringTestBase
 
+from ..request import BODY_SPILL_THRESHOLD_KEY
+from ..request import STREAM_BODY_KEY
+from ..request import PyramidZopeRequestProxy
+
 
 class TestRequest(SharedConfiguringTestBase):
 
@@ -44,6 +56,15 @@ class TestRequest(SharedConfiguringTestBase):
         assert_that(zrequest.form,
                     {'country': ['Japan', 'Hungary'], 'lastName': 'Doe'})
 
+    def test_form_assignment(self):
+        request = Request.blank('/?a=1')
+        zrequest = IBrowserRequest(request)
+        assert_that(zrequest.form, is_({'a': '1'}))
+        zrequest.form = {'b': '2'}
+        assert_that(zrequest.form, is_({'b': '2'}))
+        # Other proxies of the request see it too
+        assert_that(IBrowserRequest(request).form, is_({'b': '2'}))
+
     def test_has_key(self):
         environ = {
             'PATH_INFO': '/',
@@ -80,3 +101,225 @@ class TestRequest(SharedConfiguringTestBase):
         zrequest = IBrowserRequest(request)
 
         assert_that(zrequest.getPositionalArguments(), is_(()))
+
+    def test_get_merges_params(self):
+        request = Request.blank('/?a=1&b=2&b=3', POST={'a': 'x', 'c': 'q'})
+        zrequest = IBrowserRequest(request)
+
+        # POST replaces GET
+        assert_that(zrequest.get('a'), is_('x'))
+        assert_that(zrequest.get('b'), is_(['2', '3']))
+        assert_that(zrequest.get('c'), is_('q'))
+        # Falls back to the environment
+        assert_that(zrequest.get('PATH_INFO'), is_('/'))
+        assert_that(zrequest.get('missing', 'default'), is_('default'))
+
+        # Lists are copies
+        zrequest.get('b').append('4')
+        assert_that(zrequest.get('b'), is_(['2', '3']))
+
+    def test_get_index_reused_until_params_change(self):
+        request = Request.blank('/?a=1', POST={'b': '2'})
+        zrequest = IBrowserRequest(request)
+
+        zrequest.get('a')
+        index = request.__dict__['_nti_parameter_index']
+        zrequest.get('b')
+        assert_that(request.__dict__['_nti_parameter_index'], is_(same_instance(index)))
+        # Also shared with other proxies of the same request
+        IBrowserRequest(request).get('a')
+        assert_that(request.__dict__['_nti_parameter_index'], is_(same_instance(index)))
+
+        request.GET['c'] = '3'
+        assert_that(zrequest.get('c'), is_('3'))
+
+        request.POST['b'] = '4'
+        assert_that(zrequest.get('b'), is_('4'))
+
+        request.POST.add('b', '5')
+        assert_that(zrequest.get('b'), is_(['4', '5']))
+
+        del request.POST['b']
+        assert_that(zrequest.get('b'), is_(none()))
+
+    def test_get_index_reused_for_get_request(self):
+        # WebOb makes a new NoVars each time POST is read
+        request = Request.blank('/?a=1')
+        assert_that(request.POST, is_not(same_instance(request.POST)))
+        zrequest = IBrowserRequest(request)
+
+        zrequest.get('a')
+        index = request.__dict__['_nti_parameter_index']
+        zrequest.get('a')
+        assert_that('a' in zrequest, is_(True))
+        assert_that(request.__dict__['_nti_parameter_index'], is_(same_instance(index)))
+
+        request.GET['c'] = '3'
+        assert_that(zrequest.get('c'), is_('3'))
+
+    def test_get_dummy_request(self):
+        request = DummyRequest(params={'a': '1'}, post={'b': ''})
+        zrequest = PyramidZopeRequestProxy(request)
+        assert_that(zrequest.get('a'), is_('1'))
+        request.GET['a'] = '2'
+        assert_that(zrequest.get('a'), is_('2'))
+        # Empty values fall through to the environment
+        request.environ['b'] = 'environ'
+        assert_that(zrequest.get('b'), is_('environ'))
+
+    def _check_mapping_matches_merged(self, zrequest):
+        # What the mapping protocol used to answer by merging everything.
+        # (Parsing GET and POST caches things in the environ, so do that first.)
+        GET, POST = zrequest.GET, zrequest.POST
+        merged = {}
+        merged.update(zrequest.environ)
+        merged.update(GET)
+        merged.update(POST)
+
+        assert_that(len(zrequest), is_(len(merged)))
+        assert_that(list(zrequest), is_(list(merged)))
+        assert_that(list(zrequest.keys()), is_(list(merged.keys())))
+        assert_that(list(zrequest.values()), is_(list(merged.values())))
+        assert_that(dict(zrequest.items()), is_(merged))
+        for key in merged:
+            assert_that(key in zrequest, is_(True))
+            assert_that(zrequest.has_key(key), is_(True))
+        assert_that('missing' in zrequest, is_(False))
+
+    def test_mapping_protocol_matches_merged(self):
+        request = Request.blank('/?a=1&b=2&b=3&PATH_INFO=q',
+                                POST={'a': 'x', 'c': 'q', 'b': ''})
+        zrequest = IBrowserRequest(request)
+        self._check_mapping_matches_merged(zrequest)
+
+        request.GET['d'] = '4'
+        request.environ['HTTP_X_EXTRA'] = 'yes'
+        self._check_mapping_matches_merged(zrequest)
+
+    def test_mapping_protocol_no_vars(self):
+        request = Request.blank('/')
+        zrequest = IBrowserRequest(request)
+        self._check_mapping_matches_merged(zrequest)
+
+    def test_mapping_protocol_dummy_request(self):
+        request = DummyRequest(params={'a': '1', 'b': '2'}, post={'b': '3'})
+        zrequest = PyramidZopeRequestProxy(request)
+        self._check_mapping_matches_merged(zrequest)
+
+    def test_one_proxy_per_request(self):
+        request = Request.blank('/')
+        zrequest = IBrowserRequest(request)
+        zresponse = zrequest.response
+
+        assert_that(IBrowserRequest(request), is_(same_instance(zrequest)))
+        assert_that(PyramidZopeRequestProxy(request), is_(same_instance(zrequest)))
+        assert_that(PyramidZopeRequestProxy(zrequest), is_(same_instance(zrequest)))
+        # The response was only adapted once
+        assert_that(zrequest.response, is_(same_instance(zresponse)))
+
+    def test_pyramid_response_aliases(self):
+        request = Request.blank('http://example.com/folder/item')
+        IBrowserRequest(request)
+        response = request.response
+        response.setHeader('X-Foo', 'bar')
+        assert_that(response.getHeader('X-Foo'), is_('bar'))
+        response.setStatus(201)
+        assert_that(response.getStatus(), is_(201))
+        response.redirect('other')
+        assert_that(response.location, is_('http://example.com/folder/other'))
+
+    def test_response_assignment(self):
+        request = Request.blank('/')
+        zrequest = IBrowserRequest(request)
+        new_response = Response()
+        zrequest.response = new_response
+        assert_that(request.response, is_(same_instance(new_response)))
+        assert_that(zrequest.response._response, is_(same_instance(new_response)))
+        new_response.setHeader('X-Foo', 'bar')
+        assert_that(new_response.headers['X-Foo'], is_('bar'))
+
+    def test_proxy_dropped_when_finished(self):
+        request = Request.blank('/')
+        zrequest = IBrowserRequest(request)
+        request._process_finished_callbacks()
+        assert_that(IBrowserRequest(request), is_not(same_instance(zrequest)))
+
+    def test_url_paths(self):
+        request = Request.blank('http://foobar.com/folder/item')
+        zrequest = IBrowserRequest(request)
+
+        assert_that(zrequest.getURL(), is_('http://foobar.com/folder/item'))
+        assert_that(zrequest.getURL(1), is_('http://foobar.com/folder'))
+        assert_that(zrequest.getURL(1, path_only=True), is_('/folder'))
+        assert_that(zrequest.getURL(2, path_only=True), is_(''))
+        assert_that(calling(zrequest.getURL).with_args(3), raises(IndexError))
+        assert_that(zrequest.getApplicationURL(), is_('http://foobar.com'))
+        assert_that(zrequest.getApplicationURL(1), is_('http://foobar.com/folder'))
+        assert_that(zrequest.getApplicationURL(path_only=True), is_('/folder/item'))
+
+        segments = request.__dict__['_nti_url_segments']
+        zrequest.getURL(1)
+        assert_that(request.__dict__['_nti_url_segments'], is_(same_instance(segments)))
+
+        # Changing the path is noticed
+        request.path_info = '/other'
+        assert_that(zrequest.getURL(), is_('http://foobar.com/other'))
+        assert_that(zrequest.URL['-1'], is_('http://foobar.com'))
+
+    def test_url_dummy_request(self):
+        request = DummyRequest()
+        request.path_url = 'http://example.com/folder/item'
+        zrequest = PyramidZopeRequestProxy(request)
+        assert_that(zrequest.getURL(1), is_('http://example.com/folder'))
+        request.path_url = 'http://example.com/other/item'
+        assert_that(zrequest.getURL(1), is_('http://example.com/other'))
+
+    def _body_request(self, body, **settings):
+        class Input(object):
+            # A forward-only WSGI input.
+            def __init__(self, data):
+                self._data = io.BytesIO(data)
+                self.read = self._data.read
+                self.readline = self._data.readline
+
+        request = Request.blank('/', method='POST')
+        request.environ['wsgi.input'] = Input(body)
+        request.environ['CONTENT_LENGTH'] = str(len(body))
+        request.environ.pop('webob.is_body_seekable', None)
+        request.registry = Registry()
+        request.registry.settings = settings
+        return request
+
+    def test_body_stream_default_is_seekable(self):
+        request = self._body_request(b'x' * 100000)
+        stream = IBrowserRequest(request).bodyStream
+        assert_that(stream.seekable(), is_(True))
+        assert_that(stream.read(), is_(b'x' * 100000))
+
+    def test_body_stream_streaming(self):
+        body = b'line\n' * 20000
+        request = self._body_request(body, **{STREAM_BODY_KEY: 'true'})
+        zrequest = IBrowserRequest(request)
+        stream = zrequest.bodyStream
+        assert_that(stream.seekable(), is_(False))
+        assert_that(request.is_body_seekable, is_(False))
+        assert_that(stream.readline(), is_(b'line\n'))
+        # The same stream is returned each time
+        assert_that(zrequest.bodyStream, is_(same_instance(stream)))
+        assert_that(stream.read(), is_(body[5:]))
+        assert_that(stream.read(), is_(b''))
+
+    def test_body_stream_streaming_below_threshold(self):
+        request = self._body_request(b'x' * 100,
+                                     **{BODY_SPILL_THRESHOLD_KEY: '1000'})
+        request.environ[STREAM_BODY_KEY] = True
+        stream = IBrowserRequest(request).bodyStream
+        assert_that(stream.seekable(), is_(True))
+        assert_that(stream.read(), is_(b'x' * 100))
+
+    def test_body_stream_streaming_per_request(self):
+        request = self._body_request(b'x' * 100000,
+                                     **{STREAM_BODY_KEY: 'true'})
+        request.environ[STREAM_BODY_KEY] = False
+        stream = IBrowserRequest(request).bodyStream
+        assert_that(stream.seekable(), is_(True))
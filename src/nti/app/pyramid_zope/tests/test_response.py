@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for response.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import calling
+from hamcrest import contains_exactly
+from hamcrest import has_entries
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import raises
+from hamcrest import same_instance
+
+from nti.testing.matchers import verifiably_provides
+
+from pyramid.request import Request
+
+from zope.publisher.interfaces.http import IHTTPResponse
+
+from ..request import PyramidZopeRequestProxy
+from ..response import PyramidZopeResponse
+
+
+class TestResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.request = Request.blank('http://example.com/folder/item')
+        self.zrequest = PyramidZopeRequestProxy(self.request)
+        self.response = self.zrequest.response
+
+    def test_provides(self):
+        assert_that(self.response, verifiably_provides(IHTTPResponse))
+        assert_that(self.response, is_(PyramidZopeResponse))
+        # One per response
+        assert_that(self.zrequest.response, is_(same_instance(self.response)))
+        # A few of its methods are also on the WebOb response
+        assert_that(self.request.response.setHeader.__self__, is_(same_instance(self.response)))
+
+    def test_passes_through(self):
+        self.response.status_code = 404
+        assert_that(self.request.response.status_code, is_(404))
+        assert_that(self.response.status, is_('404 Not Found'))
+
+    def test_status(self):
+        self.response.setStatus(201)
+        assert_that(self.response.getStatus(), is_(201))
+        self.response.setStatus(299, 'Custom')
+        assert_that(self.response.getStatusString(), is_('299 Custom'))
+
+    def test_headers(self):
+        response = self.response
+        response.charset = 'utf-8'
+        response.setHeader('Content-Type', 'text/plain')
+        assert_that(response.getHeader('content-type'),
+                    is_('text/plain; charset=utf-8'))
+
+        response.setHeader('X-One', 'a')
+        response.setHeader('X-One', 'b')
+        assert_that(response.getHeader('X-One'), is_('b'))
+
+        response.addHeader('X-Two', 'a')
+        response.addHeader('X-Two', 'b')
+        assert_that(response.headers.getall('X-Two'), is_(['a', 'b']))
+
+        response.appendHeader('Vary', 'Accept')
+        response.appendHeader('Vary', 'Cookie')
+        assert_that(response.getHeader('Vary'), is_('Accept,Cookie'))
+
+        assert_that(response.getHeader('X-Missing', 'default'), is_('default'))
+        assert_that(response.getHeaders(), is_(list(self.request.response.headerlist)))
+
+    def test_cookies(self):
+        response = self.response
+        response.setCookie('name', 'value', path='/folder', max_age=60)
+        assert_that(response.getCookie('name'),
+                    has_entries(value='value', path='/folder', **{'max-age': '60'}))
+        assert_that(response.getCookie('other'), is_(none()))
+
+        response.appendToCookie('name', 'more')
+        assert_that(response.getCookie('name'), has_entries(value='value:more'))
+        assert_that(response.headers.getall('Set-Cookie'), is_(contains_exactly(
+            'name=value:more; Path=/')))
+
+        response.expireCookie('name')
+        assert_that(response.getCookie('name'), has_entries(value='', **{'max-age': '0'}))
+
+    def test_set_result(self):
+        response = self.response
+        response.setResult(u'text')
+        assert_that(response.consumeBody(), is_(b'text'))
+
+        response.setResult(b'bytes')
+        assert_that(response.consumeBody(), is_(b'bytes'))
+
+        response.setResult(None)
+        assert_that(response.consumeBody(), is_(b''))
+
+        consumed = []
+        def chunks():
+            for chunk in (u'a', b'b', u'c'):
+                consumed.append(chunk)
+                yield chunk
+        response.setResult(chunks())
+        # Nothing is read until the body is consumed
+        assert_that(consumed, is_([]))
+        assert_that(list(response.consumeBodyIter()), is_([b'a', b'b', b'c']))
+
+        assert_that(calling(response.setResult).with_args(42), raises(TypeError))
+
+    def test_redirect(self):
+        response = self.response
+        assert_that(response.redirect('other'), is_('http://example.com/folder/other'))
+        assert_that(response.getStatus(), is_(302))
+        assert_that(response.getHeader('Location'), is_('http://example.com/folder/other'))
+
+        response.redirect('http://example.com:80/abs', status=303)
+        assert_that(response.getStatus(), is_(303))
+
+        assert_that(calling(response.redirect).with_args('http://evil.com/'),
+                    raises(ValueError))
+        response.redirect('http://other.com/', trusted=True)
+        assert_that(response.getHeader('Location'), is_('http://other.com/'))
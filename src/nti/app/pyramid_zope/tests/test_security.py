@@ -8,22 +8,65 @@ __docformat__ = "restructuredtext en"
 # pylint: disable=W0212,R0904
 
 from hamcrest import assert_that
+from hamcrest import has_entries
+from hamcrest import calling
 from hamcrest import is_
+from hamcrest import none
+from hamcrest import raises
+from hamcrest import same_instance
 
 import unittest
 
+from zope import component
 from zope import interface
 
+from zope.authentication.interfaces import IFallbackUnauthenticatedPrincipal
+from zope.authentication.interfaces import IUnauthenticatedPrincipal
+
+from zope.publisher.interfaces.browser import IBrowserRequest
+
+from pyramid.request import Request
+
 from nti.testing.matchers import verifiably_provides
 
 from zope.security.interfaces import IParticipation
 from zope.security.interfaces import IPrincipal
 
+from zope.security import checkPermission
+from zope.security.checker import CheckerPublic
+from zope.security.checker import ProxyFactory
+from zope.security.interfaces import NoInteraction
 from zope.security.management import endInteraction
+from zope.security.management import getInteraction
+from zope.security.management import getSecurityPolicy
+from zope.security.management import setSecurityPolicy
+from zope.security.management import system_user
+from zope.security.simplepolicies import ParanoidSecurityPolicy
 from zope.security.management import newInteraction
 from zope.security.management import queryInteraction
 
+from zope.interface import implementedBy
+from zope.interface import providedBy
+
+from zope.security.interfaces import IInteraction
+from zope.security.interfaces import IInteractionManagement
+
+from zope.lifecycleevent import modified
+
+from zope.security.interfaces import IGroup
+
+from ..interfaces import IPrincipalCache
+from ..security import ContextVarInteractionManagement
+from ..security import PERMISSION_CACHE_KEYS
+from ..security import class_permission_key
+from ..security import PrincipalCache
+from ..security import _adapter_cache
+from ..security import filter_permitted
+from ..security import warm_up_security_adapters
+from ..security import contextvars
+from ..security import interaction_from_request
 from ..security import principal_from_interaction
+from ..security import principal_from_request
 
 from nti.testing.base import SharedConfiguringTestBase
 
@@ -86,3 +129,299 @@ class TestSecurityAdapters(SharedConfiguringTestBase):
             assert_that(p_from_i.username, is_(principal.username))
         finally:
             endInteraction()
+
+
+class TestRequestMemoization(SharedConfiguringTestBase):
+
+    set_up_packages = (__name__,)
+
+    def tearDown(self):
+        endInteraction()
+        super(TestRequestMemoization, self).tearDown()
+
+    def test_principal_from_request_memoized(self):
+        request = Request.blank('/')
+        bob = _Principal('bob')
+        participation = _Participation(bob)
+        newInteraction(participation)
+
+        assert_that(principal_from_request(request), is_(same_instance(bob)))
+        # Within the same interaction, it's remembered
+        participation.principal = _Principal('alice')
+        assert_that(principal_from_request(request), is_(same_instance(bob)))
+        assert_that(IPrincipal(request), is_(same_instance(bob)))
+
+        # Ending the interaction is noticed
+        endInteraction()
+        assert_that(principal_from_request(request),
+                    is_(same_instance(component.getUtility(IFallbackUnauthenticatedPrincipal))))
+
+        # As is starting a new one
+        carol = _Principal('carol')
+        newInteraction(_Participation(carol))
+        assert_that(principal_from_request(request), is_(same_instance(carol)))
+
+    def test_adapters_remembered(self):
+        _adapter_cache.clear()
+        warm_up_security_adapters()
+        data = _adapter_cache.data()
+        request = Request.blank('/')
+        assert_that(data, has_entries({
+            (IInteraction, providedBy(request)): interaction_from_request,
+            (IPrincipal, implementedBy(getSecurityPolicy())): principal_from_interaction,
+        }))
+
+        bob = _Principal('bob')
+        newInteraction(_Participation(bob))
+        assert_that(principal_from_request(request), is_(same_instance(bob)))
+
+        # A more specific adapter registered later is used
+        class IMarked(interface.Interface):
+            pass
+        marked = Request.blank('/')
+        interface.alsoProvides(marked, IMarked)
+        alice = _Principal('alice')
+        gsm = component.getGlobalSiteManager()
+        gsm.registerAdapter(lambda request: ParanoidSecurityPolicy(_Participation(alice)),
+                            (IMarked,), IInteraction)
+        try:
+            assert_that(principal_from_request(Request.blank('/')), is_(same_instance(bob)))
+            assert_that(principal_from_request(marked), is_(same_instance(alice)))
+        finally:
+            gsm.unregisterAdapter(required=(IMarked,), provided=IInteraction)
+
+    def test_proxy_principal_and_interaction(self):
+        request = Request.blank('/')
+        zrequest = IBrowserRequest(request)
+        assert_that(zrequest.interaction, is_(none()))
+        assert_that(zrequest.principal,
+                    is_(same_instance(component.queryUtility(IUnauthenticatedPrincipal))))
+
+        bob = _Principal('bob')
+        newInteraction(_Participation(bob))
+        interaction = queryInteraction()
+        assert_that(zrequest.interaction, is_(same_instance(interaction)))
+        assert_that(zrequest.principal, is_(same_instance(bob)))
+
+        endInteraction()
+        assert_that(zrequest.interaction, is_(none()))
+
+
+@unittest.skipIf(contextvars is None, "Requires contextvars")
+class TestContextVarInteractionManagement(SharedConfiguringTestBase):
+
+    set_up_packages = (
+        'nti.app.pyramid_zope',
+        ('contextvars.zcml', 'nti.app.pyramid_zope'),
+    )
+
+    def test_registered(self):
+        request = Request.blank('/')
+        mgmt = IInteractionManagement(request)
+        assert_that(mgmt, verifiably_provides(IInteractionManagement))
+        assert_that(mgmt, is_(ContextVarInteractionManagement))
+
+    def test_interleaved_requests(self):
+        # Run many requests in one thread, switching between them
+        # at every step, the way an event loop switches between tasks
+        # (each of which has its own context).
+        count = 300
+        requests = [Request.blank('/') for _ in range(count)]
+        contexts = [contextvars.copy_context() for _ in range(count)]
+        principals = [_Principal(str(i)) for i in range(count)]
+
+        def begin(request, principal):
+            IInteractionManagement(request).newInteraction(_Participation(principal))
+
+        def check(request):
+            return IPrincipal(request), IBrowserRequest(request).principal
+
+        def end(request):
+            mgmt = IInteractionManagement(request)
+            mgmt.endInteraction()
+            return mgmt.queryInteraction()
+
+        for context, request, principal in zip(contexts, requests, principals):
+            context.run(begin, request, principal)
+            # The thread-local interaction is untouched
+            assert_that(queryInteraction(), is_(none()))
+
+        for _ in range(3):
+            for context, request, principal in zip(contexts, requests, principals):
+                found, proxy_found = context.run(check, request)
+                assert_that(found, is_(same_instance(principal)))
+                assert_that(proxy_found, is_(same_instance(principal)))
+
+        for context, request in zip(contexts, requests):
+            assert_that(context.run(end, request), is_(none()))
+
+    def test_existing_and_restore(self):
+        from zope.security.management import ExistingInteraction
+        from zope.security.interfaces import NoInteraction
+        mgmt = ContextVarInteractionManagement()
+
+        def run():
+            assert_that(calling(mgmt.getInteraction), raises(NoInteraction))
+            mgmt.newInteraction()
+            interaction = mgmt.getInteraction()
+            assert_that(calling(mgmt.newInteraction), raises(ExistingInteraction))
+            mgmt.endInteraction()
+            assert_that(mgmt.queryInteraction(), is_(none()))
+            mgmt.restoreInteraction()
+            assert_that(mgmt.queryInteraction(), is_(same_instance(interaction)))
+            mgmt.endInteraction()
+
+        contextvars.copy_context().run(run)
+
+
+@interface.implementer(IPrincipal)
+class _IdPrincipal(object):
+
+    def __init__(self, id):
+        self.id = id
+
+
+class TestPrincipalCache(SharedConfiguringTestBase):
+
+    set_up_packages = ('nti.app.pyramid_zope',)
+
+    def setUp(self):
+        super(TestPrincipalCache, self).setUp()
+        self.cache = PrincipalCache(maxsize=10, ttl=60)
+        component.provideUtility(self.cache, IPrincipalCache)
+
+    def tearDown(self):
+        component.getGlobalSiteManager().unregisterUtility(self.cache, IPrincipalCache)
+        super(TestPrincipalCache, self).tearDown()
+
+    def test_provides(self):
+        assert_that(self.cache, verifiably_provides(IPrincipalCache))
+
+    def test_invalidated_by_events(self):
+        bob = _IdPrincipal('bob')
+        self.cache.set('bob', bob)
+        self.cache.set('alice', _IdPrincipal('alice'))
+
+        modified(bob)
+        assert_that(self.cache.get('bob'), is_(none()))
+        assert_that(self.cache.get('alice'), is_(_IdPrincipal))
+
+        # Modifying a group removes everyone
+        group = _IdPrincipal('group')
+        interface.alsoProvides(group, IGroup)
+        modified(group)
+        assert_that(self.cache.get('alice'), is_(none()))
+
+        assert_that(self.cache.stats(),
+                    has_entries(hits=1, misses=2, invalidations=2, size=0))
+        self.cache.clear()
+        assert_that(self.cache.stats(), has_entries(invalidations=0))
+
+
+class _CountingParanoidPolicy(ParanoidSecurityPolicy):
+    checks = 0
+
+    def checkPermission(self, permission, object):
+        type(self).checks += 1
+        return super(_CountingParanoidPolicy, self).checkPermission(permission, object)
+
+
+class _AttributePolicy(ParanoidSecurityPolicy):
+    checks = 0
+
+    def checkPermission(self, permission, object):
+        type(self).checks += 1
+        return getattr(object, 'allowed', False)
+
+
+class _Thing(object):
+    allowed = True
+
+
+class _OtherThing(object):
+    allowed = False
+
+
+class TestFilterPermitted(SharedConfiguringTestBase):
+
+    set_up_packages = ('nti.app.pyramid_zope',)
+
+    def setUp(self):
+        super(TestFilterPermitted, self).setUp()
+        self.old_policy = getSecurityPolicy()
+        self.request = Request.blank('/')
+        self.objects = [_Thing(), _OtherThing(), _Thing(), ProxyFactory(_OtherThing())]
+
+    def tearDown(self):
+        endInteraction()
+        setSecurityPolicy(self.old_policy)
+        PERMISSION_CACHE_KEYS.pop(_CountingParanoidPolicy, None)
+        PERMISSION_CACHE_KEYS.pop(_AttributePolicy, None)
+        super(TestFilterPermitted, self).tearDown()
+
+    def _per_object(self, permission):
+        return [o for o in self.objects if checkPermission(permission, o)]
+
+    def test_no_interaction(self):
+        assert_that(calling(filter_permitted).with_args('zope.View', self.objects, self.request),
+                    raises(NoInteraction))
+        # Public is always allowed
+        assert_that(filter_permitted(CheckerPublic, self.objects, self.request),
+                    is_(self.objects))
+
+    def test_object_independent_policy_cached(self):
+        setSecurityPolicy(_CountingParanoidPolicy)
+        PERMISSION_CACHE_KEYS[_CountingParanoidPolicy] = class_permission_key
+        _CountingParanoidPolicy.checks = 0
+
+        newInteraction(_Participation(_Principal('bob')))
+        assert_that(filter_permitted('zope.View', self.objects, self.request),
+                    is_(self._per_object('zope.View')))
+        assert_that(filter_permitted('zope.View', self.objects, self.request), is_([]))
+        # Once per class (the proxy reports the class of its object)
+        assert_that(_CountingParanoidPolicy.checks, is_(2 + len(self.objects)))
+        endInteraction()
+
+        # A new interaction gets new answers
+        newInteraction(_Participation(system_user))
+        assert_that(filter_permitted('zope.View', self.objects, self.request),
+                    is_(self.objects))
+        assert_that(filter_permitted('zope.View', self.objects, self.request),
+                    is_(self._per_object('zope.View')))
+
+    def test_object_dependent_policy(self):
+        setSecurityPolicy(_AttributePolicy)
+        newInteraction(_Participation(_Principal('bob')))
+        permitted = filter_permitted('zope.View', iter(self.objects), self.request)
+        assert_that(permitted, is_(self._per_object('zope.View')))
+        assert_that(permitted, is_([self.objects[0], self.objects[2]]))
+
+    def test_object_dependent_policy_not_cached(self):
+        setSecurityPolicy(_AttributePolicy)
+        _AttributePolicy.checks = 0
+        newInteraction(_Participation(_Principal('bob')))
+        filter_permitted('zope.View', self.objects, self.request)
+        filter_permitted('zope.View', self.objects, self.request)
+        assert_that(_AttributePolicy.checks, is_(2 * len(self.objects)))
+
+    def test_policy_opts_in_with_key(self):
+        # This policy answers by class, so it can use the class key.
+        setSecurityPolicy(_AttributePolicy)
+        PERMISSION_CACHE_KEYS[_AttributePolicy] = class_permission_key
+        _AttributePolicy.checks = 0
+        newInteraction(_Participation(_Principal('bob')))
+        for _ in range(2):
+            assert_that(filter_permitted('zope.View', self.objects, self.request),
+                        is_([self.objects[0], self.objects[2]]))
+        assert_that(_AttributePolicy.checks, is_(2))
+
+        # Answers are remembered for each principal
+        interaction = getInteraction()
+        interaction.add(_Participation(_Principal('alice')))
+        filter_permitted('zope.View', self.objects, self.request)
+        assert_that(_AttributePolicy.checks, is_(4))
+
+        # A key of None checks the object every time
+        PERMISSION_CACHE_KEYS[_AttributePolicy] = lambda *args: None
+        filter_permitted('zope.View', self.objects, self.request)
+        assert_that(_AttributePolicy.checks, is_(4 + len(self.objects)))
@@ -9,16 +9,62 @@ import unittest
 
 from zope import interface
 from zope.traversing import interfaces as trv_interfaces
+from zope.traversing.adapters import DefaultTraversable
 
 from pyramid.testing import DummyRequest
 
 from hamcrest import assert_that
 from hamcrest import has_entries
 from hamcrest import is_
+from hamcrest import none
+
+from zope import component
+from zope.component import eventtesting
+from zope.interface import implementedBy
+from zope.interface import providedBy
+
+from pyramid.interfaces import IRequest
 
 from . import ConfiguringLayer
+from . import Folder
+from . import traverse
 from .. import traversal
 
+
+class IFolder(interface.Interface):
+    pass
+
+
+@interface.implementer(IFolder)
+class AdaptedFolder(dict):
+    pass
+
+
+class Plain(dict):
+    pass
+
+
+@interface.implementer(trv_interfaces.ITraversable)
+class FolderTraversable(object):
+    created = 0
+
+    def __init__(self, context, request):
+        FolderTraversable.created += 1
+        self.context = context
+
+    def traverse(self, name, furtherPath): # pylint:disable=unused-argument
+        return self.context[name]
+
+
+class OneArgTraversable(object):
+    called = 0
+
+    def __new__(cls, *args):
+        cls.called += 1
+        if len(args) != 1:
+            raise TypeError()
+        return DefaultTraversable(*args)
+
 class TestTraversal(unittest.TestCase):
 
     def test_unicode_traversal(self):
@@ -58,6 +104,317 @@ class TestTraversal(unittest.TestCase):
             root=is_(Root),
         ))
 
+class TestTraversableCache(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.registerAdapter(FolderTraversable, (IFolder, IRequest), trv_interfaces.ITraversable)
+        gsm.registerAdapter(OneArgTraversable, (implementedBy(Plain), interface.Interface),
+                            trv_interfaces.ITraversable)
+        gsm.registerAdapter(OneArgTraversable, (implementedBy(Plain),),
+                            trv_interfaces.ITraversable)
+        FolderTraversable.created = OneArgTraversable.called = 0
+
+    def tearDown(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.unregisterAdapter(FolderTraversable, (IFolder, IRequest), trv_interfaces.ITraversable)
+        gsm.unregisterAdapter(OneArgTraversable, (implementedBy(Plain), interface.Interface),
+                              trv_interfaces.ITraversable)
+        gsm.unregisterAdapter(OneArgTraversable, (implementedBy(Plain),),
+                              trv_interfaces.ITraversable)
+
+    def test_factories_remembered(self):
+        leaf = AdaptedFolder()
+        root = AdaptedFolder(a=AdaptedFolder(b=leaf))
+        req = DummyRequest()
+        result = traverse(root, 'a', 'b', request=req)
+        assert_that(result, has_entries(context=is_(leaf)))
+        assert_that(FolderTraversable.created, is_(2))
+        assert_that(traversal._traversable_cache.data(),
+                    has_entries({(implementedBy(AdaptedFolder), providedBy(req)): FolderTraversable}))
+
+        # Registering something new is noticed
+        class Specific(FolderTraversable):
+            pass
+        gsm = component.getGlobalSiteManager()
+        gsm.registerAdapter(Specific, (implementedBy(AdaptedFolder), IRequest),
+                            trv_interfaces.ITraversable)
+        try:
+            result = traverse(root, 'a', 'b')
+            assert_that(result, has_entries(context=is_(leaf)))
+            assert_that(traversal._traversable_cache.data(),
+                        has_entries({(implementedBy(AdaptedFolder), providedBy(req)): Specific}))
+        finally:
+            gsm.unregisterAdapter(Specific, (implementedBy(AdaptedFolder), IRequest),
+                                  trv_interfaces.ITraversable)
+
+    def test_type_error_remembered(self):
+        leaf = Plain()
+        root = Plain(a=Plain(b=leaf))
+        req = DummyRequest()
+        result = traverse(root, 'a', 'b', request=req)
+        # It was used as a single adapter instead
+        assert_that(result, has_entries(context=is_(leaf)))
+        # but only tried once as a multi-adapter
+        assert_that(OneArgTraversable.called, is_(3))
+        assert_that(traversal._traversable_cache.data()[
+            (implementedBy(Plain), providedBy(req))], is_(none()))
+
+
+class _SkippingTraverser(traversal.ZopeResourceTreeTraverser):
+    skip_unobserved_traverse_events = True
+
+
+class TestSkipUnobservedTraverseEvents(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.seen = []
+        gsm = component.getGlobalSiteManager()
+        gsm.registerAdapter(FolderTraversable, (IFolder, IRequest), trv_interfaces.ITraversable)
+        gsm.registerAdapter(DefaultTraversable, (interface.Interface,), trv_interfaces.ITraversable)
+        gsm.registerHandler(self._handler, (IFolder, trv_interfaces.IBeforeTraverseEvent))
+        # The layer records all events; that would see everything.
+        gsm.unregisterHandler(eventtesting.events.append, (None,))
+
+    def tearDown(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.registerHandler(eventtesting.events.append, (None,))
+        gsm.unregisterAdapter(FolderTraversable, (IFolder, IRequest), trv_interfaces.ITraversable)
+        gsm.unregisterAdapter(DefaultTraversable, (interface.Interface,),
+                              trv_interfaces.ITraversable)
+        gsm.unregisterHandler(self._handler, (IFolder, trv_interfaces.IBeforeTraverseEvent))
+
+    def _handler(self, ob, event):
+        self.seen.append(ob)
+
+    def test_same_events_seen(self):
+        c = AdaptedFolder()
+        b = Plain(c=c)
+        a = AdaptedFolder(b=b)
+        root = Plain(a=a)
+
+        result = traverse(root, 'a', 'b', 'c', traverser=_SkippingTraverser)
+        assert_that(result, has_entries(context=is_(c)))
+        assert_that(self.seen, is_([a, c]))
+        assert_that(traversal._before_traverse_event_observed(b), is_(False))
+
+        del self.seen[:]
+        traverse(root, 'a', 'b', 'c')
+        assert_that(self.seen, is_([a, c]))
+
+    def test_other_subscribers_see_everything(self):
+        import zope.event
+        events = []
+        zope.event.subscribers.append(events.append)
+        try:
+            root = Plain(a=Plain(b=Plain(c=Plain())))
+            traverse(root, 'a', 'b', 'c', traverser=_SkippingTraverser)
+        finally:
+            zope.event.subscribers.remove(events.append)
+        assert_that(len(events), is_(4))
+
+
+class PathTraversable(Folder):
+    """
+    Traverses the way its ``actions`` say: ``consume`` takes the next
+    segment as well, ``rewrite`` replaces the rest of the path.
+    """
+
+    def __init__(self, actions=None, **kwargs):
+        Folder.__init__(self, **kwargs)
+        self.actions = actions or {}
+
+    def traverse(self, name, furtherPath):
+        action = self.actions.get(name)
+        if action == 'consume':
+            name = name + '/' + furtherPath.pop(0)
+        elif action == 'rewrite':
+            furtherPath[:] = ['x', 'y']
+        return Folder.traverse(self, name, furtherPath)
+
+
+class TestTraversalPath(unittest.TestCase):
+
+    def test_plain(self):
+        leaf = PathTraversable()
+        root = PathTraversable(a=PathTraversable(b=leaf))
+        assert_that(traverse(root, 'a', 'b'),
+                    has_entries(context=leaf, traversed=['a', 'b'], subpath=()))
+
+    def test_consume_remaining(self):
+        leaf = PathTraversable()
+        b = PathTraversable({'b': 'consume'}, **{'b/c': PathTraversable(d=leaf)})
+        root = PathTraversable(a=b)
+        assert_that(traverse(root, 'a', 'b', 'c', 'd'),
+                    has_entries(context=leaf, traversed=['a', 'b', 'd']))
+
+    def test_rewrite_remaining(self):
+        y = PathTraversable()
+        root = PathTraversable({'a': 'rewrite'},
+                               a=PathTraversable(x=PathTraversable(y=y)))
+        assert_that(traverse(root, 'a', 'b', 'c', 'd', 'e'),
+                    has_entries(context=y, traversed=['a', 'x', 'y']))
+
+    def test_not_found(self):
+        a = PathTraversable()
+        root = PathTraversable(a=a)
+        assert_that(traverse(root, 'a', 'missing', 'c', 'd'),
+                    has_entries(context=a,
+                                view_name='missing',
+                                traversed=['a'],
+                                subpath=['c', 'd']))
+
+    def test_view_selector(self):
+        a = PathTraversable()
+        root = PathTraversable(a=a)
+        assert_that(traverse(root, 'a', '@@view', 'c'),
+                    has_entries(context=a,
+                                view_name='view',
+                                traversed=['a'],
+                                subpath=['c']))
+
+
+class TestRemainingPath(unittest.TestCase):
+
+    def test_list_operations(self):
+        segments = ['t', 'a', 'b', 'c']
+        path = traversal._RemainingPath(segments, 1)
+        assert_that(path, is_(['a', 'b', 'c']))
+        assert_that(len(path), is_(3))
+        assert_that(path[0], is_('a'))
+        assert_that(path[-1], is_('c'))
+        assert_that(path[1:], is_(['b', 'c']))
+        assert_that(path.changed, is_(False))
+
+        path.start = 2
+        assert_that(path.pop(0), is_('b'))
+        path.insert(0, 'x')
+        path.append('y')
+        assert_that(list(path), is_(['x', 'c', 'y']))
+        assert_that(segments, is_(['t', 'a', 'x', 'c', 'y']))
+        assert_that(path.changed, is_(True))
+
+        path[1] = 'z'
+        path[:1] = ['p', 'q']
+        assert_that(path, is_(['p', 'q', 'z', 'y']))
+        del path[0]
+        del path[1:]
+        assert_that(path, is_(['q']))
+        assert_that(path != ['q'], is_(False))
+        assert_that(segments, is_(['t', 'a', 'q']))
+
+        self.assertRaises(IndexError, path.__getitem__, 1)
+        path[:] = []
+        assert_that(path, is_([]))
+        assert_that(path, is_(traversal._RemainingPath([])))
+        assert_that(segments, is_(['t', 'a']))
+
+
+class CountingTraversable(PathTraversable):
+    traversals = 0
+
+    def traverse(self, name, furtherPath):
+        CountingTraversable.traversals += 1
+        return PathTraversable.traverse(self, name, furtherPath)
+
+
+class TestTraversePaths(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        CountingTraversable.traversals = 0
+        self.c = CountingTraversable(x=CountingTraversable(), y=CountingTraversable())
+        self.b = CountingTraversable({'rw': 'rewrite'}, c=self.c, rw=self.c)
+        self.root = CountingTraversable(a=CountingTraversable(b=self.b))
+
+    def test_same_as_one_at_a_time(self):
+        paths = [
+            '/a/b/c/x',
+            ('a', 'b', 'c', 'y'),
+            'a/b/c',
+            '/a/b/missing/z',
+            '/a/b/c/@@view',
+            '/a/b/rw/q',
+            '/',
+            (),
+        ]
+        events = eventtesting.getEvents(trv_interfaces.IBeforeTraverseEvent)
+        del events[:]
+        results = traversal.traverse_paths(self.root, paths, DummyRequest())
+        batched_events = [e.object for e in events]
+        assert_that(CountingTraversable.traversals, is_(9))
+
+        del events[:]
+        expected = []
+        for path in paths:
+            if not isinstance(path, tuple):
+                path = tuple(p for p in path.split('/') if p)
+            expected.append(traverse(self.root, *path))
+        assert_that(CountingTraversable.traversals, is_(9 + 22))
+        assert_that(results, is_(expected))
+        # The same objects are notified for
+        assert_that(batched_events, is_([e.object for e in events]))
+        assert_that(results[0], has_entries(context=self.c['x'], traversed=['a', 'b', 'c', 'x']))
+        assert_that(results[-1], has_entries(context=self.root, traversed=()))
+
+
+class NamespaceTraversable(object):
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    def traverse(self, name, furtherPath): # pylint:disable=unused-argument
+        return (type(self).__name__, self.context, name)
+
+
+class OtherNamespaceTraversable(NamespaceTraversable):
+    pass
+
+
+class TestNamespaceDispatch(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.gsm = component.getGlobalSiteManager()
+        self.gsm.registerAdapter(NamespaceTraversable, (IFolder, IRequest),
+                                 trv_interfaces.ITraversable, 'test')
+
+    def tearDown(self):
+        self.gsm.unregisterAdapter(NamespaceTraversable, (IFolder, IRequest),
+                                   trv_interfaces.ITraversable, 'test')
+        self.gsm.unregisterAdapter(OtherNamespaceTraversable, (IFolder, IRequest),
+                                   trv_interfaces.ITraversable, 'test')
+
+    def test_namespace(self):
+        root = AdaptedFolder()
+        result = traverse(root, '++test++x')
+        assert_that(result, has_entries(context=('NamespaceTraversable', root, 'x'),
+                                        traversed=['++test++x']))
+        assert_that(traversal._ns_parse_cache, has_entries({'++test++x': ('test', 'x')}))
+        assert_that(traverse(root, '++test++y'),
+                    has_entries(context=('NamespaceTraversable', root, 'y')))
+
+        # Changing the registry is noticed
+        self.gsm.registerAdapter(OtherNamespaceTraversable, (IFolder, IRequest),
+                                 trv_interfaces.ITraversable, 'test')
+        assert_that(traverse(root, '++test++x'),
+                    has_entries(context=('OtherNamespaceTraversable', root, 'x')))
+
+    def test_missing_namespace(self):
+        root = Plain()
+        assert_that(traverse(root, '++test++x', 'y'),
+                    has_entries(context=root,
+                                view_name='++test++x',
+                                subpath=['y']))
+
+
 class TestConfiguration(unittest.TestCase):
 
     layer = ConfiguringLayer
@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for traversal_cache.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+import transaction
+
+from hamcrest import assert_that
+from hamcrest import contains_exactly
+from hamcrest import has_entries
+from hamcrest import has_item
+from hamcrest import has_items
+from hamcrest import has_length
+from hamcrest import is_
+from hamcrest import is_not
+from hamcrest import none
+
+from nti.testing.matchers import verifiably_provides
+
+from persistent.mapping import PersistentMapping
+
+from pyramid.testing import DummyRequest
+
+from zope import component
+from zope import interface
+
+from zope.event import notify
+
+from zope.lifecycleevent import ObjectAddedEvent
+from zope.lifecycleevent import ObjectRemovedEvent
+
+from zope.location.interfaces import LocationError
+
+from zope.traversing.interfaces import IBeforeTraverseEvent
+from zope.traversing.interfaces import ITraversable
+
+from ZODB.DB import DB
+from ZODB.MappingStorage import MappingStorage
+
+from ..interfaces import ITraversalNotFoundCache
+from ..interfaces import ITraversalPrefetcher
+from ..interfaces import ITraversalPrefixCache
+from ..traversal_cache import TraversalNotFoundCache
+from ..traversal_cache import TraversalPrefetcher
+from ..traversal_cache import TraversalPrefixCache
+
+from . import ConfiguringLayer
+from . import Folder
+from . import traverse
+
+
+class CountingFolder(Folder):
+
+    traversals = 0
+    rewrite = False
+
+    def traverse(self, name, furtherPath):
+        CountingFolder.traversals += 1
+        if self.rewrite:
+            furtherPath[:] = ['rewritten']
+        return Folder.traverse(self, name, furtherPath)
+
+
+class TestTraversalPrefixCache(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.generation = 0
+        self.cache = TraversalPrefixCache(generation=lambda root: self.generation)
+        component.provideUtility(self.cache, ITraversalPrefixCache)
+        self.events = []
+        component.provideHandler(self._handler, (IBeforeTraverseEvent,))
+        CountingFolder.traversals = 0
+
+        self.d = CountingFolder()
+        self.c = CountingFolder(d=self.d)
+        self.b = CountingFolder(c=self.c)
+        self.a = CountingFolder(b=self.b)
+        self.root = CountingFolder(a=self.a)
+
+    def tearDown(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.unregisterUtility(self.cache, ITraversalPrefixCache)
+        gsm.unregisterHandler(self._handler, (IBeforeTraverseEvent,))
+
+    def _handler(self, event):
+        self.events.append(event.object)
+
+    def test_provides(self):
+        assert_that(self.cache, verifiably_provides(ITraversalPrefixCache))
+
+    def test_registration_changes_noticed(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.unregisterUtility(self.cache, ITraversalPrefixCache)
+        traverse(self.root, 'a', 'b')
+        traverse(self.root, 'a', 'b')
+        assert_that(CountingFolder.traversals, is_(4))
+
+        gsm.registerUtility(self.cache, ITraversalPrefixCache)
+        traverse(self.root, 'a', 'b')
+        traverse(self.root, 'a', 'b')
+        assert_that(CountingFolder.traversals, is_(6))
+
+    def test_resumes_from_longest_prefix(self):
+        first = traverse(self.root, 'a', 'b', 'c')
+        assert_that(CountingFolder.traversals, is_(3))
+        first_events = list(self.events)
+        assert_that(first_events, is_([self.root, self.a, self.b, self.c]))
+
+        del self.events[:]
+        second = traverse(self.root, 'a', 'b', 'c')
+        assert_that(second, is_(first))
+        assert_that(CountingFolder.traversals, is_(3))
+        # The same events are fired
+        assert_that(self.events, is_(first_events))
+
+        # A longer path resumes from the prefix
+        del self.events[:]
+        result = traverse(self.root, 'a', 'b', 'c', 'd')
+        assert_that(result, has_entries(context=self.d, traversed=['a', 'b', 'c', 'd']))
+        assert_that(CountingFolder.traversals, is_(4))
+        assert_that(self.events, is_([self.root, self.a, self.b, self.c, self.d]))
+
+        # As does one that isn't found
+        result = traverse(self.root, 'a', 'b', 'missing', 'x')
+        assert_that(result, has_entries(context=self.b,
+                                        view_name='missing',
+                                        traversed=['a', 'b'],
+                                        subpath=['x']))
+        assert_that(CountingFolder.traversals, is_(5))
+        assert_that(self.cache.stats(), has_entries(hits=3, misses=1))
+
+    def test_stores_longest_prefix_once(self):
+        stored = []
+        store = self.cache.store
+        self.cache.store = lambda root, path, objects, request: (
+            stored.append(list(path)), store(root, path, objects, request))
+
+        traverse(self.root, 'a', 'b', 'c', 'd')
+        assert_that(stored, is_([['a', 'b', 'c', 'd']]))
+        # Nothing new to store
+        traverse(self.root, 'a', 'b')
+        assert_that(stored, has_length(1))
+
+        # The shorter prefixes are found, so siblings resume from them.
+        self.b['e'] = CountingFolder()
+        del self.events[:]
+        result = traverse(self.root, 'a', 'b', 'e')
+        assert_that(result, has_entries(context=self.b['e']))
+        assert_that(CountingFolder.traversals, is_(5))
+        assert_that(self.events, is_([self.root, self.a, self.b, self.b['e']]))
+        assert_that(stored[-1], is_(['a', 'b', 'e']))
+        # Each segment is one entry
+        assert_that(self.cache.stats(), has_entries(size=5))
+
+    def test_invalidation(self):
+        traverse(self.root, 'a', 'b')
+        self.generation += 1
+        traverse(self.root, 'a', 'b')
+        assert_that(CountingFolder.traversals, is_(4))
+
+        notify(ObjectAddedEvent(CountingFolder(), self.a, 'new'))
+        traverse(self.root, 'a', 'b')
+        assert_that(CountingFolder.traversals, is_(6))
+
+        # Each root has its own
+        other = CountingFolder(a=CountingFolder(b=CountingFolder()))
+        result = traverse(other, 'a', 'b')
+        assert_that(result, has_entries(context=other['a']['b']))
+        assert_that(CountingFolder.traversals, is_(8))
+
+    def test_entries_expire(self):
+        now = [0]
+        cache = TraversalPrefixCache(clock=lambda: now[0])
+        request = DummyRequest()
+        cache.store(self.root, ['a', 'b'], [self.root, self.a, self.b], request)
+
+        now[0] = 29
+        assert_that(cache.lookup(self.root, ['a', 'b'], request),
+                    is_([self.root, self.a, self.b]))
+        now[0] = 30
+        assert_that(cache.lookup(self.root, ['a', 'b'], request), is_(none()))
+
+        cache = TraversalPrefixCache(ttl=None, clock=lambda: now[0])
+        cache.store(self.root, ['a'], [self.root, self.a], request)
+        now[0] = 1000
+        assert_that(cache.lookup(self.root, ['a'], request), is_([self.root, self.a]))
+
+    def test_rewritten_path_not_cached(self):
+        self.a.rewrite = True
+        self.b['rewritten'] = self.d
+        assert_that(traverse(self.root, 'a', 'b', 'c'), has_entries(context=self.d))
+        # Resuming from 'a/b' would skip the rewriting
+        assert_that(self.cache.lookup(self.root, ['a', 'b', 'c'], DummyRequest()),
+                    contains_exactly(self.root, self.a))
+        assert_that(traverse(self.root, 'a', 'b', 'c'), has_entries(context=self.d))
+        assert_that(self.cache.lookup(self.root, ['x'], DummyRequest()), is_(none()))
+
+
+class TestTraversalNotFoundCache(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.now = 0
+        self.cache = TraversalNotFoundCache(maxsize=2, ttl=30, clock=lambda: self.now)
+        component.provideUtility(self.cache, ITraversalNotFoundCache)
+        CountingFolder.traversals = 0
+        self.a = CountingFolder()
+        self.root = CountingFolder(a=self.a)
+
+    def tearDown(self):
+        component.getGlobalSiteManager().unregisterUtility(self.cache,
+                                                           ITraversalNotFoundCache)
+
+    def test_provides(self):
+        assert_that(self.cache, verifiably_provides(ITraversalNotFoundCache))
+
+    def test_registration_changes_noticed(self):
+        gsm = component.getGlobalSiteManager()
+        gsm.unregisterUtility(self.cache, ITraversalNotFoundCache)
+        traverse(self.root, 'a', 'missing')
+        assert_that(self.cache.stats(), has_entries(size=0))
+
+        gsm.registerUtility(self.cache, ITraversalNotFoundCache)
+        traverse(self.root, 'a', 'missing')
+        assert_that(self.cache.stats(), has_entries(size=1))
+
+    def test_repeated_miss_short_circuits(self):
+        first = traverse(self.root, 'a', 'wp-login.php', 'x')
+        assert_that(first, has_entries(context=self.a,
+                                       view_name='wp-login.php',
+                                       traversed=['a'],
+                                       subpath=['x']))
+        assert_that(CountingFolder.traversals, is_(2))
+        # Segments that were traversed aren't counted
+        assert_that(self.cache.stats(), has_entries(size=1, hits=0, misses=0))
+
+        second = traverse(self.root, 'a', 'wp-login.php', 'x')
+        assert_that(second, is_(first))
+        assert_that(CountingFolder.traversals, is_(3))
+        assert_that(self.cache.stats(), has_entries(size=1, hits=1, misses=0))
+
+        # Until it expires
+        self.now += 31
+        assert_that(traverse(self.root, 'a', 'wp-login.php', 'x'), is_(first))
+        assert_that(CountingFolder.traversals, is_(5))
+        assert_that(self.cache.stats(), has_entries(expirations=1))
+
+    def test_flushed_when_content_added(self):
+        traverse(self.root, 'a', 'new')
+        assert_that(self.cache.is_missing(self.a, 'new', DummyRequest()), is_(True))
+
+        new = self.a['new'] = CountingFolder()
+        notify(ObjectAddedEvent(new, self.a, 'new'))
+        assert_that(self.cache.stats(), has_entries(size=0))
+        assert_that(traverse(self.root, 'a', 'new'), has_entries(context=new))
+
+        # Removal doesn't flush it
+        traverse(self.root, 'a', 'gone')
+        notify(ObjectRemovedEvent(new, self.a, 'new'))
+        assert_that(self.cache.stats(), has_entries(size=1))
+
+    def test_rewritten_path_not_cached(self):
+        self.a.rewrite = True
+        traverse(self.root, 'a', 'missing', 'x')
+        assert_that(self.cache.stats(), has_entries(size=0))
+
+
+@interface.implementer(ITraversable)
+class PersistentFolder(PersistentMapping):
+
+    def traverse(self, name, furtherPath): # pylint:disable=unused-argument
+        try:
+            return self[name]
+        except KeyError:
+            raise LocationError(self, name)
+
+
+class CountingStorage(MappingStorage):
+    """
+    Counts the objects loaded one at a time. Prefetched objects are
+    then loaded without being counted, as if they had all come in one
+    round trip.
+    """
+
+    def __init__(self):
+        MappingStorage.__init__(self)
+        self.loads = []
+        self.prefetches = []
+        self.prefetched = {}
+
+    def loadBefore(self, oid, tid):
+        try:
+            return self.prefetched.pop((oid, tid))
+        except KeyError:
+            pass
+        self.loads.append(oid)
+        return MappingStorage.loadBefore(self, oid, tid)
+
+    def prefetch(self, oids, tid):
+        oids = list(oids)
+        self.prefetches.append(oids)
+        for oid in oids:
+            self.prefetched[(oid, tid)] = MappingStorage.loadBefore(self, oid, tid)
+
+
+class TestTraversalPrefetcher(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.prefetcher = TraversalPrefetcher()
+        component.provideUtility(self.prefetcher, ITraversalPrefetcher)
+        self.storage = CountingStorage()
+        self.db = DB(self.storage)
+        conn = self.db.open()
+        root = conn.root()['app'] = PersistentFolder()
+        root['a'] = PersistentFolder()
+        root['a']['b'] = PersistentFolder()
+        root['a']['b']['c'] = PersistentFolder()
+        transaction.commit()
+        self.oids = [root['a']._p_oid, root['a']['b']._p_oid, root['a']['b']['c']._p_oid]
+        conn.close()
+
+    def tearDown(self):
+        transaction.abort()
+        self.db.close()
+        component.getGlobalSiteManager().unregisterUtility(self.prefetcher,
+                                                           ITraversalPrefetcher)
+
+    def _traverse(self, *path, **kwargs):
+        conn = self.db.open()
+        try:
+            if kwargs.get('minimize', True):
+                conn.cacheMinimize()
+            del self.storage.loads[:]
+            return traverse(conn.root()['app'], *path)
+        finally:
+            conn.close()
+
+    def test_provides(self):
+        assert_that(self.prefetcher, verifiably_provides(ITraversalPrefetcher))
+
+    def test_prefetches_known_path(self):
+        self._traverse('a', 'b', 'c')
+        assert_that(self.storage.prefetches, is_([]))
+        assert_that(self.storage.loads, has_items(*self.oids))
+
+        self._traverse('a', 'b', 'c', 'missing')
+        assert_that(self.storage.prefetches, is_([self.oids]))
+        # They weren't loaded one at a time
+        for oid in self.oids:
+            assert_that(self.storage.loads, is_not(has_item(oid)))
+
+        # As far as is known
+        self._traverse('a', 'x')
+        assert_that(self.storage.prefetches[-1], is_(self.oids[:1]))
+        assert_that(self.prefetcher.stats(), has_entries(prefetches=2, prefetched=4))
+
+    def test_loaded_objects_not_prefetched(self):
+        self._traverse('a', 'b', 'c')
+        # Still loaded
+        self._traverse('a', 'b', 'c', minimize=False)
+        assert_that(self.storage.prefetches, is_([]))
+        assert_that(self.storage.loads, is_([]))
+
+        conn = self.db.open()
+        try:
+            conn.root()['app']['a']['b']['c']._p_deactivate()
+        finally:
+            conn.close()
+        self._traverse('a', 'b', 'c', minimize=False)
+        assert_that(self.storage.prefetches, is_([self.oids[2:]]))
+        assert_that(self.storage.loads, is_([]))
+
+    def test_not_persistent(self):
+        traverse(CountingFolder(a=CountingFolder()), 'a')
+        traverse(CountingFolder(a=CountingFolder()), 'a')
+        assert_that(self.prefetcher.stats(), has_entries(size=0, prefetches=0))
+
+
+class TestQueryTraversalUtilities(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def test_found_again_when_registrations_change(self):
+        from ..traversal import _query_traversal_utilities
+        assert_that(_query_traversal_utilities(), is_((None, None, None)))
+
+        gsm = component.getGlobalSiteManager()
+        prefetcher = TraversalPrefetcher()
+        cache = TraversalNotFoundCache()
+        gsm.registerUtility(prefetcher, ITraversalPrefetcher)
+        gsm.registerUtility(cache, ITraversalNotFoundCache)
+        try:
+            assert_that(_query_traversal_utilities(), is_((None, cache, prefetcher)))
+        finally:
+            gsm.unregisterUtility(prefetcher, ITraversalPrefetcher)
+            gsm.unregisterUtility(cache, ITraversalNotFoundCache)
+        assert_that(_query_traversal_utilities(), is_((None, None, None)))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for traversal_instrumentation.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import contains_exactly
+from hamcrest import contains_string
+from hamcrest import has_entries
+from hamcrest import has_properties
+from hamcrest import is_
+from hamcrest import none
+
+from pyramid.testing import DummyRequest
+
+from six import StringIO
+
+from ..traversal_instrumentation import InstrumentedResourceTreeTraverser
+from ..traversal_instrumentation import LatencyHistogram
+from ..traversal_instrumentation import TraversalHistograms
+from ..traversal_instrumentation import traversal_timings
+
+from . import ConfiguringLayer
+from . import Folder
+from . import traverse
+
+
+class Route(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TestInstrumentedResourceTreeTraverser(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.histograms = TraversalHistograms()
+
+        class Traverser(InstrumentedResourceTreeTraverser):
+            histograms = self.histograms
+
+        self.b = Folder()
+        self.a = Folder(b=self.b)
+        self.root = Folder(a=self.a)
+        self.Traverser = Traverser
+        self.traverser = Traverser(self.root)
+        self.request = DummyRequest()
+        self.request.matched_route = Route('folders')
+
+    def test_timings(self):
+        result = traverse(self.root, 'a', 'b',
+                          traverser=self.Traverser, request=self.request)
+        assert_that(result, has_entries(context=self.b))
+
+        timings = traversal_timings(self.request)
+        assert_that(timings, contains_exactly(
+            has_properties(segment='a', traversable=Folder),
+            has_properties(segment='b', traversable=Folder),
+            has_properties(segment=none(), traversable=none(), traverse_time=0.0),
+        ))
+        for timing in timings:
+            assert_that(timing.event_time, is_(float))
+            assert_that(repr(timing), contains_string('SegmentTiming'))
+
+        assert_that(traversal_timings(DummyRequest()), is_(none()))
+
+    def test_traverse_paths(self):
+        req = DummyRequest()
+        results = self.traverser.traverse_paths(req, ['/a/b', '/a/missing'])
+        assert_that(results, contains_exactly(has_entries(context=self.b),
+                                              has_entries(view_name='missing')))
+        assert_that(traversal_timings(req), contains_exactly(
+            has_properties(segment='a'),
+            has_properties(segment='b'),
+            has_properties(segment=none()),
+            # The prefix is resumed
+            has_properties(segment=none()),
+            has_properties(segment='missing'),
+        ))
+        assert_that(self.histograms.snapshot(), is_({}))
+
+    def test_histograms(self):
+        traverse(self.root, 'a', 'b', traverser=self.Traverser, request=self.request)
+        traverse(self.root, 'a', 'missing', traverser=self.Traverser, request=self.request)
+        snapshot = self.histograms.snapshot()
+        assert_that(snapshot, has_entries(folders=has_entries(
+            total=has_entries(count=2),
+            traverse=has_entries(count=2),
+            events=has_entries(count=2))))
+
+        out = StringIO()
+        self.histograms.dump(out)
+        assert_that(out.getvalue(), contains_string('Route folders'))
+        assert_that(out.getvalue(), contains_string('total    count=2'))
+
+        self.histograms.clear()
+        assert_that(self.histograms.snapshot(), is_({}))
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_buckets(self):
+        histogram = LatencyHistogram(bounds=(0.001, 0.01))
+        for seconds in (0.0005, 0.001, 0.005, 2):
+            histogram.add(seconds)
+        assert_that(histogram.snapshot(), has_entries(
+            count=4,
+            max=2,
+            buckets=[(0.001, 2), (0.01, 1), (None, 1)]))
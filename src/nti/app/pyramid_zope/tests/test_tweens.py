@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for tweens.py.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+# disable: accessing protected members, too many methods
+# pylint: disable=W0212,R0904
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import contains_exactly
+from hamcrest import greater_than_or_equal_to
+from hamcrest import has_entries
+from hamcrest import has_item
+from hamcrest import is_
+from hamcrest import is_not
+from hamcrest import none
+from hamcrest import not_none
+from hamcrest import same_instance
+
+from pyramid import testing
+from pyramid.interfaces import ITweens
+from pyramid.request import Request
+
+from zope import component
+from zope import interface
+
+from zope.authentication.interfaces import IAuthentication
+from zope.authentication.interfaces import IFallbackUnauthenticatedPrincipal
+from zope.authentication.interfaces import PrincipalLookupError
+
+from zope.principalregistry.principalregistry import principalRegistry
+
+from zope.security.interfaces import IPrincipal
+from zope.security.management import endInteraction
+from zope.security.management import newInteraction
+from zope.security.management import queryInteraction
+
+from ..interfaces import IPrincipalCache
+from ..security import PrincipalCache
+from ..tweens import PRINCIPAL_FACTORY_KEY
+from ..tweens import TIMING_HOOK_KEY
+from ..tweens import default_principal_factory
+from ..tweens import interaction_tween_factory
+
+from . import ConfiguringLayer
+
+
+@interface.implementer(IPrincipal)
+class _Principal(object):
+
+    def __init__(self, id):
+        self.id = id
+
+
+@interface.implementer(IAuthentication)
+class _Authentication(object):
+
+    def getPrincipal(self, userid):
+        if userid == 'unknown':
+            raise PrincipalLookupError(userid)
+        return _Principal(userid)
+
+
+def principal_factory(userid, unused_request):
+    return _Principal(userid)
+
+
+class TestDefaultPrincipalFactory(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        component.provideUtility(_Authentication(), IAuthentication)
+
+    def tearDown(self):
+        component.provideUtility(principalRegistry, IAuthentication)
+
+    def test_factory(self):
+        unauth = component.getUtility(IFallbackUnauthenticatedPrincipal)
+        assert_that(default_principal_factory(None, None), is_(same_instance(unauth)))
+        assert_that(default_principal_factory('unknown', None), is_(same_instance(unauth)))
+        assert_that(default_principal_factory('sjohnson', None).id, is_('sjohnson'))
+
+
+class TestInteractionTween(unittest.TestCase):
+
+    layer = ConfiguringLayer
+
+    def setUp(self):
+        self.config = testing.setUp(hook_zca=False, settings={
+            PRINCIPAL_FACTORY_KEY: __name__ + '.principal_factory',
+        })
+        self.config.testing_securitypolicy(userid='sjohnson')
+        self.timings = []
+        self.config.registry.settings[TIMING_HOOK_KEY] = \
+            lambda request, elapsed: self.timings.append(elapsed)
+
+    def tearDown(self):
+        testing.tearDown()
+        endInteraction()
+
+    def _request(self):
+        request = Request.blank('/')
+        request.registry = self.config.registry
+        return request
+
+    def test_interaction_around_request(self):
+        seen = []
+        def handler(request):
+            seen.append((queryInteraction(), IPrincipal(request)))
+            return 'response'
+
+        tween = interaction_tween_factory(handler, self.config.registry)
+        request = self._request()
+        assert_that(tween(request), is_('response'))
+
+        interaction, principal = seen[0]
+        assert_that(interaction, is_(not_none()))
+        assert_that(principal.id, is_('sjohnson'))
+        assert_that(list(interaction.participations)[0].principal,
+                    is_(same_instance(principal)))
+
+        assert_that(queryInteraction(), is_(none()))
+        assert_that(self.timings, contains_exactly(greater_than_or_equal_to(0)))
+
+    def test_interaction_ended_on_error(self):
+        def handler(request):
+            raise ValueError()
+        tween = interaction_tween_factory(handler, self.config.registry)
+        with self.assertRaises(ValueError):
+            tween(self._request())
+        assert_that(queryInteraction(), is_(none()))
+        assert_that(self.timings, has_item(greater_than_or_equal_to(0)))
+
+    def test_subrequest_interaction_kept(self):
+        seen = []
+        def handler(request):
+            seen.append(queryInteraction())
+            if len(seen) == 1:
+                tween(self._request())
+                seen.append(queryInteraction())
+
+        tween = interaction_tween_factory(handler, self.config.registry)
+        tween(self._request())
+        assert_that(seen, contains_exactly(not_none(),
+                                           same_instance(seen[0]),
+                                           same_instance(seen[0])))
+        assert_that(queryInteraction(), is_(none()))
+        assert_that(self.timings, contains_exactly(greater_than_or_equal_to(0)))
+
+    def test_stale_interaction_ended(self):
+        newInteraction()
+        stale = queryInteraction()
+        seen = []
+        tween = interaction_tween_factory(lambda request: seen.append(queryInteraction()),
+                                          self.config.registry)
+        tween(self._request())
+        assert_that(seen, contains_exactly(not_none()))
+        assert_that(seen[0], is_not(same_instance(stale)))
+        assert_that(list(seen[0].participations)[0].principal.id, is_('sjohnson'))
+        assert_that(queryInteraction(), is_(none()))
+
+    def test_principal_cache(self):
+        cache = PrincipalCache()
+        component.provideUtility(cache, IPrincipalCache)
+        try:
+            seen = []
+            tween = interaction_tween_factory(lambda request: seen.append(IPrincipal(request)),
+                                              self.config.registry)
+            tween(self._request())
+            tween(self._request())
+        finally:
+            component.getGlobalSiteManager().unregisterUtility(cache, IPrincipalCache)
+        assert_that(seen[0].id, is_('sjohnson'))
+        assert_that(seen[1], is_(same_instance(seen[0])))
+        assert_that(cache.stats(), has_entries(hits=1, misses=1))
+
+    def test_includeme(self):
+        self.config.include('nti.app.pyramid_zope.tweens')
+        self.config.commit()
+        tweens = self.config.registry.getUtility(ITweens)
+        assert_that([name for name, _ in tweens.implicit()],
+                    has_item('nti.app.pyramid_zope.tweens.interaction_tween_factory'))
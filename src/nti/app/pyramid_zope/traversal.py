@@ -9,6 +9,10 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+from itertools import islice
+
+from six.moves.collections_abc import MutableSequence
+
 from pyramid import traversal
 
 from pyramid.compat import is_nonstr_iter
@@ -24,9 +28,17 @@ from pyramid.interfaces import ITraverser
 
 from zope import interface
 
-from zope.component import queryMultiAdapter
+import zope.event
+
+from zope.component import getSiteManager
+from zope.component import queryUtility
+from zope.component.event import dispatch as _component_dispatch
+from zope.component.event import objectEventNotify as _object_event_notify
 from zope.event import notify
 
+from zope.interface import implementedBy
+from zope.interface import providedBy
+
 from zope.location.interfaces import LocationError
 
 from zope.traversing import api as ztraversing
@@ -37,8 +49,14 @@ from zope.traversing.interfaces import BeforeTraverseEvent
 from zope.publisher.interfaces.browser import IBrowserRequest
 from zope.publisher.interfaces.browser import IDefaultBrowserLayer
 
+from zope.traversing.namespace import nsParse
 from zope.traversing.namespace import resource as _zresource
 
+from .caching import RegistryGenerationCache
+from .interfaces import ITraversalNotFoundCache
+from .interfaces import ITraversalPrefetcher
+from .interfaces import ITraversalPrefixCache
+
 lineage = traversal.lineage
 find_interface = traversal.find_interface
 
@@ -50,6 +68,7 @@ logger = __import__('logging').getLogger(__name__)
 __all__ = [
     'ZopeResourceTreeTraverser',
     'resource',
+    'traverse_paths',
 ]
 
 def _notify_before_traverse_event(ob, request):
@@ -71,6 +90,261 @@ def _notify_before_traverse_event(ob, request):
         raise HTTPNotFound("Traversal failed")
 
 
+def _notify_observed_before_traverse_event(ob, request):
+    """
+    Like :func:`_notify_before_traverse_event`, but only if
+    :func:`_before_traverse_event_observed`.
+    """
+    if _before_traverse_event_observed(ob):
+        _notify_before_traverse_event(ob, request)
+
+
+#: Whether a subscriber may see the BeforeTraverseEvent of an object,
+#: keyed by the interfaces provided by the object.
+_traverse_event_observers = RegistryGenerationCache()
+
+_BEFORE_TRAVERSE_EVENT_SPEC = implementedBy(BeforeTraverseEvent)
+
+
+def _before_traverse_event_observed(ob):
+    """
+    Could any subscriber see a :class:`BeforeTraverseEvent` for *ob*?
+
+    This is true if there are :data:`zope.event.subscribers` other than
+    the one that dispatches to the component registry, or if the
+    current component registry has a handler for the event (other than
+    the one that re-dispatches object events), or a handler for *ob*
+    and the event.
+    """
+    subscribers = zope.event.subscribers
+    if not subscribers:
+        return False
+    if len(subscribers) != 1 or subscribers[0] is not _component_dispatch:
+        return True
+
+    spec = providedBy(ob)
+    data = _traverse_event_observers.data()
+    try:
+        return data[spec]
+    except KeyError:
+        pass
+    adapters = getSiteManager().adapters
+    handlers = adapters.subscriptions((_BEFORE_TRAVERSE_EVENT_SPEC,), None)
+    observed = any(h is not _object_event_notify for h in handlers)
+    if not observed and _object_event_notify in handlers:
+        observed = bool(adapters.subscriptions((spec, _BEFORE_TRAVERSE_EVENT_SPEC), None))
+    data[spec] = observed
+    return observed
+
+
+#: The ``ITraversable`` multi-adapter factories found by
+#: :func:`_query_traversable`, keyed by the interfaces provided by the
+#: object and the request. ``None`` means there is no usable factory.
+_traversable_cache = RegistryGenerationCache()
+
+
+def _query_traversable(ob, request):
+    """
+    Like ``queryMultiAdapter((ob, request), ITraversable)``, but with
+    the factory found for the interfaces of *ob* and *request*
+    remembered until the current component registry changes.
+
+    Some things are registered for "*" (DefaultTraversable), which
+    means they get called here. If they can't take two arguments, they
+    raise ``TypeError``; that is remembered too, and they aren't
+    called again.
+    """
+    key = (providedBy(ob), providedBy(request))
+    data = _traversable_cache.data()
+    try:
+        factory = data[key]
+    except KeyError:
+        factory = data[key] = getSiteManager().adapters.lookup(key, ITraversable, u'')
+    if factory is None:
+        return None
+    try:
+        return factory(ob, request)
+    except TypeError:
+        data[key] = None
+        return None
+
+
+#: The utilities found by :func:`_query_traversal_utilities`.
+_traversal_utility_cache = RegistryGenerationCache(kind='utilities')
+
+_TRAVERSAL_UTILITY_INTERFACES = (
+    ITraversalPrefixCache,
+    ITraversalNotFoundCache,
+    ITraversalPrefetcher,
+)
+
+
+def _query_traversal_utilities():
+    """
+    Return the :class:`.ITraversalPrefixCache`,
+    :class:`.ITraversalNotFoundCache` and :class:`.ITraversalPrefetcher`
+    utilities (each ``None`` if there is none), found once until the
+    utilities of the current component registry change, so that
+    traversals don't look for caches that aren't there.
+    """
+    data = _traversal_utility_cache.data()
+    try:
+        return data[_TRAVERSAL_UTILITY_INTERFACES]
+    except KeyError:
+        utilities = data[_TRAVERSAL_UTILITY_INTERFACES] = tuple(
+            queryUtility(iface) for iface in _TRAVERSAL_UTILITY_INTERFACES)
+        return utilities
+
+
+#: The namespace and name of segments starting with ``+`` or ``@``,
+#: as parsed by ``nsParse``. This is emptied when it gets too big.
+_ns_parse_cache = {}
+_NS_PARSE_CACHE_SIZE = 1000
+
+#: The ``ITraversable`` factory for each namespace and pair of object
+#: and request interfaces.
+_namespace_cache = RegistryGenerationCache()
+
+
+def _ns_parse(name):
+    try:
+        return _ns_parse_cache[name]
+    except KeyError:
+        if len(_ns_parse_cache) >= _NS_PARSE_CACHE_SIZE:
+            _ns_parse_cache.clear()
+        result = _ns_parse_cache[name] = nsParse(name)
+        return result
+
+
+def _namespace_lookup(ns, name, ob, request):
+    """
+    Like :func:`zope.traversing.namespace.namespaceLookup` with a
+    request, but with the factory found for the namespace and the
+    interfaces of *ob* and *request* remembered until the current
+    component registry changes.
+    """
+    specs = (providedBy(ob), providedBy(request))
+    data = _namespace_cache.data()
+    key = (ns,) + specs
+    try:
+        factory = data[key]
+    except KeyError:
+        factory = data[key] = getSiteManager().adapters.lookup(specs, ITraversable, ns)
+    traverser = factory(ob, request) if factory is not None else None
+    if traverser is None:
+        raise LocationError(ob, "++%s++%s" % (ns, name))
+    return traverser.traverse(name, ())
+
+
+def _traverse_namespaced_element(ob, name, further_path, traversable=None, request=None):
+    """
+    Like :func:`zope.traversing.api.traversePathElement`, for the
+    segments that aren't plain names, but namespaced names
+    (``++ns++name``) are parsed once and looked up with
+    :func:`_namespace_lookup` when there is a request.
+    """
+    if traversable is None and request is not None and name[:1] in '+@':
+        ns, nm = _ns_parse(name)
+        if ns:
+            return _namespace_lookup(ns, nm, ob, request)
+    return ztraversing.traversePathElement(ob, name, further_path,
+                                           traversable=traversable,
+                                           request=request)
+
+
+class _RemainingPath(MutableSequence):
+    """
+    The segments of a path after the one being traversed.
+
+    This is the *further_path* given to traversables, which may
+    consume or change it like a list. It is a view of the list of
+    segments the traverser walks, from :attr:`start`, which the
+    traverser moves along for each segment instead of slicing that
+    list; changes made through it are made to that list.
+    """
+
+    __slots__ = (
+        '_segments',
+        'start',
+        'changed',
+    )
+    __hash__ = None
+
+    def __init__(self, segments, start=0):
+        self._segments = segments
+        #: The index in the list of segments of the first one in this path.
+        self.start = start
+        #: Set when the segments are changed through this path.
+        self.changed = False
+
+    def _index(self, index):
+        length = len(self._segments) - self.start
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError(index)
+        return self.start + index
+
+    def _replace(self, segments):
+        self._segments[self.start:] = segments
+
+    def __len__(self):
+        return len(self._segments) - self.start
+
+    def __iter__(self):
+        return iter(self._segments[self.start:])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._segments[self.start:][index]
+        return self._segments[self._index(index)]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            segments = self._segments[self.start:]
+            segments[index] = value
+            self._replace(segments)
+        else:
+            self._segments[self._index(index)] = value
+        self.changed = True
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            segments = self._segments[self.start:]
+            del segments[index]
+            self._replace(segments)
+        else:
+            del self._segments[self._index(index)]
+        self.changed = True
+
+    def insert(self, index, value):
+        length = len(self)
+        if index < 0:
+            index = max(index + length, 0)
+        self._segments.insert(self.start + min(index, length), value)
+        self.changed = True
+
+    def __eq__(self, other):
+        if isinstance(other, (_RemainingPath, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, list(self))
+
+
+def _store_prefix(prefix_cache, root, vpath_tuple, prefix_objects, prefix_found, request):
+    # Store the objects traversed from the root while they could be
+    # cached, if there are more of them than were found.
+    if prefix_objects is not None and len(prefix_objects) > prefix_found:
+        prefix_cache.store(root, vpath_tuple[:len(prefix_objects) - 1],
+                           prefix_objects, request)
+
+
 @interface.implementer(ITraverser)
 class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
     """
@@ -89,12 +363,71 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
     :obj:`zope.site.site.threadSiteSubscriber <zope.site.site>` to
     subscribe to this event, then any Zope site managers found along
     the way will be made the current site.
+
+    Creating and notifying these events for every object traversed
+    takes time, even when nothing is subscribed to them, or the only
+    subscribers are for objects that aren't being traversed (such as
+    sites). Set :attr:`skip_unobserved_traverse_events` to a true
+    value (in a subclass, or on this class) to only notify the event
+    if a subscriber could see it.
+
+    If an :class:`~nti.app.pyramid_zope.interfaces.ITraversalPrefixCache`
+    utility is registered (such as
+    :class:`~nti.app.pyramid_zope.traversal_cache.TraversalPrefixCache`),
+    traversal starts from the object for the longest prefix of the path
+    it has (after notifying the events for the objects along that
+    prefix), and the prefixes traversed are stored in it. Only
+    prefixes of plain segments (not namespaces or views) whose
+    traversal didn't change the rest of the path are stored.
+
+    Likewise, if an
+    :class:`~nti.app.pyramid_zope.interfaces.ITraversalNotFoundCache`
+    utility is registered (such as
+    :class:`~nti.app.pyramid_zope.traversal_cache.TraversalNotFoundCache`),
+    plain segments that couldn't be traversed are recorded there, and
+    not tried again while they remain there.
+
+    If an :class:`~nti.app.pyramid_zope.interfaces.ITraversalPrefetcher`
+    utility is registered (such as
+    :class:`~nti.app.pyramid_zope.traversal_cache.TraversalPrefetcher`),
+    it is asked to prefetch the objects along the path before
+    traversal starts, and told about each object traversed through a
+    plain segment.
     """
 
+    #: If true, don't notify a :class:`BeforeTraverseEvent` for an
+    #: object unless a subscriber could see it. Whether one could is
+    #: found once for each set of interfaces the objects provide, and
+    #: found again if the component registry changes.
+    skip_unobserved_traverse_events = False
+
     def __init__(self, root):
         traversal.ResourceTreeTraverser.__init__(self, root)
 
-    def __call__(self, request): # pylint:disable=too-many-locals,too-many-branches,too-many-statements
+    def _traversal_functions(self, request): # pylint:disable=unused-argument
+        """
+        Return the functions a traversal for *request* calls: one
+        called with an object and the request to notify the
+        :class:`BeforeTraverseEvent` for the object, and two called
+        like :func:`zope.traversing.api.traversePathElement` to
+        traverse plain segments and the others (namespaces and empty
+        segments).
+
+        They are found once for each traversal, so that traversing
+        each segment makes no calls besides them. Subclasses may
+        return others, as
+        :class:`~nti.app.pyramid_zope.traversal_instrumentation.InstrumentedResourceTreeTraverser`
+        does.
+        """
+        if self.skip_unobserved_traverse_events:
+            notify_before = _notify_observed_before_traverse_event
+        else:
+            notify_before = _notify_before_traverse_event
+        return (notify_before,
+                ztraversing.traversePathElement,
+                _traverse_namespaced_element)
+
+    def __call__(self, request):
         """
         See :meth:`pyramid.interfaces.ITraversar.__call__`.
         """
@@ -148,8 +481,44 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
             vpath = path
             vroot_idx = -1
 
+        prefix_cache, not_found_cache, prefetcher = _query_traversal_utilities()
+        if vroot_idx != -1:  # pragma: no cover
+            prefix_cache = prefetcher = None
+        return self._traverse(request, vpath, subpath, vroot_tuple, vroot_idx,
+                              prefix_cache, not_found_cache, prefetcher)
+
+    def traverse_paths(self, request, paths):
+        """
+        Traverse each of *paths* from the root, returning a list of
+        dictionaries like :meth:`__call__` returns, in the same order.
+
+        Each path is either a string like ``'/a/b'`` (which must be
+        URL-decoded) or a sequence of segments. They are relative to
+        the root, and the ``subpath`` of the route of the request isn't
+        used.
+
+        Paths that share a prefix, such as siblings, traverse the
+        objects along that prefix once. Traversal then continues from
+        there, after the :class:`BeforeTraverseEvent` for each of the
+        objects along it is notified again, just as for an
+        :class:`~nti.app.pyramid_zope.interfaces.ITraversalPrefixCache`.
+        """
+        prefixes = _PathTrie()
+        _, not_found_cache, prefetcher = _query_traversal_utilities()
+        results = []
+        for path in paths:
+            if is_nonstr_iter(path):
+                path = '/'.join(path)
+            results.append(self._traverse(request, path or '/', (), (), -1,
+                                          prefixes, not_found_cache, prefetcher))
+        return results
+
+    def _traverse(self, request, vpath, subpath, vroot_tuple, vroot_idx,
+                  prefix_cache, not_found_cache, prefetcher):
+        # pylint:disable=too-many-locals,too-many-branches,too-many-statements,too-many-arguments
         root = self.root
         ob = vroot = root
+        notify_before, traverse_plain, traverse_namespaced = self._traversal_functions(request)
 
         if vpath == '/':  # invariant: vpath must not be empty
             # prevent a call to traversal_path if we know it's going
@@ -160,14 +529,45 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
             view_selector = self.VIEW_SELECTOR
             # A list so that remaining_path can be modified
             vpath_tuple = list(split_path_info(vpath))
-            for segment in vpath_tuple:
+            # JAM: Instead of slicing the remaining path off of
+            # vpath_tuple for each segment (and comparing it afterwards
+            # to see if the traversable changed it), traversables are
+            # given this view of vpath_tuple after the current segment,
+            # which changes vpath_tuple itself.
+            remaining_path = _RemainingPath(vpath_tuple)
+            # The objects for each segment traversed from the root, while
+            # they can be cached, and how many of them were already cached.
+            # The longest such prefix is stored once traversal stops.
+            prefix_objects = None
+            prefix_found = 1
+            if prefix_cache is not None:
+                prefix_objects = prefix_cache.lookup(root, vpath_tuple, request)
+                if prefix_objects:
+                    for prefix_ob in prefix_objects[:-1]:
+                        notify_before(prefix_ob, request)
+                    i = len(prefix_objects) - 1
+                    ob = prefix_objects[-1]
+                    prefix_objects = list(prefix_objects)
+                    prefix_found = len(prefix_objects)
+                else:
+                    prefix_objects = [root]
+            if prefetcher is not None:
+                prefetcher.prefetch(root, vpath_tuple, request)
+            # Do we need to know if traversal changed the remaining path?
+            track_path = (prefix_objects is not None
+                          or not_found_cache is not None
+                          or prefetcher is not None)
+
+            for segment in islice(vpath_tuple, i, None) if i else vpath_tuple:
                 # JAM: Fire traversal events, mainly so sites get installed. See
                 # zope.publisher.base.
-                _notify_before_traverse_event(ob, request)
+                notify_before(ob, request)
                 # JAM: Notice that checking for '@@' is special cased, and
                 # doesn't go through the normal namespace lookup as it would in
                 # plain zope traversal. (XXX: Why not?)
                 if segment.startswith(view_selector):  # pragma: no cover
+                    _store_prefix(prefix_cache, root, vpath_tuple, prefix_objects,
+                                  prefix_found, request)
                     return {'context': ob,
                             'view_name': segment[2:],
                             'subpath': vpath_tuple[i + 1:],
@@ -176,6 +576,10 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
                             'virtual_root_path': vroot_tuple,
                             'root': root}
 
+                plain_segment = segment and segment[0] not in '+@'
+                remaining_path.start = i + 1
+                if track_path:
+                    remaining_path.changed = False
                 try:
                     # JAM: This is where we differ. instead of using __getitem__,
                     # we use the traversing machinery.
@@ -192,41 +596,43 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
                     # therefore, we explicitly query for the multi adapter ourself in the non-namespace case
                     # (In the namespace case, we let traversing handle it, because it needs a named adapter
                     # after parsing)
+                    if (plain_segment
+                            and not_found_cache is not None
+                            and not_found_cache.is_missing(ob, segment, request)):
+                        plain_segment = False # Don't record it again
+                        raise LocationError(ob, segment)
+
                     traversable = None
-                    if segment and segment[0] not in '+@' \
-                            and not ITraversable.providedBy(ob):
-                        try:
-                            # Use the installed component registry
-                            # instead of the request registry (which
-                            # is the global component registry if
-                            # pyramid was configured that way, or a
-                            # standalone registry) in case the act of
-                            # traversing has changed the site manager;
-                            # zope.site.site.threadSiteSubscriber will
-                            # do this for each BeforeTraverseEvent
-                            # that's fired (though that's not
-                            # registered by default).
-                            traversable = queryMultiAdapter((ob, request),
-                                                            ITraversable)
-                        except TypeError:
-                            # Some things are registered for "*" (DefaultTraversable)
-                            # which means they get called here. If they can't take
-                            # two arguments, then we bail. Sucks.
-                            pass
-
-                    remaining_path = vpath_tuple[i + 1:]
-                    next_ob = ztraversing.traversePathElement(ob,
-                                                              segment,
-                                                              remaining_path,
-                                                              traversable=traversable,
-                                                              request=request)
-                    if remaining_path != vpath_tuple[i + 1:]:
-                        # Is this if check necessary? It would be faster to
-                        # always assign
-                        vpath_tuple[i + 1:] = remaining_path
+                    if plain_segment and not ITraversable.providedBy(ob):
+                        # Use the installed component registry
+                        # instead of the request registry (which
+                        # is the global component registry if
+                        # pyramid was configured that way, or a
+                        # standalone registry) in case the act of
+                        # traversing has changed the site manager;
+                        # zope.site.site.threadSiteSubscriber will
+                        # do this for each BeforeTraverseEvent
+                        # that's fired (though that's not
+                        # registered by default).
+                        traversable = _query_traversable(ob, request)
+
+                    traverse_element = traverse_plain if plain_segment else traverse_namespaced
+                    next_ob = traverse_element(ob,
+                                               segment,
+                                               remaining_path,
+                                               traversable=traversable,
+                                               request=request)
                 except LocationError:
                     # LocationError is a type of KeyError. The DefaultTraversable turns
                     # plain KeyError and TypeErrors into LocationError.
+                    # Only remember misses that didn't change the rest of the path,
+                    # so that repeating them gives the same answer.
+                    if (plain_segment
+                            and not_found_cache is not None
+                            and not remaining_path.changed):
+                        not_found_cache.add_missing(ob, segment, request)
+                    _store_prefix(prefix_cache, root, vpath_tuple, prefix_objects,
+                                  prefix_found, request)
                     return {'context': ob,
                             'view_name': segment,
                             'subpath': vpath_tuple[i + 1:],
@@ -234,16 +640,31 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
                             'virtual_root': vroot,
                             'virtual_root_path': vroot_tuple,
                             'root': root}
+                if track_path:
+                    if remaining_path.changed or not plain_segment:
+                        _store_prefix(prefix_cache, root, vpath_tuple, prefix_objects,
+                                      prefix_found, request)
+                        prefix_objects = None
+                        if remaining_path.changed:
+                            # What follows is no longer the path requested.
+                            prefetcher = None
+                    if plain_segment and not remaining_path.changed:
+                        if prefix_objects is not None:
+                            prefix_objects.append(next_ob)
+                        if prefetcher is not None:
+                            prefetcher.record(root, vpath_tuple[:i + 1], next_ob, request)
                 if i == vroot_idx:  # pragma: no cover
                     vroot = next_ob
                 ob = next_ob
                 i += 1
+            _store_prefix(prefix_cache, root, vpath_tuple, prefix_objects,
+                          prefix_found, request)
 
         # JAM: Also fire before traversal for the actual context item, since we
         # won't actually traverse into it. Be sure not to fire multiple times
         # for this (E.g., the root). This logic is complicated by the
         # multi-returns above.
-        _notify_before_traverse_event(ob, request)
+        notify_before(ob, request)
 
         return {'context': ob,
                 'view_name': empty,
@@ -255,6 +676,57 @@ class ZopeResourceTreeTraverser(traversal.ResourceTreeTraverser):
 
 
 
+class _PathTrie(object):
+    """
+    The prefixes traversed by one call to
+    :meth:`ZopeResourceTreeTraverser.traverse_paths`, in the
+    form of an :class:`~nti.app.pyramid_zope.interfaces.ITraversalPrefixCache`.
+
+    Each node is a list of the object its segment led to and a
+    dictionary of its children.
+    """
+
+    __slots__ = (
+        '_root',
+    )
+
+    def __init__(self):
+        self._root = [None, {}]
+
+    def lookup(self, root, path, request): # pylint:disable=unused-argument
+        children = self._root[1]
+        objects = [root]
+        for segment in path:
+            node = children.get(segment)
+            if node is None:
+                break
+            objects.append(node[0])
+            children = node[1]
+        return objects if len(objects) > 1 else None
+
+    def store(self, root, path, objects, request): # pylint:disable=unused-argument
+        node = self._root
+        for segment, ob in zip(path, objects[1:]):
+            child = node[1].get(segment)
+            if child is None:
+                child = node[1][segment] = [ob, {}]
+            else:
+                child[0] = ob
+            node = child
+
+    def invalidate(self):
+        self._root = [None, {}]
+
+
+def traverse_paths(root, paths, request):
+    """
+    Traverse each of *paths* from *root* with a
+    :class:`ZopeResourceTreeTraverser`. See
+    :meth:`ZopeResourceTreeTraverser.traverse_paths`.
+    """
+    return ZopeResourceTreeTraverser(root).traverse_paths(request, paths)
+
+
 class resource(_zresource):
     """
     Handles resource lookup in a way compatible with :mod:`zope.browserresource`.
@@ -268,3 +740,14 @@ class resource(_zresource):
         if not IDefaultBrowserLayer.providedBy(request):
             interface.alsoProvides(request, IDefaultBrowserLayer)  # We lie
         super(resource, self).__init__(context, request)
+
+
+try:
+    from zope.testing import cleanup
+except ImportError: # pragma: no cover
+    pass
+else:
+    cleanup.addCleanUp(_traversable_cache.clear)
+    cleanup.addCleanUp(_namespace_cache.clear)
+    cleanup.addCleanUp(_ns_parse_cache.clear)
+    cleanup.addCleanUp(_traverse_event_observers.clear)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Caches used by resource tree traversal.
+
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+from zope import component
+from zope import interface
+
+from zope.interface import providedBy
+
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+
+from .caching import LRUCache
+from .interfaces import ITraversalNotFoundCache
+from .interfaces import ITraversalPrefetcher
+from .interfaces import ITraversalPrefixCache
+
+__all__ = [
+    'TraversalNotFoundCache',
+    'TraversalPrefetcher',
+    'TraversalPrefixCache',
+    'invalidate_traversal_not_found_cache',
+    'invalidate_traversal_prefix_cache',
+]
+
+
+class _PrefixNode(object):
+    # The object a segment led to from *parent* (the root, or the
+    # _PrefixNode of the segment before it).
+
+    __slots__ = (
+        'parent',
+        'ob',
+        'generation',
+    )
+
+    def __init__(self, parent, ob, generation):
+        self.parent = parent
+        self.ob = ob
+        self.generation = generation
+
+
+@interface.implementer(ITraversalPrefixCache)
+class TraversalPrefixCache(object):
+    """
+    An :class:`.ITraversalPrefixCache` holding the objects for at most
+    *maxsize* path segments, for *ttl* seconds each.
+
+    Prefixes are cached separately for each root object (so each ZODB
+    connection, which loads its own root, has its own entries) and for
+    each value of *request_key* (by default, the interfaces the
+    request provides, so that requests with different layers don't
+    share entries).
+
+    Each segment of a stored path is kept as its own entry, keyed by
+    the entry for the segment before it, so storing and finding a
+    path of *n* segments takes *n* steps, and paths share the entries
+    for their common prefix.
+
+    If *generation* is given, it is called with the root object, and
+    its result stored with each entry; entries stored with a different
+    value than the current one are ignored. A counter kept on a site
+    and incremented when its contents change is a suitable
+    generation.
+
+    Without a *generation*, only changes this process notices (through
+    the events that call :func:`invalidate_traversal_prefix_cache`)
+    invalidate entries, so an object moved or removed by another
+    process (or by a transaction that hasn't committed) may still be
+    found for up to *ttl* seconds. A *ttl* of ``None`` keeps entries
+    until they are evicted; only do that with a *generation*.
+
+    .. caution:: Cached prefixes are reused for all principals.
+       Don't use this if what a path leads to depends on who is
+       asking (for example, if traversal checks permissions), unless
+       *request_key* includes the principal.
+
+    The counters of :meth:`stats` count lookups: a hit is a lookup
+    that found a prefix.
+    """
+
+    hits = 0
+    misses = 0
+
+    def __init__(self, maxsize=1000, generation=None, request_key=providedBy,
+                 ttl=30, **kwargs):
+        self._entries = LRUCache(maxsize, ttl, **kwargs)
+        self._generation = generation
+        self._request_key = request_key
+
+    def lookup(self, root, path, request):
+        generation = self._generation(root) if self._generation is not None else None
+        get = self._entries.get
+        objects = [root]
+        # The first segment is keyed by the id of the root, the rest
+        # by the entry for the segment before them.
+        parent = root
+        parent_key = (id(root), self._request_key(request))
+        for segment in path:
+            node = get((parent_key, segment))
+            if node is None or node.parent is not parent or node.generation != generation:
+                break
+            objects.append(node.ob)
+            parent = parent_key = node
+        if len(objects) > 1:
+            self.hits += 1
+            return objects
+        self.misses += 1
+        return None
+
+    def store(self, root, path, objects, request):
+        generation = self._generation(root) if self._generation is not None else None
+        entries = self._entries
+        # Entries keep their parent, so the id of the root can't be
+        # reused while the entries for its first segments exist.
+        parent = root
+        parent_key = (id(root), self._request_key(request))
+        for segment, ob in zip(path, objects[1:]):
+            key = (parent_key, segment)
+            node = entries.get(key)
+            if (node is None
+                    or node.ob is not ob
+                    or node.parent is not parent
+                    or node.generation != generation):
+                node = entries[key] = _PrefixNode(parent, ob, generation)
+            parent = parent_key = node
+
+    def invalidate(self):
+        self._entries.clear(reset_counters=False)
+
+    def clear(self):
+        """
+        Forget everything and reset the counters.
+        """
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats['hits'] = self.hits
+        stats['misses'] = self.misses
+        return stats
+
+
+@component.adapter(interface.Interface, IObjectMovedEvent)
+def invalidate_traversal_prefix_cache(unused_object, unused_event):
+    """
+    Invalidate the :class:`.ITraversalPrefixCache` utility, if there is
+    one, when an object is added, moved or removed.
+
+    This is registered as a subscriber.
+    """
+    cache = component.queryUtility(ITraversalPrefixCache)
+    if cache is not None:
+        cache.invalidate()
+
+
+@interface.implementer(ITraversalNotFoundCache)
+class TraversalNotFoundCache(LRUCache):
+    """
+    An :class:`.ITraversalNotFoundCache` holding at most *maxsize*
+    missing segments for *ttl* seconds each.
+
+    Entries are kept for each parent object and value of
+    *request_key* (by default, the interfaces the request provides).
+    A reference to the parent is kept while its entries exist.
+
+    .. caution:: Missing segments are shared by all principals.
+       Don't use this if whether a segment can be traversed depends
+       on who is asking (for example, if a traversable raises
+       ``LocationError`` for objects the principal may not see),
+       unless *request_key* includes the principal.
+
+    Checking a segment that isn't recorded isn't counted, so the
+    :attr:`hits` of :meth:`stats` are the segments that weren't
+    traversed again because they were recorded.
+    """
+
+    def __init__(self, maxsize=10000, ttl=30, request_key=providedBy, **kwargs):
+        super(TraversalNotFoundCache, self).__init__(maxsize, ttl, **kwargs)
+        self._request_key = request_key
+
+    def is_missing(self, parent, name, request):
+        key = (id(parent), name, self._request_key(request))
+        # Most segments aren't missing; only count (and refresh) those
+        # that are.
+        return self.peek(key) is parent and self.get(key) is parent
+
+    def add_missing(self, parent, name, request):
+        self[(id(parent), name, self._request_key(request))] = parent
+
+    def invalidate(self):
+        self.clear(reset_counters=False)
+
+
+@component.adapter(interface.Interface, IObjectMovedEvent)
+def invalidate_traversal_not_found_cache(unused_object, event):
+    """
+    Invalidate the :class:`.ITraversalNotFoundCache` utility, if there is
+    one, when an object is added or moved (and so may now be found).
+
+    This is registered as a subscriber.
+    """
+    if event.newParent is None:
+        return
+    cache = component.queryUtility(ITraversalNotFoundCache)
+    if cache is not None:
+        cache.invalidate()
+
+
+@interface.implementer(ITraversalPrefetcher)
+class TraversalPrefetcher(object):
+    """
+    An :class:`.ITraversalPrefetcher` for ZODB.
+
+    It remembers the OIDs of the persistent objects that at most
+    *maxsize* paths led to, for each root OID and value of
+    *request_key*. Before a path is traversed, the OIDs remembered for
+    the longest run of its prefixes are given to one call of
+    :meth:`ZODB.Connection.Connection.prefetch` for the connection of
+    the root object, except for those the connection has already
+    loaded. Storages that support it (such as RelStorage and
+    ZEO) can then load them all in one round trip; for others, this
+    does nothing.
+
+    Because OIDs don't belong to a connection, what is remembered is
+    shared by all connections to the database. It's only a hint: OIDs
+    for objects that have since moved or been deleted are loaded for
+    nothing, but don't change what the path leads to.
+
+    Only paths from a persistent root object are remembered.
+
+    :attr:`prefetches` counts the calls to ``prefetch`` and
+    :attr:`prefetched` the OIDs passed to them.
+    """
+
+    prefetches = 0
+    prefetched = 0
+
+    def __init__(self, maxsize=10000, request_key=providedBy):
+        self._oids = LRUCache(maxsize)
+        self._request_key = request_key
+
+    def prefetch(self, root, path, request):
+        jar = getattr(root, '_p_jar', None)
+        if jar is None:
+            return
+        root_oid = root._p_oid
+        request_key = self._request_key(request)
+        get = self._oids.get
+        cached = jar._cache.get # pylint:disable=protected-access
+        oids = []
+        for length in range(1, len(path) + 1):
+            oid = get((root_oid, tuple(path[:length]), request_key))
+            if oid is None:
+                break
+            # Objects the connection has already loaded (that
+            # aren't ghosts) don't need to be fetched.
+            ob = cached(oid)
+            if ob is None or ob._p_changed is None:
+                oids.append(oid)
+        if oids:
+            jar.prefetch(oids)
+            self.prefetches += 1
+            self.prefetched += len(oids)
+
+    def record(self, root, path, ob, request):
+        root_oid = getattr(root, '_p_oid', None)
+        oid = getattr(ob, '_p_oid', None)
+        if root_oid is not None and oid is not None:
+            self._oids[(root_oid, tuple(path), self._request_key(request))] = oid
+
+    def clear(self):
+        """
+        Forget everything and reset the counters.
+        """
+        self._oids.clear()
+        self.prefetches = self.prefetched = 0
+
+    def stats(self):
+        stats = self._oids.stats()
+        stats['prefetches'] = self.prefetches
+        stats['prefetched'] = self.prefetched
+        return stats
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Timing of resource tree traversal, for finding out which segment,
+traversable or :class:`~zope.traversing.interfaces.IBeforeTraverseEvent`
+subscriber makes a URL slow.
+
+This costs nothing unless it is used. To use it, register
+:class:`InstrumentedResourceTreeTraverser` as the traverser instead of
+:class:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser`::
+
+    config.add_traverser(InstrumentedResourceTreeTraverser)
+
+The timings for each request are then available from
+:func:`traversal_timings`, and are added to
+:data:`traversal_histograms`, which keeps histograms for each matched
+route. These can be dumped from a running process with
+:func:`dump_traversal_histograms`, for example from a signal handler
+or a view.
+"""
+
+from __future__ import print_function, absolute_import, division
+__docformat__ = "restructuredtext en"
+
+import bisect
+import sys
+import threading
+
+try:
+    from time import perf_counter
+except ImportError: # pragma: no cover
+    # Python 2
+    from time import time as perf_counter
+
+from zope.traversing.interfaces import ITraversable
+
+from .caching import request_annotations
+from .traversal import ZopeResourceTreeTraverser
+
+__all__ = [
+    'InstrumentedResourceTreeTraverser',
+    'LatencyHistogram',
+    'SegmentTiming',
+    'TraversalHistograms',
+    'dump_traversal_histograms',
+    'traversal_histograms',
+    'traversal_timings',
+]
+
+_TIMINGS_KEY = __name__ + '.timings'
+
+#: The upper bounds, in seconds, of the buckets of a
+#: :class:`LatencyHistogram`. Longer times go in one more bucket.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0,
+)
+
+
+class SegmentTiming(object):
+    """
+    The time spent on one object during a traversal.
+    """
+
+    __slots__ = (
+        'segment',
+        'traversable',
+        'event_time',
+        'traverse_time',
+    )
+
+    def __init__(self, event_time):
+        #: The path segment traversed from the object, or None if
+        #: nothing was traversed from it (it is the context, or was
+        #: found in an :class:`.ITraversalPrefixCache`).
+        self.segment = None
+        #: The class of the :class:`.ITraversable` used to traverse
+        #: :attr:`segment`, or None if it was looked up by name (as
+        #: it is for namespaces).
+        self.traversable = None
+        #: Seconds spent notifying the :class:`.IBeforeTraverseEvent`
+        #: for the object.
+        self.event_time = event_time
+        #: Seconds spent traversing :attr:`segment`.
+        self.traverse_time = 0.0
+
+    def __repr__(self):
+        return '<%s %r traversable=%s event=%.6f traverse=%.6f>' % (
+            type(self).__name__,
+            self.segment,
+            self.traversable.__name__ if self.traversable is not None else None,
+            self.event_time,
+            self.traverse_time,
+        )
+
+
+class LatencyHistogram(object):
+    """
+    Counts of durations, by bucket.
+    """
+
+    __slots__ = (
+        'bounds',
+        'buckets',
+        'count',
+        'total',
+        'max',
+    )
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def snapshot(self):
+        """
+        Return a dictionary of the counts. The buckets are a list of
+        ``(upper_bound, count)`` pairs, the last of which has an upper
+        bound of None.
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+            'buckets': list(zip(self.bounds + (None,), self.buckets)),
+        }
+
+
+class TraversalHistograms(object):
+    """
+    :class:`LatencyHistogram` objects for each route, of the time
+    spent traversing (``total``), and the parts of that spent in
+    traversables (``traverse``) and notifying events (``events``).
+    """
+
+    parts = ('total', 'traverse', 'events')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route_name, total, timings):
+        """
+        Add a traversal of the route named *route_name* that took
+        *total* seconds, with the :class:`SegmentTiming` objects
+        *timings*.
+        """
+        traverse = sum(timing.traverse_time for timing in timings)
+        events = sum(timing.event_time for timing in timings)
+        with self._lock:
+            histograms = self._routes.get(route_name)
+            if histograms is None:
+                histograms = self._routes[route_name] = tuple(
+                    LatencyHistogram(self.bounds) for _ in self.parts
+                )
+            for histogram, seconds in zip(histograms, (total, traverse, events)):
+                histogram.add(seconds)
+
+    def snapshot(self):
+        """
+        Return a dictionary mapping each route name (None for requests
+        that didn't match a route) to a dictionary mapping the names
+        in :attr:`parts` to :meth:`LatencyHistogram.snapshot`.
+        """
+        with self._lock:
+            return {
+                route_name: dict(zip(self.parts, [h.snapshot() for h in histograms]))
+                for route_name, histograms in self._routes.items()
+            }
+
+    def dump(self, file=None):
+        """
+        Write the histograms as text to *file* (by default, standard
+        output).
+        """
+        file = file if file is not None else sys.stdout
+        snapshot = self.snapshot()
+        for route_name in sorted(snapshot, key=str):
+            print('Route %s' % (route_name,), file=file)
+            for part in self.parts:
+                histogram = snapshot[route_name][part]
+                count = histogram['count']
+                print('  %-8s count=%d mean=%.3fms max=%.3fms' % (
+                    part, count,
+                    histogram['total'] * 1000 / count if count else 0.0,
+                    histogram['max'] * 1000), file=file)
+                for bound, bucket in histogram['buckets']:
+                    if bucket:
+                        print('    %10s %d' % (
+                            '<=%gms' % (bound * 1000) if bound is not None else 'more',
+                            bucket), file=file)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+#: The histograms :class:`InstrumentedResourceTreeTraverser` adds to
+#: by default.
+traversal_histograms = TraversalHistograms()
+
+
+def dump_traversal_histograms(file=None):
+    """
+    Write :data:`traversal_histograms` to *file*. See
+    :meth:`TraversalHistograms.dump`.
+    """
+    traversal_histograms.dump(file)
+
+
+def _timings(request):
+    annotations = request_annotations(request)
+    try:
+        return annotations[_TIMINGS_KEY]
+    except KeyError:
+        return annotations.setdefault(_TIMINGS_KEY, [])
+
+
+def traversal_timings(request):
+    """
+    Return the list of :class:`SegmentTiming` objects recorded by an
+    :class:`InstrumentedResourceTreeTraverser` for *request*, in the
+    order the objects were traversed, or None if it wasn't used.
+    """
+    return request_annotations(request).get(_TIMINGS_KEY)
+
+
+class InstrumentedResourceTreeTraverser(ZopeResourceTreeTraverser):
+    """
+    A :class:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser`
+    that records a :class:`SegmentTiming` for each object it notifies
+    a :class:`~zope.traversing.interfaces.BeforeTraverseEvent` for, and
+    adds the totals to :attr:`histograms`.
+
+    The objects traversed by
+    :meth:`~nti.app.pyramid_zope.traversal.ZopeResourceTreeTraverser.traverse_paths`
+    are added to the timings of the request too, but not to the
+    histograms.
+    """
+
+    #: The :class:`TraversalHistograms` to add to, if not None.
+    histograms = traversal_histograms
+
+    def __call__(self, request):
+        timings = request_annotations(request)[_TIMINGS_KEY] = []
+        start = perf_counter()
+        try:
+            return super(InstrumentedResourceTreeTraverser, self).__call__(request)
+        finally:
+            elapsed = perf_counter() - start
+            if self.histograms is not None:
+                route = getattr(request, 'matched_route', None)
+                self.histograms.record(route.name if route is not None else None,
+                                       elapsed, timings)
+
+    def _traversal_functions(self, request):
+        notify_before, traverse_plain, traverse_namespaced = super(
+            InstrumentedResourceTreeTraverser, self)._traversal_functions(request)
+        timings = _timings(request)
+
+        def timed_notify_before(ob, request):
+            start = perf_counter()
+            notify_before(ob, request)
+            timings.append(SegmentTiming(perf_counter() - start))
+
+        def timed(traverse_element):
+            def timed_traverse_element(ob, name, further_path, traversable=None, request=None):
+                # The event for *ob* has just been notified.
+                timing = timings[-1]
+                timing.segment = name
+                if traversable is not None:
+                    timing.traversable = type(traversable)
+                elif name[:1] not in '+@' and ITraversable.providedBy(ob):
+                    timing.traversable = type(ob)
+                start = perf_counter()
+                try:
+                    return traverse_element(ob, name, further_path,
+                                            traversable=traversable, request=request)
+                finally:
+                    timing.traverse_time = perf_counter() - start
+            return timed_traverse_element
+
+        return timed_notify_before, timed(traverse_plain), timed(traverse_namespaced)
+
+
+try:
+    from zope.testing import cleanup
+except ImportError: # pragma: no cover
+    pass
+else:
+    cleanup.addCleanUp(traversal_histograms.clear)
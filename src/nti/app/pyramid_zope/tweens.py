@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Pyramid tweens.
+
+The :func:`interaction_tween_factory` establishes the Zope security
+interaction that :mod:`nti.app.pyramid_zope.security` relies on. To
+use it, include this module in the Pyramid configuration::
+
+    config.include('nti.app.pyramid_zope.tweens')
+
+or add ``nti.app.pyramid_zope.tweens.interaction_tween_factory`` to the
+``pyramid.tweens`` setting.
+
+It reads these settings:
+
+``nti.app.pyramid_zope.principal_factory``
+    A callable, or the dotted name of one, taking ``(userid, request)``
+    and returning the :class:`~zope.security.interfaces.IPrincipal`
+    for the Pyramid ``authenticated_userid`` of the request. The
+    default is :func:`default_principal_factory`. It is found once, when
+    the tween is created.
+
+``nti.app.pyramid_zope.interaction_timing_hook``
+    A callable, or the dotted name of one, taking ``(request, seconds)``.
+    It is called at the end of each request with the time the tween
+    itself spent starting and ending the interaction (not including the
+    time spent handling the request).
+
+If an :class:`~nti.app.pyramid_zope.interfaces.IPrincipalCache` utility
+(such as :class:`~nti.app.pyramid_zope.security.PrincipalCache`) is
+registered when the tween is created, principals are looked up there
+first, and the principals the factory returns are stored there.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    from time import perf_counter
+except ImportError: # pragma: no cover
+    # Python 2
+    from time import time as perf_counter
+
+from pyramid.path import DottedNameResolver
+
+from zope import component
+from zope import interface
+
+from zope.authentication.interfaces import IAuthentication
+from zope.authentication.interfaces import IFallbackUnauthenticatedPrincipal
+from zope.authentication.interfaces import IUnauthenticatedPrincipal
+from zope.authentication.interfaces import PrincipalLookupError
+
+from zope.security.interfaces import IParticipation
+
+from .interfaces import IPrincipalCache
+from .security import _interaction_management
+from .security import _request_security_cache
+
+__all__ = [
+    'PRINCIPAL_FACTORY_KEY',
+    'TIMING_HOOK_KEY',
+    'default_principal_factory',
+    'interaction_tween_factory',
+    'includeme',
+]
+
+logger = __import__('logging').getLogger(__name__)
+
+#: The setting naming the principal factory.
+PRINCIPAL_FACTORY_KEY = 'nti.app.pyramid_zope.principal_factory'
+
+#: The setting naming the timing hook.
+TIMING_HOOK_KEY = 'nti.app.pyramid_zope.interaction_timing_hook'
+
+#: The interactions begun by an :func:`interaction_tween_factory` tween
+#: for requests that are still being handled, by id.
+_active_interactions = {}
+
+
+@interface.implementer(IParticipation)
+class _Participation(object):
+
+    __slots__ = (
+        'interaction',
+        'principal',
+    )
+
+    def __init__(self, principal):
+        self.interaction = None
+        self.principal = principal
+
+
+def default_principal_factory(userid, request): # pylint:disable=unused-argument
+    """
+    Return the principal the :class:`~zope.authentication.interfaces.IAuthentication`
+    utility has for *userid*.
+
+    If there is no *userid*, no such utility, or the utility doesn't
+    know the *userid*, the
+    :class:`~zope.authentication.interfaces.IFallbackUnauthenticatedPrincipal`
+    is returned.
+    """
+    if userid is not None:
+        auth = component.queryUtility(IAuthentication)
+        if auth is not None:
+            try:
+                return auth.getPrincipal(userid)
+            except PrincipalLookupError:
+                logger.debug("Unknown principal %r; treating as unauthenticated", userid)
+    return component.getUtility(IFallbackUnauthenticatedPrincipal)
+
+
+def _caching_principal_factory(factory, cache):
+    def principal_factory(userid, request):
+        if userid is None:
+            return factory(userid, request)
+        principal = cache.get(userid)
+        if principal is None:
+            principal = factory(userid, request)
+            if not IUnauthenticatedPrincipal.providedBy(principal):
+                cache.set(userid, principal)
+        return principal
+    return principal_factory
+
+
+def _resolve(value):
+    if value is None or callable(value):
+        return value
+    return DottedNameResolver().resolve(value)
+
+
+class _InteractionTween(object):
+
+    __slots__ = (
+        'handler',
+        'principal_factory',
+        'timing_hook',
+    )
+
+    def __init__(self, handler, principal_factory, timing_hook):
+        self.handler = handler
+        self.principal_factory = principal_factory
+        self.timing_hook = timing_hook
+
+    def __call__(self, request):
+        start = perf_counter()
+        mgmt = _interaction_management(request)
+        existing = mgmt.queryInteraction()
+        if existing is not None:
+            if id(existing) in _active_interactions:
+                # A subrequest of a request we're handling; leave
+                # its interaction alone.
+                return self.handler(request)
+            # Left behind by something else that ran on this thread;
+            # don't let this request run as its principal.
+            logger.warning("Ending stale interaction %r before handling %r",
+                           existing, request)
+            mgmt.endInteraction()
+
+        principal = self.principal_factory(request.authenticated_userid, request)
+        mgmt.newInteraction(_Participation(principal))
+        interaction = mgmt.queryInteraction()
+        _active_interactions[id(interaction)] = interaction
+        # Answer IPrincipal(request) without looking again.
+        _request_security_cache(request).values['principal'] = principal
+        elapsed = perf_counter() - start
+        try:
+            return self.handler(request)
+        finally:
+            start = perf_counter()
+            _active_interactions.pop(id(interaction), None)
+            mgmt.endInteraction()
+            elapsed += perf_counter() - start
+            if self.timing_hook is not None:
+                self.timing_hook(request, elapsed)
+
+
+def interaction_tween_factory(handler, registry):
+    """
+    A Pyramid tween factory that begins a Zope interaction for the
+    principal of each request (using the request's
+    :class:`~zope.security.interfaces.IInteractionManagement`) before
+    handling it, and ends it afterwards.
+
+    If the request already has an interaction begun by this tween for
+    a request that is still being handled, as subrequests do, it is
+    used unchanged. Any other existing interaction is left over from
+    something else, so it is logged and ended first.
+    """
+    settings = registry.settings or {}
+    principal_factory = _resolve(settings.get(PRINCIPAL_FACTORY_KEY)) or default_principal_factory
+    timing_hook = _resolve(settings.get(TIMING_HOOK_KEY))
+    principal_cache = component.queryUtility(IPrincipalCache)
+    if principal_cache is not None:
+        principal_factory = _caching_principal_factory(principal_factory, principal_cache)
+    return _InteractionTween(handler, principal_factory, timing_hook)
+
+
+def includeme(config):
+    """
+    Add the :func:`interaction_tween_factory` to the configuration.
+    """
+    config.add_tween(__name__ + '.interaction_tween_factory')